@@ -1,11 +1,15 @@
 import re
 import os
+import sys
 import argparse
 from os import PathLike
 from collections import defaultdict
 from pathlib import Path
 from typing import Union, Optional
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'questa_run'))
+from waiver_parser import iter_text_records
+
 def extract_tool_commands(
     content: str,
     tool_command: str = 'lint report item',
@@ -14,8 +18,8 @@ def extract_tool_commands(
     """
     Extract complete tool waiver commands with line number tracking.
     
-    Parses TCL-style tool waiver commands that start with '<tool> report item' and end with '}',
-    while tracking their exact line numbers in the original file. Returns each command with
+    Parses TCL-style tool waiver commands that start with '<tool> report item' and end with the
+    '}' that balances their braces, while tracking their exact line numbers in the original file. Returns each command with
     its content and line number range.
 
     Args:
@@ -54,56 +58,20 @@ def extract_tool_commands(
             raise ValueError(f"Invalid tool name: '{tool}' (must be non-empty valid identifier)")
 
     commands = []          # Stores complete commands as (text, start_line, end_line)
-    current_command = []   # Accumulates lines for current command being processed
-    in_command = False     # State flag indicating we're inside a command
-    current_line_start = 0 # Tracks starting line of current command
-    line_count = 0         # Counter for total lines processed (for error reporting)
+    line_count = 0         # Last line parsed (for error reporting)
 
     try:
-        # Process each line with 1-based numbering
-        for i, line in enumerate(content.splitlines(), 1):
-            line_count = i
-            stripped = line.strip()
-            
-            # Command start detection
-            if stripped.startswith(tool_command):
-                # Save previous command if exists
-                if current_command:
-                    commands.append(("\n".join(current_command), current_line_start, i-1))
-                
-                # Start new command
-                current_command = [stripped]
-                in_command = True
-                current_line_start = i
-                
-            # Command continuation
-            elif in_command:
-                current_command.append(stripped)
-                
-                # Command end detection
-                if stripped.endswith("}"):
-                    cmd_text = "\n".join(current_command)
-                    
-                    # Validation (runs regardless of validate flag)
-                    if "{" in cmd_text and cmd_text.count("{") != cmd_text.count("}"):
-                        print(f"Warning: Unbalanced braces in command at line {i}")
-                    
-                    commands.append((cmd_text, current_line_start, i))
-                    current_command = []
-                    in_command = False
-
-        # Handle unterminated commands (missing closing })
-        if current_command:
-            cmd_text = "\n".join(current_command)
-            commands.append((cmd_text, current_line_start, line_count))
-            if "}" not in cmd_text:
-                print(f"Warning: Unterminated command at line {current_line_start}")
-                
+        # Brace-aware streaming parse shared with redundant_waivers.py (questa_run/waiver_parser.py)
+        for record in iter_text_records(content, tool_command):
+            line_count = record.end_line
+            cmd_text = record.stripped_text()
+            if "{" in cmd_text and cmd_text.count("{") != cmd_text.count("}"):
+                print(f"Warning: Unbalanced braces in command at line {record.end_line}")
+            commands.append((cmd_text, record.start_line, record.end_line))
     except Exception as e:
         # Provide context for parsing errors
         raise RuntimeError(
-            f"Parsing failed at line {line_count}: {str(e)}\n"
-            f"Current command context: {current_command[-3:] if current_command else 'None'}"
+            f"Parsing failed after line {line_count}: {str(e)}"
         )
 
     # Post-processing validation (only when validate=True)
@@ -367,6 +335,8 @@ if __name__ == "__main__":
                        help='List of checks to group (space-separated)')
     parser.add_argument('-o','--output-dir', default='grouped_checks',
                        help='Output directory for grouped files (default: grouped_checks)')
+    parser.add_argument('--offline', action='store_true',
+                       help='Find duplicate and subsumed waivers by static analysis instead of the qverify log')
     
     args = parser.parse_args()
     
@@ -378,5 +348,13 @@ if __name__ == "__main__":
         )
     
     # Clean waiver file
-    if args.waiver_file:
+    if args.waiver_file and args.offline:
+        from waiver_dedup import find_redundant, write_cleaned
+        from waiver_model import load_waivers
+        redundant = find_redundant(load_waivers(args.waiver_file))
+        if redundant:
+            write_cleaned(args.waiver_file, redundant)
+        else:
+            print("Warning: No duplicate or subsumed waivers found")
+    elif args.waiver_file:
         clean_waiver_file(args.waiver_file, args.input_file, None)
\ No newline at end of file
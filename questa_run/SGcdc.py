@@ -117,6 +117,11 @@ class SpyglassCDCPlugin(BaseTool):
 
         return tcl_script
 
+    def _def_postscript(self, opts):
+        compile_action = '\n'
+        compile_action += self._def_history(opts,reports=[f'{opts.workdir}/moresimple.csv'])
+        return compile_action
+
     def gui_mode(self,opts):
         self.gen_abspath(opts=opts)
         command=opts.workdir+'/'+"compile_"+opts.subparser_name+"_gui"
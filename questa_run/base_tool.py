@@ -755,6 +755,15 @@ class BaseTool(ABC, AbsPathTool, StringUtil, ArgParser):
         compile_action = ''
         return compile_action
         
+    def _def_history(self,opts,reports) -> str:
+        """Postscript lines storing this run's reports in the violation history database (violation_db.py)."""
+        if getattr(opts,'no_history',False):
+            return ''
+        compile_action = '# Store the violations of this run in the history database\n'
+        compile_action += f'python3 {self._questa_run_dir}/violation_db.py ingest -t {opts.top} --tool {opts.subparser_name} -o {opts.workdir} -r {" ".join(reports)}'
+        compile_action += ' || echo "Warning: violation history database not updated"\n\n'
+        return compile_action
+        
     def _def_vlog(self,opts):
         compile_action = ''
         if not opts.febuild:
@@ -920,6 +929,13 @@ class BaseTool(ABC, AbsPathTool, StringUtil, ArgParser):
                 'help': 'Clean work directory',
                 'action': 'store_true',
                 'default': False
+            },
+            'no_history': {
+                'short': '-nh',
+                'long': '--no_history',
+                'help': 'Do not store the run results in the violation history database',
+                'action': 'store_true',
+                'default': False
             }
         }
 
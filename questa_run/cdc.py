@@ -73,6 +73,7 @@ configure output directory . \\\n"
     def _def_postscript(self,opts):
         compile_action = ''
         compile_action += f'mv {opts.workdir}/Results/*.rpt {opts.workdir}/Results/report/ \n'
+        compile_action += self._def_history(opts,reports=[f'{opts.workdir}/Results/report/{opts.top}_cdc_detail.csv'])
         return compile_action
 
     def _def_args(self,opts):
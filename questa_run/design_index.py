@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+from string_util import StringUtil
+from filelist import read_filelist
+from sv_lexer import KEYWORDS, SourceText
+from sv_cache import DEFAULT_CACHE, SourceCache, analyzer, source_artifacts
+from sv_preprocessor import preprocessed_artifacts
+
+ARTIFACT = 'design_units'
+# Declaration keyword -> closing keyword
+UNIT_KINDS = {
+    'module': 'endmodule',
+    'macromodule': 'endmodule',
+    'interface': 'endinterface',
+    'package': 'endpackage',
+    'class': 'endclass',
+    'program': 'endprogram',
+}
+# Units whose body can instantiate modules and interfaces
+_INSTANTIATING = ('module', 'interface', 'program')
+# Tokens after which an identifier starts a new item, e.g. a module instantiation
+_ITEM_START = frozenset((';', ')', ':', 'begin', 'end', 'else', 'generate', 'endgenerate'))
+
+
+class Declaration(NamedTuple):
+    kind: str       # module, interface, package, class or program
+    name: str
+    file: str
+    line: int
+    end_line: int   # line of the closing keyword, 0 if missing
+
+
+class Instance(NamedTuple):
+    parent: str     # module/interface/program holding the instance
+    module: str     # instantiated module or interface
+    name: str       # instance name
+    file: str
+    line: int
+
+
+# Only what declarations and instantiations are made of: strings, numbers (so their digits are not names),
+# names and brackets, plus the assignment and comparison operators so 'q = f(a)' is not read as an instance;
+# other operators are skipped. Runs on the comment-stripped text, so it is much faster than tokenize().
+_SCAN_RE = re.compile(r"\"(?:[^\"\\\n]|\\[\s\S])*\"?|\\\S+|[A-Za-z_][\w$]*|`[A-Za-z_][\w$]*|\d[\w$']*|'\w+|::|[#()\[\]{};:]"
+                      r"|(?:<<<?|>>>?|[-+*/%&|^!<>=])?=+")
+_CLOSING = {'(': ')', '[': ']', '{': '}'}
+
+
+def _skip_balanced(texts: List[str], i: int) -> int:
+    """Index after the bracket group opening at texts[i], len(texts) if unbalanced."""
+    opening = texts[i]
+    closing = _CLOSING[opening]
+    depth = 0
+    while i < len(texts):
+        text = texts[i]
+        if text == opening:
+            depth += 1
+        elif text == closing:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _is_name(text: str) -> bool:
+    return text[0] == '\\' or (text[0].isalpha() or text[0] == '_') and text not in KEYWORDS
+
+
+@analyzer(ARTIFACT, version=2)
+def find_design_units(source: SourceText) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Declarations and instantiations of one file.
+
+    Units are found by their keywords (a forward 'typedef class', 'virtual interface'
+    and 'interface class' are told apart); instantiations are 'type [#(...)] name
+    [...] (' items inside a module, interface or program, the name followed directly
+    by its unpacked dimensions or ports. Both `ifdef branches are scanned.
+
+    Returns:
+        tuple: ([(kind, name, line, end_line)], [(parent, module, instance, line)])
+    """
+    if not any(keyword in source.text for keyword in UNIT_KINDS):
+        return [], []
+    text = source.stripped
+    matches = list(_SCAN_RE.finditer(text))
+    texts = [m.group() for m in matches]
+    line, counted = 1, 0
+
+    def line_of(i):
+        nonlocal line, counted
+        offset = matches[i].start()
+        line += text.count('\n', counted, offset)
+        counted = offset
+        return line
+
+    units, instances = [], []
+    stack = []      # open units: [kind, name, index in units]
+    count = len(texts)
+    i = 0
+    while i < count:
+        token = texts[i]
+        previous = texts[i - 1] if i else ';'
+        if i >= 2 and texts[i - 2] == ':' and _is_name(previous):
+            previous = ':'      # after a 'begin : label'
+        if token in KEYWORDS:
+            if token in UNIT_KINDS and previous not in ('typedef', 'virtual', 'extern') and not (
+                    token == 'interface' and i + 1 < count and texts[i + 1] == 'class'):
+                j = i + 1
+                while j < count and texts[j] in ('automatic', 'static', 'class'):
+                    j += 1
+                if j < count and _is_name(texts[j]):
+                    kind = 'module' if token == 'macromodule' else token
+                    stack.append([kind, texts[j], len(units)])
+                    units.append([kind, texts[j], line_of(i), 0])
+                    i = j + 1
+                    continue
+            elif stack and token == UNIT_KINDS[stack[-1][0]]:
+                units[stack.pop()[2]][3] = line_of(i)
+            i += 1
+            continue
+        if stack and stack[-1][0] in _INSTANTIATING and previous in _ITEM_START and i + 2 < count and _is_name(token):
+            j = i + 1
+            if texts[j] == '#' and j + 1 < count and texts[j + 1] == '(':
+                j = _skip_balanced(texts, j + 1)
+            if j < count and _is_name(texts[j]):
+                name = texts[j]
+                j += 1
+                while j < count and texts[j] == '[':
+                    j = _skip_balanced(texts, j)
+                if j < count and texts[j] == '(':
+                    instances.append((stack[-1][1], token, name, line_of(i)))
+                    i = _skip_balanced(texts, j)
+                    continue
+        i += 1
+    return [tuple(unit) for unit in units], instances
+
+
+class DesignIndex:
+    """
+    Where each module, interface, package, class and program of a design is declared,
+    and which modules/interfaces each unit instantiates.
+
+    Build it with DesignIndex.build(); the per-file scan runs in a process pool and is
+    cached in sv_cache, so only changed files are read again.
+    """
+
+    def __init__(self, declarations: Iterable[Declaration] = (), instances: Iterable[Instance] = (),
+                 files: Sequence[str] = (), unreadable: Sequence[str] = ()):
+        self.files = list(files)
+        self.unreadable = list(unreadable)
+        self.declarations: Dict[str, List[Declaration]] = {}
+        self.by_file: Dict[str, List[Declaration]] = {}
+        self.children: Dict[str, List[Instance]] = {}      # parent -> its instances
+        self.parents: Dict[str, List[Instance]] = {}       # instantiated unit -> instances of it
+        for declaration in declarations:
+            self.declarations.setdefault(declaration.name, []).append(declaration)
+            self.by_file.setdefault(declaration.file, []).append(declaration)
+        for instance in instances:
+            self.children.setdefault(instance.parent, []).append(instance)
+            self.parents.setdefault(instance.module, []).append(instance)
+
+    @classmethod
+    def build(
+        cls,
+        files: Sequence[str],
+        cache: Optional[SourceCache] = None,
+        executor=None,
+        chunk_size: int = 16,
+        preprocess: bool = False,
+        incdirs: Sequence[str] = (),
+        defines: Optional[Dict[str, str]] = None
+    ) -> 'DesignIndex':
+        """
+        Index the sources of a filelist (see find_design_units).
+
+        With preprocess, the files are scanned after preprocessing with the filelist
+        incdirs and defines, so only the active `ifdef branches count; units and
+        instances coming from an included file are reported there.
+        """
+        files = [os.path.abspath(path) for path in dict.fromkeys(files)]
+        if preprocess:
+            return cls._build_preprocessed(files, cache, executor, chunk_size, incdirs, defines)
+        declarations, instances, unreadable = [], [], []
+        for path, found in zip(files, source_artifacts(files, ARTIFACT, cache, executor, chunk_size)):
+            if found is None:
+                unreadable.append(path)
+                continue
+            units, uses = found
+            declarations.extend(Declaration(kind, name, path, line, end_line) for kind, name, line, end_line in units)
+            instances.extend(Instance(parent, module, name, path, line) for parent, module, name, line in uses)
+        return cls(declarations, instances, files, unreadable)
+
+    @classmethod
+    def _build_preprocessed(cls, files, cache, executor, chunk_size, incdirs, defines) -> 'DesignIndex':
+        declarations, instances, unreadable = {}, {}, []
+        for path, outcome in zip(files, preprocessed_artifacts(files, [ARTIFACT], incdirs, defines, cache, executor, chunk_size)):
+            if outcome is None:
+                unreadable.append(path)
+                continue
+            result, found = outcome
+            origin = result.line_map.origin
+            units, uses = found[ARTIFACT]
+            # dicts: a header included by several files is found once per file
+            for kind, name, line, end_line in units:
+                file, first = origin(line)
+                declarations.setdefault(Declaration(kind, name, file, first, origin(end_line)[1] if end_line else 0))
+            for parent, module, name, line in uses:
+                instances.setdefault(Instance(parent, module, name, *origin(line)))
+        return cls(declarations, instances, files, unreadable)
+
+    def where(self, name: str) -> List[Declaration]:
+        """Declarations of a unit (more than one if it is declared in several files)."""
+        return self.declarations.get(name, [])
+
+    def instantiated_by(self, name: str) -> List[Instance]:
+        """Instances of a module or interface, wherever they are."""
+        return self.parents.get(name, [])
+
+    def instantiates(self, name: str) -> List[Instance]:
+        """Instances inside a module, interface or program."""
+        return self.children.get(name, [])
+
+    def multiple_units(self, kinds: Sequence[str] = ('module',)) -> Dict[str, List[Declaration]]:
+        """Files declaring more than one unit of the given kinds, e.g. modules for 'lint fix -mm'."""
+        found = {}
+        for path, declarations in self.by_file.items():
+            units = [declaration for declaration in declarations if declaration.kind in kinds]
+            if len(units) > 1:
+                found[path] = units
+        return found
+
+    def duplicates(self) -> Dict[str, List[Declaration]]:
+        """Units declared more than once."""
+        return {name: declarations for name, declarations in self.declarations.items() if len(declarations) > 1}
+
+    def undeclared(self) -> Dict[str, List[Instance]]:
+        """Instantiated units without a declaration in the indexed files (library cells, typos, missing files)."""
+        return {name: instances for name, instances in self.parents.items() if name not in self.declarations}
+
+    def tops(self) -> List[str]:
+        """Modules no indexed unit instantiates, in declaration order."""
+        return [name for name, declarations in self.declarations.items()
+                if declarations[0].kind == 'module' and name not in self.parents]
+
+    def hierarchy(self, top: str) -> Set[str]:
+        """Units reachable from top through instantiations, top included."""
+        seen, pending = set(), [top]
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            pending.extend(instance.module for instance in self.children.get(name, []))
+        return seen
+
+    def files_of(self, units: Iterable[str]) -> List[str]:
+        """Files declaring the given units, in filelist order, e.g. to prune a filelist to hierarchy(top)."""
+        wanted = {declaration.file for name in units for declaration in self.declarations.get(name, [])}
+        return [path for path in self.files if path in wanted]
+
+    def summary(self) -> str:
+        kinds = Counter(declaration.kind for declarations in self.declarations.values() for declaration in declarations)
+        rows = [[kind, str(kinds.get(kind, 0))] for kind in UNIT_KINDS if kind != 'macromodule']
+        rows += [['instances', str(sum(len(instances) for instances in self.children.values()))],
+                 ['files with several modules', str(len(self.multiple_units()))],
+                 ['units declared twice or more', str(len(self.duplicates()))],
+                 ['undeclared instantiated units', str(len(self.undeclared()))],
+                 ['top modules', str(len(self.tops()))]]
+        return StringUtil().table([f'Design index ({len(self.files)} files)', 'Count'], rows, style='round', align=['left', 'right'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index where the modules, interfaces, packages, classes and programs of a design are declared and instantiated')
+    parser.add_argument('-f', '--filelist', nargs='+', required=True, help='Filelist(s) of the design')
+    parser.add_argument('-w', '--where', nargs='+', default=[], help='Print where these units are declared')
+    parser.add_argument('-u', '--users', nargs='+', default=[], help='Print the instances of these units')
+    parser.add_argument('-t', '--top', default=None, help='Print the files of the hierarchy under this module')
+    parser.add_argument('-m', '--multiple', action='store_true', help='List the files declaring more than one module')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('-db', '--cache', default=DEFAULT_CACHE, help=f'Source analysis cache (default: {DEFAULT_CACHE})')
+    parser.add_argument('--no_cache', action='store_true', help='Scan every file, do not read or write the cache')
+    parser.add_argument('--no_preprocess', action='store_true', help='Scan both `ifdef branches instead of preprocessing with the filelist +define+/+incdir+')
+    args = parser.parse_args()
+
+    sources = read_filelist(args.filelist)
+    options = dict(preprocess=not args.no_preprocess, incdirs=sources.incdirs, defines=sources.defines)
+    for path in sources.missing:
+        print(f"Warning: filelist not found: {path}")
+    start = time.perf_counter()
+    with SourceCache(None if args.no_cache else args.cache) as cache:
+        if (args.jobs or os.cpu_count() or 1) > 1 and len(sources.files) > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                index = DesignIndex.build(sources.files, cache, executor, **options)
+        else:
+            index = DesignIndex.build(sources.files, cache, **options)
+    print(index.summary())
+    print(f"Indexed in {time.perf_counter() - start:.2f} s")
+    for path in index.unreadable:
+        print(f"Warning: could not read {path}")
+
+    for name in args.where:
+        declarations = index.where(name)
+        if not declarations:
+            print(f"{name}: not declared")
+        for declaration in declarations:
+            print(f"{name}: {declaration.kind} in {os.path.relpath(declaration.file)}:{declaration.line}")
+    for name in args.users:
+        instances = index.instantiated_by(name)
+        if not instances:
+            print(f"{name}: not instantiated")
+        for instance in instances:
+            print(f"{name}: {instance.parent}.{instance.name} in {os.path.relpath(instance.file)}:{instance.line}")
+    if args.top:
+        if args.top not in index.declarations:
+            print(f"Error: top {args.top} is not declared in the filelist")
+            sys.exit(1)
+        for path in index.files_of(index.hierarchy(args.top)):
+            print(path)
+    if args.multiple:
+        rows = [[os.path.relpath(path), ', '.join(declaration.name for declaration in declarations)]
+                for path, declarations in index.multiple_units().items()]
+        print(StringUtil().table(['File', 'Modules'], rows, style='round'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+from sv_lexer import COMMENT_KINDS, DIRECTIVE, SourceText, Token, logical_line_end, tokenize
+from sv_cache import ANALYZERS, SourceCache, source_artifacts
+
+ARTIFACT = 'ext_checks'
+
+
+class ExtViolation(NamedTuple):
+    check: str
+    file: str
+    line: int
+    message: str
+
+
+class FileContext:
+    """What a check sees of the file being visited; violations are collected per check."""
+
+    def __init__(self, source: SourceText):
+        self.source = source
+        self.path = source.path
+        self.text = source.text     # text the token offsets refer to
+        self.tokens: List[Token] = []
+        self.index = 0          # position of the token being dispatched in tokens
+        self.check = ''         # name of the check being called
+        self.found: Dict[str, List[Tuple[int, str]]] = {}
+
+    def report(self, line: int, message: str) -> None:
+        self.found.setdefault(self.check, []).append((line, message))
+
+    def following(self, count: int = 1) -> List[Token]:
+        """Up to count tokens after the current one, comments skipped."""
+        found = []
+        i = self.index + 1
+        while i < len(self.tokens) and len(found) < count:
+            if self.tokens[i].kind not in COMMENT_KINDS:
+                found.append(self.tokens[i])
+            i += 1
+        return found
+
+    def preceding(self) -> Optional[Token]:
+        """Last token before the current one that is not a comment."""
+        i = self.index - 1
+        while i >= 0 and self.tokens[i].kind in COMMENT_KINDS:
+            i -= 1
+        return self.tokens[i] if i >= 0 else None
+
+
+class ExtCheck:
+    """
+    Base of the extension checks run by visit_source().
+
+    A check subscribes to events through its class attributes: token kinds (kinds),
+    compiler directives by text (directives, e.g. '`include') and source lines (lines).
+    One instance is made per file; begin/on_token/on_line/end run in the worker that
+    visits the file. Design-wide checks return per-file data from end() and compare it
+    across files in finish(), which runs once in the main process.
+    """
+    name = ''
+    version = 1             # bump when the check reports differently, so cached results are recomputed
+    kinds: Tuple[str, ...] = ()
+    directives: Tuple[str, ...] = ()
+    lines = False
+
+    def begin(self, ctx: FileContext) -> None:
+        pass
+
+    def on_token(self, ctx: FileContext, token: Token) -> None:
+        pass
+
+    def on_line(self, ctx: FileContext, number: int, text: str) -> None:
+        pass
+
+    def end(self, ctx: FileContext):
+        """Per-file data for finish() (must be marshal-able)."""
+        return None
+
+    @classmethod
+    def finish(cls, files: Sequence[str], data: Sequence[object]) -> List[ExtViolation]:
+        """Design-wide violations from the end() data of every file, in filelist order."""
+        return []
+
+
+REGISTRY: Dict[str, Type[ExtCheck]] = {}
+
+
+def register_check(cls: Type[ExtCheck]) -> Type[ExtCheck]:
+    """Class decorator adding a check to the registry; the cached results of every file are invalidated."""
+    REGISTRY[cls.name] = cls
+    signature = ','.join(f'{name}:{check.version}' for name, check in sorted(REGISTRY.items()))
+    ANALYZERS[ARTIFACT] = (zlib.crc32(signature.encode()), visit_source)
+    return cls
+
+
+def directive_line_tokens(text: str, directives: Sequence[str]) -> List[Token]:
+    """Tokens of only the logical lines of text holding one of the directives, with their line and offset in text."""
+    starts = set()
+    for directive in directives:
+        i = text.find(directive)
+        while i != -1:
+            starts.add(text.rfind('\n', 0, i) + 1)
+            i = text.find(directive, i + 1)
+    tokens = []
+    line, counted, end = 1, 0, -1
+    for start in sorted(starts):
+        if start <= end:
+            continue        # continuation line of the previous directive
+        line += text.count('\n', counted, start)
+        counted = start
+        end = logical_line_end(text, start)
+        tokens.extend(token._replace(line=token.line + line - 1, offset=token.offset + start)
+                      for token in tokenize(text[start:end]))
+    return tokens
+
+
+def visit_source(source: SourceText) -> Dict[str, Tuple[List[Tuple[int, str]], object]]:
+    """
+    Run every registered check over one file in a single pass.
+
+    The file is tokenized once if a check subscribes to a token kind. When checks only
+    subscribe to directives, just the lines holding them are tokenized, from the
+    comment-stripped text (ctx.text), so a directive in a comment is not reported. Each
+    token is handed to the checks subscribed to its kind or directive text, then each
+    line to the line checks.
+
+    Returns:
+        dict: check name -> ([(line, message)], end() data)
+    """
+    checks = [cls() for cls in REGISTRY.values()]
+    ctx = FileContext(source)
+    by_kind, by_directive, line_checks = {}, {}, []
+    for check in checks:
+        for kind in check.kinds:
+            by_kind.setdefault(kind, []).append(check)
+        for directive in check.directives:
+            if directive in source.text:
+                by_directive.setdefault(directive, []).append(check)
+        if check.lines:
+            line_checks.append(check)
+        ctx.check = check.name
+        check.begin(ctx)
+
+    if by_kind:
+        ctx.tokens = source.tokens
+    elif by_directive:
+        ctx.text = source.stripped
+        ctx.tokens = directive_line_tokens(source.stripped, list(by_directive))
+    for i, token in enumerate(ctx.tokens):
+        handlers = by_kind.get(token.kind)
+        if token.kind == DIRECTIVE and token.text in by_directive:
+            handlers = (handlers or []) + by_directive[token.text]
+        if handlers:
+            ctx.index = i
+            for check in handlers:
+                ctx.check = check.name
+                check.on_token(ctx, token)
+    if line_checks:
+        for number, text in enumerate(source.text.split('\n'), 1):
+            for check in line_checks:
+                ctx.check = check.name
+                check.on_line(ctx, number, text)
+
+    results = {}
+    for check in checks:
+        ctx.check = check.name
+        data = check.end(ctx)
+        results[check.name] = (ctx.found.get(check.name, []), data)
+    return results
+
+
+def check_files(
+    files: Sequence[str],
+    cache: Optional[SourceCache] = None,
+    executor=None,
+    chunk_size: int = 16
+) -> List[Optional[Dict[str, Tuple[List[Tuple[int, str]], object]]]]:
+    """visit_source() results of each file (None if unreadable), from the cache when one is given."""
+    return source_artifacts(files, ARTIFACT, cache, executor, chunk_size)
+
+
+# Registered here so the artifact exists before any check is
+ANALYZERS[ARTIFACT] = (0, visit_source)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import argparse
+from typing import Dict, List, NamedTuple, Optional, Union
+
+# $VAR, ${VAR} and $(VAR) references in filelist lines
+_VARIABLE_RE = re.compile(r'\$(?:\{(\w+)\}|\((\w+)\)|(\w+))')
+# Options followed by an argument: nested filelists, library files (sources) and others to skip
+_FILELIST_OPTIONS = ('-f', '-F')
+_SOURCE_OPTIONS = ('-v',)
+_SKIPPED_OPTIONS = ('-y', '-work', '-L', '-Lf', '-timescale')
+
+
+class Filelist(NamedTuple):
+    files: List[str]            # source files, absolute, in filelist order, without duplicates
+    incdirs: List[str]          # +incdir+ directories, absolute
+    defines: Dict[str, str]     # +define+ macros (value '' for a bare +define+NAME)
+    missing: List[str]          # -f filelists that could not be read
+
+
+def expand_variables(line: str, variables: Optional[Dict[str, str]] = None) -> str:
+    """Replace $VAR, ${VAR} and $(VAR) by variables[VAR] or the environment; unknown references are kept."""
+    def replace(m):
+        name = m.group(1) or m.group(2) or m.group(3)
+        value = (variables or {}).get(name, os.environ.get(name))
+        return m.group(0) if value is None else value
+    return _VARIABLE_RE.sub(replace, line)
+
+
+def read_filelist(
+    paths: Union[str, List[str]],
+    variables: Optional[Dict[str, str]] = None
+) -> Filelist:
+    """
+    Read Questa filelists, following nested -f/-F filelists.
+
+    Relative paths are resolved against the directory of the filelist naming them, like
+    BaseTool.gen_filelist_abspaths does. -v library files count as sources; comment
+    lines ('#', '//', '--') and other tool options (-y, +libext+, ...) are skipped.
+
+    Args:
+        paths: Filelist(s), e.g. the filelist.f written by gen_filelist_abspaths
+        variables: Values of $(CompPath)-style references, taking precedence over the environment
+
+    Returns:
+        Filelist: files, include directories, defines and unreadable nested filelists
+    """
+    files, incdirs, defines, missing = [], [], {}, []
+    seen = set()
+    visited = set()
+
+    def add_source(path):
+        if path not in seen:
+            seen.add(path)
+            files.append(path)
+
+    def visit(path):
+        path = os.path.abspath(path)
+        if path in visited:
+            return
+        visited.add(path)
+        try:
+            with open(path, 'r', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            missing.append(path)
+            return
+        base = os.path.dirname(path)
+        pending = None      # option waiting for its argument
+        for line in lines:
+            line = line.split('//', 1)[0].strip()
+            if not line or line.startswith(('#', '--')):
+                continue
+            for word in expand_variables(line, variables).split():
+                if word.startswith('+incdir+'):
+                    incdirs.extend(os.path.normpath(os.path.join(base, d)) for d in word[8:].split('+') if d)
+                elif word.startswith('+define+'):
+                    for define in word[8:].split('+'):
+                        if define:
+                            name, _, value = define.partition('=')
+                            defines.setdefault(name, value)
+                elif pending is not None:
+                    if pending in _FILELIST_OPTIONS:
+                        visit(os.path.join(base, word))
+                    elif pending in _SOURCE_OPTIONS:
+                        add_source(os.path.normpath(os.path.join(base, word)))
+                    pending = None
+                elif word.startswith(('+', '-')):
+                    if word in _FILELIST_OPTIONS + _SOURCE_OPTIONS + _SKIPPED_OPTIONS:
+                        pending = word
+                else:
+                    add_source(os.path.normpath(os.path.join(base, word)))
+
+    for path in [paths] if isinstance(paths, (str, os.PathLike)) else paths:
+        visit(path)
+    return Filelist(files, incdirs, defines, missing)
+
+
+def rewrite_filelist(
+    paths: Union[str, List[str]],
+    replacements: Dict[str, List[str]],
+    backup: Optional[str] = '.orig',
+    variables: Optional[Dict[str, str]] = None
+) -> List[str]:
+    """
+    Replace source files of filelists (and their nested -f/-F filelists) by other files.
+
+    Entries alone on their line are replaced, by one line per new file with the indentation of the old line;
+    new files are written relative to the filelist if the old entry was relative, else
+    absolute. Comments, options and other lines are kept as they are.
+
+    Args:
+        paths: Filelist(s)
+        replacements: Absolute source file -> files to list instead, e.g. the module files it was split into
+        backup: Suffix of the copy of each rewritten filelist (None: no copy)
+        variables: Values of $(CompPath)-style references, as for read_filelist()
+
+    Returns:
+        list: Filelists that were rewritten
+    """
+    rewritten = []
+    visited = set()
+
+    def visit(path):
+        path = os.path.abspath(path)
+        if path in visited or not os.path.isfile(path):
+            return
+        visited.add(path)
+        with open(path, 'r', errors='replace') as f:
+            lines = f.read().splitlines(True)
+        base = os.path.dirname(path)
+        output, changed, pending = [], False, None
+        for line in lines:
+            code = line.split('//', 1)[0].strip()
+            words = [] if not code or code.startswith(('#', '--')) else code.split()
+            replaced = None
+            for word in words:
+                resolved = expand_variables(word, variables)
+                if pending is not None:
+                    if pending in _FILELIST_OPTIONS:
+                        visit(os.path.join(base, resolved))
+                    pending = None
+                elif word in _FILELIST_OPTIONS + _SOURCE_OPTIONS + _SKIPPED_OPTIONS:
+                    pending = word
+                elif not word.startswith(('+', '-')) and len(words) == 1:
+                    replaced = replacements.get(os.path.normpath(os.path.join(base, resolved)))
+            if replaced is None:
+                output.append(line)
+                continue
+            indent = line[:len(line) - len(line.lstrip())]
+            relative = not os.path.isabs(expand_variables(words[0], variables))
+            output.extend(f"{indent}{os.path.relpath(new, base) if relative else new}\n" for new in replaced)
+            changed = True
+        if changed:
+            if backup:
+                with open(path + backup, 'w') as f:
+                    f.writelines(lines)
+            with open(path + '.tmp', 'w') as f:
+                f.writelines(output)
+            os.replace(path + '.tmp', path)
+            rewritten.append(path)
+
+    for path in [paths] if isinstance(paths, (str, os.PathLike)) else paths:
+        visit(path)
+    return rewritten
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List the sources, include directories and defines of Questa filelists')
+    parser.add_argument('filelist', nargs='+', help='Filelist(s)')
+    args = parser.parse_args()
+
+    result = read_filelist(args.filelist)
+    for path in result.files:
+        print(path)
+    for path in result.incdirs:
+        print(f'+incdir+{path}')
+    for name, value in result.defines.items():
+        print(f'+define+{name}={value}' if value else f'+define+{name}')
+    for path in result.missing:
+        print(f"Error: filelist not found: {path}", file=sys.stderr)
+    if result.missing:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -33,7 +33,15 @@ def lint_report_console() -> str:
     file_headers = ["Short Option", "Long Option", "Description", "Required?", "Default"]
     file_rows = [
         ["-f", "--file", "Full lint report file path", "No", "''"],
-        ["-regexp", "--regexp", "Regular expression pattern for filtering", "No", "''"]
+        ["-regexp", "--regexp", "Only show violations matching any of these patterns (one pass)", "No", "[]"],
+        ["-rf", "--regexp_file", "File with one -regexp pattern per line", "No", "''"],
+        ["-lit", "--literal", "Treat -regexp patterns as plain strings", "No", "False"],
+        ["-ic", "--ignore_case", "Case insensitive -regexp matching", "No", "False"],
+        ["-gb", "--group_by", "Count JSON/CSV violations by check/module/file/severity/status", "No", "''"],
+        ["-q", "--query", "Filter violations as <field>=<value> (glob allowed)", "No", "[]"],
+        ["-n", "--limit", "Only show the N largest groups", "No", "0"],
+        ["-diff", "--diff", "Reference JSON/CSV report, list new/fixed/persisting violations", "No", "''"],
+        ["-tr", "--trend", "Per-check trend of the last N runs (default 20) from the run history", "No", "0"]
     ]
     output.append(su.table(file_headers, file_rows, style="round", align='left'))
     output.append("")
@@ -57,8 +65,17 @@ def lint_report_console() -> str:
         "# Split report by modules:",
         "questa_run report -t top_module -f lint_report.rpt -sbm",
         "",
-        "# Filter with regex and split by checks:",
-        "questa_run report -t top_module -f lint_report.rpt -regexp 'WARNING' -sbc"
+        "# Show the violations of a list of signals:",
+        "questa_run lint report -t top_module -f lint_full.rpt -regexp 'u_fifo\\.wr_ptr' 'rd_en_\\w+' -rf signals.txt",
+        "",
+        "# Count error violations per module from the JSON report:",
+        "questa_run lint report -t top_module -gb module -q severity=error",
+        "",
+        "# New/fixed violations compared to an older run:",
+        "questa_run lint report -t top_module -diff old/top_module_lint.json",
+        "",
+        "# Violation trend of the last 10 runs:",
+        "questa_run lint report -t top_module --trend 10"
     ]
     output.append(su.text_box("\n".join(examples), style="double", language='bash'))
     output.append("")
@@ -144,7 +161,8 @@ or: rdc <common_arguments> <specific_arguments>""", style="double", language='ba
         ["-ext", "--external", "Define component is from external source", "No", "N/A", "False"],
         ["-cc", "--compile_cmd", "A vlog/vcom compile option file", "No", "Path", "None"],
         ["-w", "--waiver", "Lint Waiver File", "No", "Path", "None"],
-        ["-incr", "--incremental", "Specify lint run is an incremental run", "No", "N/A", "False"]
+        ["-incr", "--incremental", "Specify lint run is an incremental run", "No", "N/A", "False"],
+        ["-pc", "--precheck", "Check the goal's pattern and naming rules locally before submitting", "No", "Path(s)", "None"]
     ]
     output.append(su.table(lint_opt_headers, lint_opt_rows, style="round", align='left'))
     output.append("")
@@ -155,7 +173,8 @@ or: rdc <common_arguments> <specific_arguments>""", style="double", language='ba
     lint_pos_rows = [
         ["report", "Specify after lint to run some report commands.", "no", "string", "None"],
         ["fix", "Specify after lint to fix some lint violations.", "no", "string", "None"],
-        ["setup", "Specify after lint to automatically setup lint directory.", "no", "string", "None"]
+        ["setup", "Specify after lint to automatically setup lint directory.", "no", "string", "None"],
+        ["waiver", "Specify after lint to clean/group/merge/prune-unused/stale/hits many waiver files in parallel.", "no", "string", "None"]
     ]
     output.append(su.table(lint_pos_headers, lint_pos_rows, style="round", align='left'))
     output.append("")
@@ -5,12 +5,15 @@ from base_tool import BaseTool
 from tooldir_setup import ToolDirSetup
 from tool_report import ToolReport
 from tool_fix import ToolFix
+from tool_waiver import ToolWaiver
 from logger import Logger
 from string_util import StringUtil
 from argsparser import Extend, ArgParser
 import generate_txt 
 
 import lint_func
+import lint_precheck
+from sv_cache import SourceCache
 
 class CustomHelpFormatter(argparse.HelpFormatter):
     def _format_usage(self, *args, **kwargs):
@@ -49,6 +52,8 @@ class LintTool(BaseTool):
         tool_fix = ToolFix(tool='lint',path_dict=self.path_dict,cwd=self._current_dir,git_root=self._git_root,logger=self.logger,subparser=subparser_dict['fix'])
         # create class for lint setup
         tool_setup = ToolDirSetup(tool='lint',path_dict=self.path_dict,cwd=self._current_dir,git_root=self._git_root,logger=self.logger,subparser=subparser_dict['setup'])
+        # create class for bulk waiver maintenance
+        tool_waiver = ToolWaiver(tool='lint',path_dict=self.path_dict,cwd=self._current_dir,git_root=self._git_root,logger=self.logger,subparser=subparser_dict['waiver'])
     
     # overwrite BaseTool gen_abspath 
     def gen_abspath(self,opts) -> None:
@@ -60,6 +65,37 @@ class LintTool(BaseTool):
         self.logger.info("Path processing completed successfully")
         self.logger.line()
 
+    def run(self, opts):
+        if opts.precheck is not None:
+            self.precheck(opts)
+        return super().run(opts)
+
+    def precheck(self, opts) -> None:
+        """Evaluate the goal's pattern and naming rules on the filelist sources; exit before the job is built on error-severity violations."""
+        self.logger.underline('Running lint precheck...')
+        # $(CompPath) as gen_filelist_abspaths resolves it: -cp for febuild runs, else $CompPath or the git root
+        comppath = opts.comppath if opts.febuild else os.path.expandvars(self._comppath)
+        variables = {'CompPath': comppath} if comppath else None
+        with SourceCache() as cache:
+            violations, files, elapsed = lint_precheck.precheck_filelist(opts.filelist, opts.precheck, cache=cache, variables=variables)
+        self.logger.info(f'Precheck: {len(violations)} violations in {files} files ({elapsed:.2f} s)')
+        for warning in lint_precheck.pattern_warnings(lint_precheck.read_goal_rules(opts.precheck or lint_precheck.DEFAULT_GOALS)[0]):
+            print(f'Warning: {warning}')
+        if not violations:
+            print(f'Precheck passed: {files} files in {elapsed:.2f} s')
+            return
+        print(lint_precheck.precheck_summary(violations, files, elapsed))
+        for violation in violations[:50]:
+            print(f'  {os.path.relpath(violation.file)}:{violation.line}: [{violation.rule}] {violation.message}')
+        if len(violations) > 50:
+            print(f'  ... {len(violations) - 50} more, run lint_precheck.py -o <csv> for all of them')
+        errors = sum(1 for violation in violations if violation.severity == 'error')
+        if not errors:
+            print('Precheck passed with warnings only, submitting the lint job.')
+            return
+        print(f'Precheck failed with {errors} error(s), the lint job was not submitted.')
+        sys.exit(1)
+
     def gen_reports(self,top:str) -> str:
         compile_action = ''
         compile_action += self.line(with_backslash=True,newline=True)
@@ -239,6 +275,7 @@ class LintTool(BaseTool):
         compile_action += r'mkdir -p ${LINT_RUN_DIR}/rtl_lint/waivers'
         compile_action += f'\ntouch {self.waiver_file.format(top=opts.top)}\n'
         compile_action += r'mv ${WORKDIR}/Results/*.rpt ${WORKDIR}/Results/report/.' +'\n\n'
+        compile_action += self._def_history(opts,reports=[r'${WORKDIR}/Results/report/'+f'{opts.top}_lint.json'])
         return compile_action
     
     def _def_vlog(self,opts):
@@ -275,6 +312,14 @@ class LintTool(BaseTool):
                 'type': str,
                 'default': ""
             },
+            'precheck': {
+                'short': '-pc',
+                'long': '--precheck',
+                'help': 'evaluate the pattern/naming rules of the goal files (default: oc_lint goal) locally and stop before bsub on violations',
+                'nargs': '*',
+                'type': str,
+                'default': None
+            },
             'compile_cmd': {
                 'short': '-cc',
                 'long': '--compile_cmd',
@@ -303,6 +348,10 @@ class LintTool(BaseTool):
                 "help": "Specify to create the lint directory tree.",
                 "formatter_class": CustomHelpFormatter,
                 "add_help": False
+            },
+            "waiver": {
+                "help": "Clean, group, merge or prune-unused over many waiver files in parallel.",
+                "add_help": True
             }
         }
         return parsers_config
@@ -1,74 +1,28 @@
+import os
 import re
+from pathlib import Path
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from sv_lexer import (ATTRIBUTE, COMMENT_KINDS, DIRECTIVE, ESCAPED_IDENTIFIER, IDENTIFIER, KEYWORD, STRING,
+                      directive_body, logical_line_end, read_source, strip_comments, tokenize)
+from sv_cache import source_artifacts
+from filelist import read_filelist, rewrite_filelist
+from design_index import DesignIndex
+from ext_visitor import ExtCheck, ExtViolation, register_check, check_files
+
 def remove_sv_comments(content):
     """
     Removes SystemVerilog comments from either:
     - A file path (str) pointing to .sv/.v file
     - A raw string containing SystemVerilog code
     
-    Preserves string literals and removes:
-    - Block comments (/* ... */)
+    Preserves string literals and escaped identifiers and removes:
+    - Block comments (/* ... */), keeping their newlines so line numbers do not shift
     - Line comments (// ...)
     """
-    if isinstance(content, str) and '\n' not in content and len(content) < 256:
-    try:
-        with open(content, 'r') as f:
-            content = f.read()
-    except (IOError, OSError, UnicodeDecodeError):
-        pass  # Assume it's code if file open fails
-        
-    in_string = False
-    in_block_comment = False
-    in_line_comment = False
-    i = 0
-    n = 0
-    output = []
-    
-    while i < n:
-        if not in_string and not in_block_comment and not in_line_comment:
-            # Check for comment starts outside strings
-            if content.startswith("/*", i):
-                in_block_comment = True
-                i += 2
-                continue
-            elif content.startswith("//", i):
-                in_line_comment = True
-                i += 2
-                continue
-            elif content[i] == '"':
-                in_string = True
-                output.append(content[i])
-                i += 1
-                continue
-        else:
-            # Handle string literals (ignore /* or // inside them)
-            if in_string:
-                if content[i] == '"' and (i == 0 or content[i-1] != '\\'):
-                    in_string = False
-                output.append(content[i])
-                i += 1
-                continue
-            # Handle block comments
-            elif in_block_comment:
-                if content.startswith("*/", i):
-                    in_block_comment = False
-                    i += 2
-                    continue
-                i += 1
-                continue
-            # Handle line comments
-            elif in_line_comment:
-                if content[i] == '\n':
-                    in_line_comment = False
-                    output.append(content[i])  # Keep the newline
-                i += 1
-                continue
-
-        # Append non-comment characters
-        if not in_block_comment and not in_line_comment:
-            output.append(content[i])
-        i += 1
-
-    return ''.join(output)
+    if isinstance(content, str) and '\n' not in content and len(content) < 256 and os.path.isfile(content):
+        content = read_source(content)
+    return strip_comments(content)
 
 def check_include_relative_path(include_file) -> bool:
     
@@ -77,42 +31,85 @@ def check_include_relative_path(include_file) -> bool:
     else:
         return True
 
-def lint_check_include_line(filelist):
+@register_check
+class IncludeLineCheck(ExtCheck):
+    """`include must be alone on its line, apart from whitespace and comments."""
+    name = 'include_line'
+    directives = ('`include',)
+
+    def on_token(self, ctx, token):
+        following = ctx.following(2)
+        preceding = ctx.preceding()
+        alone = (len(following) >= 1 and following[0].kind == STRING and following[0].line == token.line
+                 and (len(following) < 2 or following[1].line > token.line)
+                 and (preceding is None or preceding.line < token.line))
+        if not alone:
+            ctx.report(token.line, 'Only whitespace/comments allowed with `include')
+
+
+@register_check
+class IncludePathCheck(ExtCheck):
+    """`include must name a relative path, found through +incdir+."""
+    name = 'include_path'
+    directives = ('`include',)
+
+    def on_token(self, ctx, token):
+        following = ctx.following()
+        if following and following[0].kind == STRING and not check_include_relative_path(following[0].text[1:-1]):
+            ctx.report(token.line, f'`include {following[0].text} must be relative and found through +incdir+')
+
+
+@register_check
+class DefineRedefinedCheck(ExtCheck):
+    """A macro must not be `defined again with a different body, in the same or another file."""
+    name = 'define_redefined'
+    directives = ('`define',)
+
+    def begin(self, ctx):
+        self.defines = []
+
+    def on_token(self, ctx, token):
+        following = ctx.following()
+        if following and following[0].kind in (IDENTIFIER, KEYWORD):
+            name = following[0]
+            body, _ = directive_body(ctx.text, name.offset + len(name.text))
+            self.defines.append((token.line, name.text, body))
+
+    def end(self, ctx):
+        return self.defines
+
+    @classmethod
+    def finish(cls, files, data):
+        first = {}
+        violations = []
+        for path, defines in zip(files, data):
+            for line, name, body in defines:
+                original = first.setdefault(name, (path, line, body))
+                if original[2] != body:
+                    violations.append(ExtViolation(cls.name, path, line, f'`define {name} differs from {original[0]}:{original[1]}'))
+        return violations
+
+
+def lint_check_include_line(filelist, cache=None):
     """
     Check that `include directives appear on lines by themselves,
     with only optional whitespace and/or a comment.
     
     Args:
         filelist: List of files to check
+        cache: Optional sv_cache.SourceCache, so unchanged files are not re-read
     Returns:
         dict: Mapping of filenames to lists of error line numbers
     """
     errors = {}
     
-    include_list = []
-    
-    include_pattern = re.compile(r'^\s*`include\s+"(\\.|[^"\\])*?"\s*$')
-    
-    for file in filelist:
-        try:
-            content = remove_sv_comments(file)
-            content = content.splitlines()
-            for line_num,line in enumerate(content,1):
-                line = line.strip() # remove leading and trailing white spaces
-                if  '`include' in line:
-                    include_line = include_pattern.fullmatch(line)
-                    if not include_line: # check if its the expected include pattern
-                        errors.setdefault(file, []).append(line_num)
-                    else: # if it is a full match
-                        check_include_relative_path(include_line.group(1))
-                        
-                    
-        except UnicodeDecodeError:
-            print(f'Warning: Could not read file {file} (likely binary file)')
-            continue
-        except Exception as e:
-            print(f'Error processing {file}: {str(e)}')
+    for file, results in zip(filelist, check_files(filelist, cache)):
+        if results is None:
+            print(f'Warning: Could not read file {file}')
             continue
+        found, _ = results[IncludeLineCheck.name]
+        if found:
+            errors[file] = [line_num for line_num, _ in found]
         
     # Print summary of errors
     for file, line_nums in errors.items():
@@ -123,59 +120,43 @@ def lint_check_include_line(filelist):
     return errors
     
     
-def extract_all_include(filelist) -> list:
-    include_pattern = re.compile(r'^\s*`include\s+"([^"]+)"\s*$')
+def extract_all_include(filelist, cache=None) -> list:
+    """
+    Extract all `include file names from Verilog files.
     
+    Returns:
+        List of tuples (filename, included file)
+    """
     include_list = []
     
-    for file in filelist:
-        try:
-            with open(file, 'r') as f:
-                for line in f:
-                    match = include_pattern.match(line.strip())
-                    if match:
-                        include_list.append((file, match.group(1)))
-        except IOError:
+    for file, includes in zip(filelist, source_artifacts(filelist, 'includes', cache)):
+        if includes is None:
             print(f"Warning: Could not read file {file}")
             continue
+        include_list.extend((file, include_file) for _, include_file, _ in includes if include_file)
                     
     return include_list
 
-def extract_all_define(filelist) -> list:
+def extract_all_define(filelist, cache=None) -> list:
     """
     Extract all `define macros from Verilog files.
     
     Args:
         filelist: List of file paths to search
+        cache: Optional sv_cache.SourceCache, so unchanged files are not re-read
     
     Returns:
         List of tuples (filename, define_name, define_value)
     """
-
-    # Pattern to match `define and capture the rest until non-continued line
-    define_pattern = re.compile(
-        r'^\s*`define\s+([a-zA-Z_]\w*)\s*((?:.*\\\n)*.*)',
-        re.MULTILINE
-    )    
-    
     define_list = []
     
-    for file in filelist:
-        try:
-            with open(file, 'r') as f:
-                content = f.read()
-                for match in define_pattern.finditer(content):
-                    define_name = match.group(1)
-                    define_value = match.group(2)
-                    # Remove trailing backslashes and join lines
-                    define_value = re.sub(r'\\\n', '', define_value).strip()
-                    define_list.append((file, define_name, define_value))
-        except IOError:
+    for file, defines in zip(filelist, source_artifacts(filelist, 'defines', cache)):
+        if defines is None:
             print(f"Warning: Could not read file {file}")
             continue
+        define_list.extend((file, define_name, define_value) for _, define_name, define_value in defines)
 
-        r'(?:(?:/\*.*?\*/)|(?://.*?\n)|(?:^\s*`.*?$))*(^\s*module\s+(\w+)\b(?:[^;]*?\);)?\s*(.*?)^\s*endmodule\b',
-        re.MULTILINE | re.DOTALL | re.IGNORECASE
+    return define_list
 
 def extract_module_name(line):
     """Extract module name without complex bracket counting"""
@@ -221,52 +202,161 @@ def extract_module_name(line):
     return line[start:pos] if start != pos else None
     
  
-def split_verilog_modules(input_file, output_dir="output"):
-    """Split a Verilog file with multiple modules into separate files."""
-    
-    # Create output directory if it doesn't exist
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-    
-    with open(input_file, 'r') as f:
-        content = f.read()
-    
-    clean_content = remove_sv_comments(content)
-    
-    # Process both original and clean content
-    orig_lines = original_content.split('\n')
-    clean_lines = clean_content.split('\n')
-    
-    modules = []
-    current_module = None
-    in_module = False
-    pre_content = []
-    
-    for i, (orig_line, clean_line) in enumerate(zip(orig_lines, clean_lines)):
-        clean_line_stripped = clean_line.strip()
-        if not in_module:
-            # Detect module start (ignoring comments)
-            if re.match(r'^\s*module\b', clean_line):
-                module_name = extract_module_name(clean_line)
-                current_module = {
-                    'name': module_name,
-                    'start_line': i,
-                    'content': [orig_line]
-                }
-                in_module = True
-                current_module['content'].append(pre_content)
-        else:
-            pre_content.append(orig_line) # if not in_module, append to pre_content
-            # Check for endmodule at brace level 0
-            if (re.search(r'^\s*endmodule\b', clean_line_stripped)):
-                modules.append(current_module)
-                in_module = False
-                
-    # Write modules to files
-    for module in modules:
-        output_file = os.path.join(output_dir, f"{module['name']}.sv")
-        with open(output_file, 'w') as f:
-            f.write(module['content'])
-            print(f"Created: {output_file}")
+def module_spans(text):
+    """
+    (name, start, end) character spans of the top-level modules of SystemVerilog text.
+
+    Boundaries come from sv_lexer tokens, so 'module' in comments or strings is not
+    taken for one. A span starts at the line of its 'module' keyword (or of an attribute
+    right before it) and ends after the line of its 'endmodule [: name]'.
+    """
+    spans = []
+    depth, start, name = 0, 0, None
+    tokens = [token for token in tokenize(text) if token.kind not in COMMENT_KINDS]
+    for i, token in enumerate(tokens):
+        if token.kind != KEYWORD:
+            continue
+        if token.text in ('module', 'macromodule') and (i == 0 or tokens[i - 1].text not in ('extern', 'virtual')):
+            if depth == 0:
+                first = tokens[i - 1] if i and tokens[i - 1].kind == ATTRIBUTE else token
+                start = text.rfind('\n', 0, first.offset) + 1
+                following = [t for t in tokens[i + 1:i + 4] if t.kind in (IDENTIFIER, ESCAPED_IDENTIFIER)]
+                name = following[0].text if following else None
+            depth += 1
+        elif token.text == 'endmodule' and depth:
+            depth -= 1
+            if depth == 0:
+                last = token
+                if i + 2 < len(tokens) and tokens[i + 1].text == ':':
+                    last = tokens[i + 2]
+                end = text.find('\n', last.offset + len(last.text))
+                spans.append((name, start, len(text) if end == -1 else end + 1))
+    return spans
+
+
+def _carried_context(text):
+    """Leading comment block, `include/`timescale/`default_nettype lines and import statements of a stretch of text."""
+    carried = []
+    tokens = list(tokenize(text))
+    for i, token in enumerate(tokens):
+        if token.kind == DIRECTIVE and token.text in ('`include', '`timescale', '`default_nettype'):
+            start = text.rfind('\n', 0, token.offset) + 1
+            carried.append(text[start:logical_line_end(text, start)] + '\n')
+        elif token.kind == KEYWORD and token.text == 'import':
+            end = next((t for t in tokens[i:] if t.text == ';'), None)
+            if end is not None:
+                carried.append(text[token.offset:end.offset + 1] + '\n')
+    return carried
+
+
+def module_file_names(input_file, names, output_dir=None):
+    """'<module><ext>' path of each module name, in output_dir or next to input_file."""
+    output_dir = Path(output_dir or os.path.dirname(os.path.abspath(input_file)))
+    ext = Path(input_file).suffix or '.sv'
+    return [output_dir / f"{name.lstrip(chr(92))}{ext}" for name in names]
+
+
+def split_verilog_modules(input_file, output_dir=None, overwrite=False):
+    """
+    Split a SystemVerilog file with several modules into one '<module><ext>' file per module.
+
+    Each module takes the text between the previous module and itself (its comments,
+    `defines, ...), the last one also what follows it. The leading comment block of the
+    file (e.g. a license header) and the `include/`timescale lines and package imports
+    seen before a module are carried into its file, so every file compiles on its own.
+
+    Args:
+        input_file: Source file
+        output_dir: Directory of the module files (default: next to input_file)
+        overwrite: Replace existing module files; by default only input_file itself may be replaced
+
+    Returns:
+        list: Written files in module order ([input_file] if it has fewer than two modules)
+
+    Raises:
+        FileExistsError: if a module file exists and overwrite is False; nothing is written then
+    """
+    input_file = os.path.abspath(input_file)
+    text = read_source(input_file)
+    spans = module_spans(text)
+    if len(spans) < 2:
+        return [input_file]
+    if any(name is None for name, _, _ in spans):
+        raise ValueError(f"{input_file}: a module has no name")
+    targets = module_file_names(input_file, [name for name, _, _ in spans], output_dir)
+    clashing = [str(target) for target in targets if target.exists() and str(target) != input_file and not overwrite]
+    if clashing or len(set(targets)) != len(targets):
+        raise FileExistsError(f"{input_file}: module files exist or repeat: {', '.join(clashing or map(str, targets))}")
+
+    first_code = next((token.offset for token in tokenize(text) if token.kind not in COMMENT_KINDS), len(text))
+    header = text[:text.rfind('\n', 0, first_code) + 1] if first_code < spans[0][1] else ''
+    targets[0].parent.mkdir(parents=True, exist_ok=True)
+    carried, previous_end = [], 0
+    for i, ((name, start, end), target) in enumerate(zip(spans, targets)):
+        if i == len(spans) - 1:
+            end = len(text)
+        gap = text[previous_end:start]
+        chunk = text[previous_end:end]
+        if i:
+            chunk = ''.join(carried) + ('\n' if carried else '') + chunk.lstrip('\n')
+            chunk = header + chunk if header else chunk
+        carried.extend(_carried_context(gap))
+        tmp = target.with_name(target.name + '.tmp')
+        tmp.write_text(chunk)
+        os.replace(tmp, target)
+        previous_end = end
+    return [str(target) for target in targets]
+
+
+def superseded_sources(split):
+    """Split files that are not one of their own module files, so they still declare every module."""
+    return [path for path, files in split.items()
+            if os.path.abspath(path) not in {os.path.abspath(target) for target in files}]
+
+
+def split_multiple_module_files(filelists, output_dir=None, jobs=None, cache=None, dry_run=False, remove_split=False):
+    """
+    Split every file of the filelists declaring several modules, then point the filelists at the module files.
+
+    The multi-module files come from the design index (cached, scanned in parallel);
+    the files are split in a process pool and the filelists rewritten in place, the
+    originals kept as '<filelist>.orig'. A split file whose name matches none of its
+    modules stays on disk (see superseded_sources) unless remove_split is set.
+
+    Args:
+        filelists: Filelist(s) of the design
+        output_dir: Directory of the module files (default: next to each split file)
+        jobs: Worker processes (default: one per CPU)
+        cache: sv_cache.SourceCache for the design index
+        dry_run: Only return the module files each file would be split into
+        remove_split: Delete the superseded_sources() once the filelists are rewritten
+
+    Returns:
+        tuple: ({split file: module files}, {file: error}, rewritten filelists)
+    """
+    multiple = DesignIndex.build(read_filelist(filelists).files, cache).multiple_units()
+    if dry_run or not multiple:
+        return {path: [str(target) for target in module_file_names(path, [d.name for d in declarations], output_dir)]
+                for path, declarations in multiple.items()}, {}, []
+    split, errors = {}, {}
+    workers = min(jobs or os.cpu_count() or 1, len(multiple))
+    with (ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext()) as executor:
+        if executor is not None:
+            pending = {path: executor.submit(split_verilog_modules, path, output_dir) for path in multiple}
+        for path in multiple:
+            try:
+                split[path] = pending[path].result() if executor is not None else split_verilog_modules(path, output_dir)
+            except (OSError, ValueError) as e:
+                errors[path] = str(e)
+    rewritten = rewrite_filelist(filelists, split, backup='.orig') if split else []
+    if remove_split:
+        for path in superseded_sources(split):
+            try:
+                os.remove(path)
+            except OSError as e:
+                errors[path] = f"split, but not removed: {e}"
+    return split, errors, rewritten
+
 
 def check_standalone_generate(segment):
     '''IEEE 1800-2017 Standard Clarification on generate Blocks'''
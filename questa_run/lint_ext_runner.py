@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import os
+import csv
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence, Union
+from string_util import StringUtil
+from filelist import read_filelist
+from sv_cache import DEFAULT_CACHE, SourceCache
+from ext_visitor import REGISTRY, ExtViolation, check_files
+import lint_ext_checks    # registers the extension checks
+
+# Tasks per worker the files are split into: enough to balance uneven file sizes, few enough to keep IPC low
+_CHUNKS_PER_WORKER = 8
+
+
+class ExtReport(NamedTuple):
+    violations: List[ExtViolation]      # sorted by filelist order, line, check
+    files: int
+    unreadable: List[str]
+    elapsed: float
+
+
+def chunk_size(files: int, workers: int) -> int:
+    """Files per pool task: the files split into _CHUNKS_PER_WORKER tasks per worker."""
+    return max(1, files // (workers * _CHUNKS_PER_WORKER))
+
+
+def run_ext_checks(
+    files: Sequence[str],
+    checks: Optional[Sequence[str]] = None,
+    jobs: Optional[int] = None,
+    cache: Optional[SourceCache] = None,
+    executor=None
+) -> ExtReport:
+    """
+    Run extension checks over a filelist, analyzing the sources in a process pool.
+
+    The files are sent to the pool in chunks and come back in filelist order, so the
+    report does not depend on scheduling. Every registered check runs in one pass per
+    file (see ext_visitor.visit_source); with a cache, unchanged files are not read.
+
+    Args:
+        files: Source files
+        checks: Names from ext_visitor.REGISTRY to report (default: all)
+        jobs: Worker processes (default: one per CPU, 1 runs in this process)
+        cache: sv_cache.SourceCache to reuse the results of unchanged files
+        executor: Process pool to use instead of creating one
+
+    Returns:
+        ExtReport: violations of the checks in one sorted list
+
+    Raises:
+        ValueError: on an unknown check name
+    """
+    start = time.perf_counter()
+    checks = list(checks or REGISTRY)
+    unknown = [name for name in checks if name not in REGISTRY]
+    if unknown:
+        raise ValueError(f"Unknown extension check(s) {', '.join(unknown)}, expected {', '.join(REGISTRY)}")
+    files = [os.path.abspath(path) for path in dict.fromkeys(files)]
+    workers = min(jobs or os.cpu_count() or 1, max(len(files), 1))
+    if executor is None and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return run_ext_checks(files, checks, workers, cache, pool)
+
+    results = check_files(files, cache, executor, chunk_size(len(files), workers))
+    readable = [(path, found) for path, found in zip(files, results) if found is not None]
+    violations = []
+    for name in checks:
+        for path, found in readable:
+            violations.extend(ExtViolation(name, path, line, message) for line, message in found[name][0])
+        violations.extend(REGISTRY[name].finish([path for path, _ in readable], [found[name][1] for _, found in readable]))
+    order = {path: i for i, path in enumerate(files)}
+    violations.sort(key=lambda v: (order[v.file], v.line, v.check))
+    unreadable = [path for path, found in zip(files, results) if found is None]
+    return ExtReport(violations, len(files), unreadable, time.perf_counter() - start)
+
+
+def ext_summary(report: ExtReport, checks: Sequence[str]) -> str:
+    counts = {name: 0 for name in checks}
+    for violation in report.violations:
+        counts[violation.check] += 1
+    rows = [[name, str(count)] for name, count in counts.items()]
+    rows.append([f'Total ({report.files} files, {report.elapsed:.2f} s)', str(len(report.violations))])
+    return StringUtil().table(['Extension check', 'Violations'], rows, style='round', align=['left', 'right'])
+
+
+def write_ext_report(report: ExtReport, path: Union[str, os.PathLike]) -> Path:
+    """Write the violations as CSV (check,file,line,message)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(ExtViolation._fields)
+        writer.writerows(report.violations)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the lint extension checks over the sources of a filelist in parallel')
+    parser.add_argument('-f', '--filelist', nargs='+', required=True, help='Filelist(s) of the design')
+    parser.add_argument('-c', '--checks', nargs='+', default=None, choices=list(REGISTRY), help='Checks to run (default: all)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('-o', '--output', default=None, help='Write the violations to this CSV file')
+    parser.add_argument('-db', '--cache', default=DEFAULT_CACHE, help=f'Source analysis cache (default: {DEFAULT_CACHE})')
+    parser.add_argument('--no_cache', action='store_true', help='Analyze every file, do not read or write the cache')
+    args = parser.parse_args()
+
+    sources = read_filelist(args.filelist)
+    for path in sources.missing:
+        print(f"Warning: filelist not found: {path}")
+    with SourceCache(None if args.no_cache else args.cache) as cache:
+        report = run_ext_checks(sources.files, args.checks, args.jobs, cache)
+    print(ext_summary(report, args.checks or list(REGISTRY)))
+    for path in report.unreadable:
+        print(f"Warning: could not read {path}")
+    if args.output:
+        print(f"Violations: {write_ext_report(report, args.output)}")
+    else:
+        for violation in report.violations:
+            print(f"  {os.path.relpath(violation.file)}:{violation.line}: [{violation.check}] {violation.message}")
+    if report.violations:
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import os
 import sys
 import re
+import time
 import subprocess
 import logging
 from datetime import datetime
@@ -8,6 +9,18 @@ from argparse import RawTextHelpFormatter
 from pathlib import Path
 from subprocess import check_output,CalledProcessError,DEVNULL
 from logger import Logger
+from string_util import StringUtil
+from violation_store import ViolationStore, parse_query
+from violation_diff import diff_stores, diff_summary, write_diff_csv
+import violation_db
+import waiver_bulk
+import waiver_stale
+import waiver_hits
+from filelist import read_filelist
+from sv_cache import SourceCache
+import lint_ext_checks
+import parentheses_fix
+from report_filter import PatternSet, Match, read_patterns_file, filter_report, filter_store, print_matches
 import common_py_func as func
 
 
@@ -249,7 +262,103 @@ def lint_split_by_checks(report):
             else: # index is odd
                 output_file = item
          
+def lint_report_dir(opts) -> str:
+    """Locate Results/report for a lint run, whether -o points at the workdir root or the run dir."""
+    for report_dir in (f'{opts.workdir}/Results/report', f'{opts.workdir}/{opts.top}/lint/Results/report'):
+        if os.path.isdir(report_dir):
+            return os.path.abspath(report_dir)
+    return os.path.abspath(f'{opts.workdir}/{opts.top}/lint/Results/report')
+
+def load_violation_store(opts) -> ViolationStore:
+    """Load the lint JSON (or CSV) report given by -f, else the default {top}_lint.json of the run."""
+    if opts.file and (opts.file.endswith('.json') or opts.file.endswith('.csv')):
+        report = opts.file
+    else:
+        report_dir = lint_report_dir(opts)
+        report = f'{report_dir}/{opts.top}_lint.json'
+        if not os.path.isfile(report):
+            report = f'{report_dir}/{opts.top}_lint.csv'
+    if not os.path.isfile(report):
+        print(f"Error: no lint JSON/CSV report found: {report}")
+        sys.exit(1)
+    return ViolationStore.from_file(report)
+
+def lint_report_summary(opts) -> None:
+    """Print violation counts grouped by opts.group_by after applying opts.query."""
+    store = load_violation_store(opts)
+    group_by = opts.group_by or 'check'
+    try:
+        groups = store.group_by(group_by, **parse_query(opts.query))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    rows = [[value, str(count)] for value, count in groups.most_common(opts.limit or None)]
+    rows.append(['Total', str(sum(groups.values()))])
+    print(StringUtil().table([group_by.capitalize(), 'Violations'], rows, style='round', align=['left', 'right']))
+
+def lint_report_diff(opts) -> None:
+    """Print new/fixed/persisting violations of the current lint report against the -diff reference report."""
+    if not os.path.isfile(opts.diff):
+        print(f"Error: reference report not found: {opts.diff}")
+        sys.exit(1)
+    result = diff_stores(ViolationStore.from_file(opts.diff), load_violation_store(opts))
+    print(diff_summary(result))
+    for violation, count in result['new'][:opts.limit or None]:
+        print(f"  new: {violation.check} {violation.module} {violation.object or '-'} (x{count}) {violation.file}:{violation.line}")
+    diff_csv = f'{lint_report_dir(opts)}/{opts.top}_lint_diff.csv'
+    if os.path.isdir(os.path.dirname(diff_csv)):
+        write_diff_csv(result, diff_csv)
+        print(f"Diff written to {diff_csv}")
+
+def lint_report_trend(opts) -> None:
+    """Print per-check violation counts of the last opts.trend lint runs of the top from the run history database."""
+    if not os.path.isfile(violation_db.DEFAULT_DB):
+        print(f"Error: no run history database found: {violation_db.DEFAULT_DB}")
+        sys.exit(1)
+    conn = violation_db.connect(violation_db.DEFAULT_DB)
+    run_rows, series = violation_db.trend(conn, opts.top, tool='lint', runs=opts.trend)
+    print(violation_db.trend_table(run_rows, series, limit=opts.limit))
+
+def lint_report_filter(opts) -> None:
+    """Print the violation blocks of the lint report matching any -regexp / -rf pattern, scanning the report once."""
+    patterns = opts.regexp + (read_patterns_file(opts.regexp_file) if opts.regexp_file else [])
+    try:
+        pattern_set = PatternSet(patterns, literal=opts.literal, ignore_case=opts.ignore_case)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if opts.file.endswith('.json') or opts.file.endswith('.csv'):
+        matches = (Match(p, v.check, v.module, v.line, f'{v.file} {v.object} {v.message}'.strip())
+                   for p, v in filter_store(load_violation_store(opts), pattern_set))
+    else:
+        report = opts.file
+        if not report:
+            report_dir = lint_report_dir(opts)
+            report = f'{report_dir}/lint_full.rpt' if os.path.isfile(f'{report_dir}/lint_full.rpt') else f'{report_dir}/lint.rpt'
+        if not os.path.isfile(report):
+            print(f"Error: no lint report found: {report}")
+            sys.exit(1)
+        matches = filter_report(report, pattern_set)
+
+    counts = print_matches(matches, patterns)
+    rows = [[pattern, str(counts[i])] for i, pattern in enumerate(patterns)]
+    print(StringUtil().table(['Pattern', 'Violations'], rows, style='round', align=['left', 'right']))
+
 def lint_report_handling(opts):
+    if opts.regexp or opts.regexp_file:
+        lint_report_filter(opts)
+        return None
+    if opts.trend:
+        lint_report_trend(opts)
+        return None
+    if opts.diff:
+        lint_report_diff(opts)
+        return None
+    if opts.group_by or opts.query:
+        lint_report_summary(opts)
+        return None
+
     if not opts.file == '':
         input_file = f'{opts.file}'
     else: # try to locate the default file
@@ -271,10 +380,124 @@ def lint_report_handling(opts):
         f.write(report_action)
     return "report_"+opts.subparser_name
 
+def lint_waiver_handling(opts) -> None:
+    """Run a waiver maintenance action over every waiver file matching -wf (default: all rtl_lint waiver files of the repo)."""
+    files = waiver_bulk.find_waiver_files(opts.waiver_files, root=opts.waiver_root)
+    if not files:
+        print(f"Error: no waiver files found for {opts.waiver_files or [waiver_bulk.DEFAULT_GLOB]} under {opts.waiver_root}")
+        sys.exit(1)
+    if opts.waiver_action == 'stale':
+        lint_waiver_stale(opts, files)
+        return
+    if opts.waiver_action == 'hits':
+        lint_waiver_hits(opts, files)
+        return
+    start = datetime.now()
+    try:
+        results = waiver_bulk.run_bulk(opts.waiver_action, files, jobs=opts.jobs, reports=opts.report, checks=opts.checks,
+                                       output=opts.output_dir, in_place=opts.in_place, dry_run=opts.dry_run)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(waiver_bulk.bulk_summary(opts.waiver_action, results, (datetime.now() - start).total_seconds(), opts.waiver_root))
+    if any(result.error for result in results):
+        sys.exit(1)
+
+def lint_waiver_stale(opts, files) -> None:
+    """Report waivers whose -file/-line no longer match the sources of -fl (or the lint -f filelists) and exit 2 if any."""
+    filelists = opts.source_filelist or getattr(opts, 'filelist', [])
+    sources = read_filelist(filelists, variables={'CompPath': opts.waiver_root}).files if filelists else []
+    checked, stale = waiver_stale.find_stale(files, sources, jobs=opts.jobs)
+    print(waiver_stale.stale_summary(checked, stale, opts.waiver_root))
+    for entry in stale:
+        print(f"  {os.path.relpath(entry.waiver_file, opts.waiver_root)}:{entry.waiver_line}: {entry.reason}: {entry.detail}")
+    if stale:
+        sys.exit(2)
+
+def lint_waiver_hits(opts, files) -> None:
+    """Report the violations each waiver directive matches (-r reports or -sr status reports) and reorder the files by it."""
+    try:
+        if opts.status_report:
+            hits = waiver_hits.hits_from_status(files, waiver_hits.read_status_reports(opts.status_report))
+        elif opts.report:
+            hits = waiver_hits.hits_from_reports(files, opts.report)
+            for path in waiver_hits.unpaired(files, opts.report):
+                print(f"Warning: no report of top {waiver_bulk.waiver_top(path) or os.path.basename(path)}, "
+                      f"{os.path.relpath(path, opts.waiver_root)} is not counted")
+        else:
+            print("Error: hits needs the lint JSON/CSV report(s) (-r) or qverify status report(s) (-sr)")
+            sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(waiver_hits.hits_summary(hits, opts.waiver_root))
+    print(waiver_hits.top_directives(hits, 20, opts.waiver_root))
+    if opts.dry_run:
+        return
+    for path, entries in hits.items():
+        if all(entry.hits < 0 for entry in entries):
+            continue    # nothing counted, e.g. no report of its top
+        if opts.in_place:
+            output = path
+        else:
+            output = os.path.join(opts.output_dir, os.path.basename(path) + '.ordered') if opts.output_dir else path + '.ordered'
+        quarantine = waiver_hits.quarantine_path(path, opts.output_dir) if opts.quarantine else None
+        kept, moved = waiver_hits.reorder_file(path, entries, output, quarantine)
+        note = f", {moved} quarantined into {os.path.relpath(quarantine, opts.waiver_root)}" if moved else ''
+        print(f"{os.path.relpath(output, opts.waiver_root)}: {kept} directives by hit count{note}")
+
 def lint_fix_handling(opts):
-    #TODO would be just case statement to execute all the specified fix optional arguments
-    ''
+    if opts.multiple_module:
+        lint_fix_multiple_module(opts)
+    if opts.parentheses:
+        lint_fix_parentheses(opts)
+
+def lint_fix_multiple_module(opts) -> None:
+    '''Split the filelist sources declaring several modules into one file per module and rewrite the filelists.'''
+    if not opts.file:
+        print("Error: -mm needs the filelist(s) with -f")
+        sys.exit(1)
+    with SourceCache() as cache:
+        split, errors, rewritten = lint_ext_checks.split_multiple_module_files(
+            opts.file, opts.output_dir, opts.jobs, cache, opts.dry_run, opts.remove_split)
+    if not split and not errors:
+        print("No source file declares more than one module")
+        return
+    rows = [[os.path.relpath(path), ', '.join(os.path.relpath(new) for new in files)] for path, files in split.items()]
+    rows += [[os.path.relpath(path), f'Error: {error}'] for path, error in errors.items()]
+    header = 'Would be split into' if opts.dry_run else 'Split into'
+    print(StringUtil().table(['Source file', header], rows, style='round'))
+    for path in rewritten:
+        print(f"Rewrote {os.path.relpath(path)} (original kept as {os.path.relpath(path)}.orig)")
+    superseded = [path for path in lint_ext_checks.superseded_sources(split) if path not in errors]
+    if superseded and not opts.remove_split:
+        print("Superseded sources still declaring every module; drop them from other filelists/globs or rerun with -rm:")
+        for path in superseded:
+            print(f"  {os.path.relpath(path)}")
+    elif superseded:
+        print(f"{'Would remove' if opts.dry_run else 'Removed'} the superseded sources: "
+              f"{', '.join(os.path.relpath(path) for path in superseded)}")
+    if errors:
+        sys.exit(1)
     
+def lint_fix_parentheses(opts) -> None:
+    '''Insert the parentheses of every parentheses_missing violation of the report, one pass per source file.'''
+    if not opts.report:
+        print("Error: --parentheses needs the lint report with -r")
+        sys.exit(1)
+    start = time.perf_counter()
+    violations = parentheses_fix.read_parentheses_violations(opts.report)
+    if not violations:
+        print(f"No parentheses_missing violation in {opts.report}")
+        return
+    results = parentheses_fix.fix_parentheses(violations, opts.jobs, opts.dry_run)
+    print(parentheses_fix.fix_summary(results, time.perf_counter() - start, opts.dry_run))
+    for result in results:
+        for line, reason in result.unfixed:
+            print(f"  {os.path.relpath(result.path)}:{line}: not fixed, {reason}")
+    if any(result.unfixed for result in results):
+        sys.exit(1)
+
 def get_git_root() -> Path:
     """Safely get Git root directory with error handling.
     
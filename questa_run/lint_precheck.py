@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+import os
+import re
+import csv
+import sys
+import time
+import argparse
+from pathlib import Path
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+from string_util import StringUtil
+from filelist import read_filelist
+from sv_lexer import IDENTIFIER, KEYWORD, SourceText, read_source, tokenize
+from sv_cache import DEFAULT_CACHE, SourceCache, analyzer
+from sv_preprocessor import Preprocessed, preprocessed_artifacts
+from waiver_parser import tcl_words, unwrap_word
+import design_index    # registers the 'design_units' artifact
+
+GOAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lint_goal', 'custom')
+DEFAULT_GOALS = (os.path.join(GOAL_DIR, 'oc_lint.goal'), os.path.join(GOAL_DIR, 'openchip_design_rule.tcl'))
+# Goal rules simple enough to evaluate without elaborating the design
+NAMING_RULES = ('file_name_not_standard', 'input_port_name_not_standard', 'clock_name_not_standard',
+                'reset_name_not_standard', 'file_extension_not_standard')
+ARTIFACT = 'precheck_names'
+
+# Tcl ARE escapes without a Python equivalent: word start/end, word boundary and not
+_TCL_ESCAPES = {r'\m': r'\b(?=\w)', r'\M': r'\b(?<=\w)', r'\y': r'\b', r'\Y': r'\B'}
+_TCL_ESCAPE_RE = re.compile(r'\\[mMyY]')
+_EVENT_RE = re.compile(r'@\s*\(([^)]*)\)')
+_EDGE_RE = re.compile(r'\b(?:posedge|negedge)\s+([A-Za-z_][\w$]*)')
+_SUBROUTINE_RE = re.compile(r'\b(function|task)\b[\s\S]*?\bend\1\b')
+_INPUT_RE = re.compile(r'\binput\b')
+_DIRECTIONS = ('input', 'output', 'inout', 'ref')
+_SPECIAL_RE = re.compile(r'[^A-Za-z0-9_]')
+
+
+class PrecheckViolation(NamedTuple):
+    rule: str
+    severity: str
+    file: str
+    line: int
+    message: str
+
+
+class GoalRule(NamedTuple):
+    name: str
+    severity: str
+    message: str
+    patterns: List[str]         # regex_user_defined patterns, translated to Python ('_icase' ones as (?i:...))
+    options: Dict[str, List[str]]   # 'lint preference [name] -check <rule>' options, e.g. {'-suffix': ['i']}
+
+
+def goal_words(line: str) -> List[str]:
+    """Words of a goal file command line without their braces/quotes (see waiver_parser.tcl_words)."""
+    words = []
+    for word in tcl_words(line):
+        if word.startswith('#'):
+            break       # trailing comment, e.g. 'lint on index_x_z # [G037]'
+        words.append(unwrap_word(word))
+    return words
+
+
+def tcl_regex(pattern: str, icase: bool = False) -> str:
+    """
+    Python regex of a Tcl ARE pattern using \\m/\\M/\\y/\\Y.
+
+    Args:
+        pattern: Tcl pattern, e.g. '\\mfixme\\M'
+        icase: Match case-insensitively (-regex_user_defined_patterns_icase); scoped to
+            this pattern, so it can share one alternation with case-sensitive ones
+
+    Raises:
+        ValueError: if the translated pattern does not compile
+    """
+    translated = _TCL_ESCAPE_RE.sub(lambda m: _TCL_ESCAPES[m.group()], pattern)
+    if icase:
+        translated = f'(?i:{translated})'
+    try:
+        re.compile(translated)
+    except re.error as e:
+        raise ValueError(f"Invalid regex_user_defined pattern '{pattern}': {e}")
+    return translated
+
+
+class GoalScanner:
+    """
+    The regex_user_defined rules of a goal searched in one pass.
+
+    The scan regex is the plain alternation of every rule's patterns, without capture
+    groups, so the engine keeps its first-character prefix scan over the whole file.
+    Only a line with a hit is matched once more against a pattern of one optional
+    lookahead per rule, each with a named group (r<index>), so that single match tells
+    every rule hitting the line, also where their matches overlap.
+    """
+
+    def __init__(self, rules: Sequence[GoalRule]):
+        """
+        Args:
+            rules: Goal rules with patterns; the others are ignored
+        """
+        self.rules = [rule.name for rule in rules if rule.patterns]
+        sources = ['|'.join(f'(?:{pattern})' for pattern in rule.patterns) for rule in rules if rule.patterns]
+        self._scan = re.compile('|'.join(f'(?:{source})' for source in sources)) if sources else None
+        self._line = re.compile(''.join(f'(?=(?:[^\\n]*?(?P<r{i}>{source}))?)' for i, source in enumerate(sources)))
+
+    def __bool__(self) -> bool:
+        return self._scan is not None
+
+    def scan(self, text: str) -> List[Tuple[str, int, str]]:
+        """(rule, line, matched text) of every rule hit in text, once per rule and line."""
+        found = []
+        if self._scan is None:
+            return found
+        pos, number, counted = 0, 1, 0
+        while True:
+            m = self._scan.search(text, pos)
+            if m is None:
+                return found
+            begin = text.rfind('\n', 0, m.start()) + 1
+            end = text.find('\n', m.end())
+            end = len(text) if end == -1 else end
+            number += text.count('\n', counted, begin)
+            counted = begin
+            hits = self._line.match(text[begin:end])
+            for i, name in enumerate(self.rules):
+                if hits.group(f'r{i}') is not None:
+                    found.append((name, number, hits.group(f'r{i}')))
+            pos = end + 1
+
+
+def pattern_warnings(rules: Dict[str, GoalRule]) -> List[str]:
+    """
+    regex_user_defined patterns that can never match: a Tcl \\m (start of word) at the end
+    of a pattern or \\M (end of word) at its start, where the other one was likely meant.
+    """
+    warnings = []
+    for rule in rules.values():
+        for pattern in rule.options.get('-regex_user_defined_patterns', []) + rule.options.get('-regex_user_defined_patterns_icase', []):
+            for word in pattern.split():
+                if word.endswith(r'\m') or word.startswith(r'\M'):
+                    warnings.append(f"{rule.name}: pattern {word} never matches (\\m starts a word, \\M ends one)")
+    return warnings
+
+
+def read_goal_rules(paths: Sequence[str]) -> Tuple[Dict[str, GoalRule], Set[str], Dict[str, List[str]]]:
+    """
+    Rules of Questa lint goal files (.goal or sourced .tcl directives).
+
+    Returns:
+        tuple: ({rule: GoalRule}, enabled rule names, global preferences such as
+            {'-allow_include_file_extns': ['.svh', ...]})
+    """
+    rules, enabled, preferences = {}, set(), {}
+
+    def rule(name):
+        return rules.setdefault(name, GoalRule(name, 'warning', '', [], {}))
+
+    for path in paths:
+        with open(path, 'r', errors='replace') as f:
+            lines = f.read().splitlines()
+        for line in lines:
+            words = goal_words(line.strip())
+            if len(words) < 3 or words[0] != 'lint':
+                continue
+            command, args = words[1], words[2:]
+            if command == 'on':
+                enabled.update(args)
+            elif command == 'copy' and args[:1] == ['check'] and len(args) > 1:
+                options = _options(args[2:])
+                rules[args[1]] = rule(args[1])._replace(severity=(options.get('-severity') or ['warning'])[0],
+                                                        message=' '.join(options.get('-message', [])))
+            elif command == 'report' and args[:1] == ['check'] and '-severity' in args:
+                severity = args[args.index('-severity') + 1]
+                for name in [word for word in args[1:] if not word.startswith('-') and word != severity]:
+                    rules[name] = rule(name)._replace(severity=severity)
+            elif command == 'preference':
+                if args[0] == 'name':
+                    args = args[1:]
+                options = _options(args)
+                checks = options.pop('-check', [])
+                for name in checks:
+                    current = rule(name)
+                    for key in ('-regex_user_defined_patterns', '-regex_user_defined_patterns_icase'):
+                        if key in options:
+                            patterns = [tcl_regex(word, key.endswith('_icase')) for value in options[key] for word in value.split()]
+                            current = current._replace(patterns=current.patterns + patterns)
+                    for key, values in options.items():
+                        current.options.setdefault(key, []).extend(values)
+                    rules[name] = current
+                if not checks:
+                    preferences.update(options)
+    return rules, enabled, preferences
+
+
+def _options(args: Sequence[str]) -> Dict[str, List[str]]:
+    """'-opt value value -flag' words as {'-opt': ['value', 'value'], '-flag': []}."""
+    options, current = {}, None
+    for word in args:
+        if word.startswith('-') and not word[1:2].isdigit():
+            current = options.setdefault(word, [])
+        elif current is not None:
+            current.append(word)
+    return options
+
+
+def _subroutine_spans(text: str) -> List[Tuple[int, int]]:
+    return [m.span() for m in _SUBROUTINE_RE.finditer(text)]
+
+
+@analyzer(ARTIFACT, version=1)
+def find_precheck_names(source: SourceText) -> Tuple[List[tuple], List[tuple], List[tuple]]:
+    """
+    Input ports, clocks and asynchronous resets of one file.
+
+    Ports are the names declared after 'input' (ANSI or not) outside functions and
+    tasks. In each event control '@(posedge a or negedge b)' the first edge signal is
+    taken as the clock and the others as asynchronous resets; synchronous resets and
+    clocks that need elaboration to be found are left to the full lint run.
+
+    Returns:
+        tuple: ([(name, line)] ports, [(name, line)] clocks, [(name, line)] resets)
+    """
+    text = source.stripped
+    ports, clocks, resets = [], [], []
+    if 'input' in text:
+        subroutines = _subroutine_spans(text)
+        line, counted = 1, 0
+        for m in _INPUT_RE.finditer(text):
+            if any(start <= m.start() < end for start, end in subroutines):
+                continue
+            line += text.count('\n', counted, m.start())
+            counted = m.start()
+            end = text.find(';', m.end())
+            tokens = list(tokenize(text[m.end():len(text) if end == -1 else end]))
+            depth = 0
+            for i, token in enumerate(tokens):
+                if token.text in ('(', '[', '{'):
+                    depth += 1
+                elif token.text in (')', ']', '}'):
+                    depth -= 1
+                    if depth < 0:
+                        break       # end of an ANSI port list
+                elif depth == 0 and token.kind == KEYWORD and token.text in _DIRECTIONS:
+                    break
+                elif depth == 0 and token.kind == IDENTIFIER:
+                    following = tokens[i + 1].text if i + 1 < len(tokens) else ';'
+                    if following in (',', ')', '=', '[', ';'):
+                        ports.append((token.text, line + token.line - 1))
+    if 'edge' in text:
+        line, counted = 1, 0
+        for m in _EVENT_RE.finditer(text):
+            edges = _EDGE_RE.findall(m.group(1))
+            if not edges:
+                continue
+            line += text.count('\n', counted, m.start())
+            counted = m.start()
+            clocks.append((edges[0], line))
+            resets.extend((name, line) for name in edges[1:])
+    return ports, clocks, resets
+
+
+def _check_name(rule: GoalRule, name: str, what: str) -> Optional[str]:
+    """Why a name breaks the name preferences of a rule, None if it does not."""
+    options = rule.options
+    affixes = options.get('-prefix_or_suffix')
+    if affixes and not any(name.startswith(affix) or name.endswith(affix) for affix in affixes):
+        return f"{what} '{name}' needs one of the prefixes/suffixes {' '.join(affixes)}"
+    if options.get('-prefix') and not any(name.startswith(prefix) for prefix in options['-prefix']):
+        return f"{what} '{name}' needs one of the prefixes {' '.join(options['-prefix'])}"
+    if options.get('-suffix') and not any(name.endswith(suffix) for suffix in options['-suffix']):
+        return f"{what} '{name}' needs one of the suffixes {' '.join(options['-suffix'])}"
+    if '-disallow_consecutive_underscores' in options and '__' in name:
+        return f"{what} '{name}' has consecutive underscores"
+    if ('-disallow_special_characters' in options or '-disallow_special_character' in options) and _SPECIAL_RE.search(name):
+        return f"{what} '{name}' has special characters"
+    if '-disallow_end_with_underscores' in options and name.endswith('_'):
+        return f"{what} '{name}' ends with an underscore"
+    if options.get('-max_length') and len(name) > int(options['-max_length'][0]):
+        return f"{what} '{name}' is longer than {options['-max_length'][0]} characters"
+    return None
+
+
+def _file_name_patterns(rule: GoalRule) -> List[Tuple[str, str]]:
+    """(unit kind, file name template) of the -regexp {%(kind)<suffix>} preferences."""
+    found = []
+    for value in rule.options.get('-regexp', []):
+        m = re.fullmatch(r'%\((\w+)\)(.*)', value.strip())
+        if m:
+            found.append((m.group(1), m.group(2)))
+    return found
+
+
+def _scan_patterns(path: str, scanner: GoalScanner) -> List[Tuple[str, int, str]]:
+    """(rule, line, matched text) of the regex_user_defined rules in one file; runs in worker processes."""
+    try:
+        return scanner.scan(read_source(path))
+    except OSError:
+        return []
+
+
+def run_precheck(
+    files: Sequence[str],
+    goals: Sequence[str] = DEFAULT_GOALS,
+    rule_names: Optional[Sequence[str]] = None,
+    cache: Optional[SourceCache] = None,
+    executor=None,
+    preprocess: bool = False,
+    incdirs: Sequence[str] = (),
+    defines: Optional[Dict[str, str]] = None
+) -> List[PrecheckViolation]:
+    """
+    Evaluate the pattern and naming rules of lint goal files on the sources, without qverify.
+
+    The enabled regex_user_defined copies (no_fixme, no_todo, ...) are compiled into
+    one GoalScanner from the goal as it is now, so a new 'lint copy check ... -use
+    regex_user_defined' is scanned without a code change. The naming rules of
+    NAMING_RULES use the goal's 'lint preference name' options. File names come from the design index, ports,
+    clocks and resets from find_precheck_names(), both cached per file. With preprocess
+    they are found in the preprocessed text instead (incdirs and defines of the
+    filelist), so names in inactive `ifdef branches are not checked.
+
+    Args:
+        files: Sources of the filelist
+        goals: Goal files to read the rules from
+        rule_names: Rules to evaluate (default: every enabled rule this module can evaluate)
+        cache: sv_cache.SourceCache for the per-file artifacts
+        executor: Process pool to scan the files in
+        preprocess: Check the names of the active `ifdef branches only
+        incdirs: +incdir+ directories, for preprocess
+        defines: +define+ macros, for preprocess
+
+    Returns:
+        list: Violations sorted by file, line and rule
+    """
+    rules, enabled, preferences = read_goal_rules(goals)
+    pattern_rules = [rule for rule in rules.values() if rule.patterns]
+    known = [rule.name for rule in pattern_rules] + list(NAMING_RULES)
+    selected = [name for name in (rule_names or [name for name in known if name in enabled]) if name in known]
+    files = [os.path.abspath(path) for path in dict.fromkeys(files)]
+    violations = []
+
+    scanner = GoalScanner([rule for rule in pattern_rules if rule.name in selected])
+    if scanner:
+        chunk = max(1, len(files) // 64)
+        results = executor.map(_scan_patterns, files, [scanner] * len(files), chunksize=chunk) if executor is not None \
+            else (_scan_patterns(path, scanner) for path in files)
+        for path, found in zip(files, results):
+            for name, line, matched in found:
+                rule = rules[name]
+                violations.append(PrecheckViolation(name, rule.severity, path, line, f"{rule.message or name}: '{matched}'"))
+
+    naming = [name for name in NAMING_RULES if name in selected]
+    if naming:
+        with (SourceCache(None) if cache is None else nullcontext(cache)) as store:
+            if preprocess:
+                artifacts = store.get_many(files, ['includes'], executor)
+                preprocessed = preprocessed_artifacts(files, ['design_units', ARTIFACT], incdirs, defines, store, executor)
+                artifacts = [None if found is None or outcome is None else {**found, **_local_artifacts(path, *outcome)}
+                             for path, found, outcome in zip(files, artifacts, preprocessed)]
+            else:
+                artifacts = store.get_many(files, ['design_units', 'includes', ARTIFACT], executor)
+        for path, found in zip(files, artifacts):
+            if found is not None:
+                violations.extend(_naming_violations(path, found, rules, naming, preferences))
+    violations.sort(key=lambda v: (v.file, v.line, v.rule))
+    return violations
+
+
+def _local_artifacts(path: str, result: Preprocessed, found: Dict[str, object]) -> Dict[str, object]:
+    """Artifacts of a preprocessed text with lines of the file itself; what came from included files is dropped."""
+    origin = result.line_map.origin
+
+    def local(entries, index):
+        kept = []
+        for entry in entries:
+            file, line = origin(entry[index])
+            if file == path:
+                kept.append(entry[:index] + (line,) + entry[index + 1:])
+        return kept
+
+    units, uses = found['design_units']
+    units = [unit[:3] + (origin(unit[3])[1] if unit[3] else 0,) for unit in local(units, 2)]
+    ports, clocks, resets = found[ARTIFACT]
+    return {'design_units': (units, local(uses, 3)), ARTIFACT: (local(ports, 1), local(clocks, 1), local(resets, 1))}
+
+
+def _naming_violations(path, found, rules, naming, preferences) -> List[PrecheckViolation]:
+    violations = []
+
+    def report(name, line, message):
+        violations.append(PrecheckViolation(name, rules[name].severity if name in rules else 'warning', path, line, message))
+
+    units, _ = found['design_units']
+    ports, clocks, resets = found[ARTIFACT]
+    basename = os.path.basename(path)
+    if 'file_name_not_standard' in naming and _has_preferences(rules, 'file_name_not_standard') and units:
+        templates = _file_name_patterns(rules['file_name_not_standard'])
+        expected = [name + suffix for kind, name, _, _ in units for template_kind, suffix in templates if kind == template_kind]
+        if expected and basename not in expected:
+            report('file_name_not_standard', units[0][2], f"file name '{basename}' should be {' or '.join(expected)}")
+    if 'file_extension_not_standard' in naming:
+        allowed = preferences.get('-allow_include_file_extns') or ['.svh', '.vh', '.h', '.inc']
+        for line, included, _ in found['includes']:
+            if included and os.path.splitext(included)[1] not in allowed:
+                report('file_extension_not_standard', line, f"included file '{included}' should have one of the extensions {' '.join(allowed)}")
+    clock_names = {name for name, _ in clocks}
+    reset_names = {name for name, _ in resets}
+    checks = (('clock_name_not_standard', clocks, 'clock'), ('reset_name_not_standard', resets, 'reset'),
+              ('input_port_name_not_standard', [(name, line) for name, line in ports
+                                                if name not in clock_names and name not in reset_names], 'input port'))
+    for rule_name, names, what in checks:
+        if rule_name not in naming or not _has_preferences(rules, rule_name):
+            continue
+        seen = set()
+        for name, line in names:
+            if name in seen:
+                continue
+            seen.add(name)
+            problem = _check_name(rules[rule_name], name, what)
+            if problem:
+                report(rule_name, line, problem)
+    return violations
+
+
+def _has_preferences(rules: Dict[str, GoalRule], name: str) -> bool:
+    """Whether the goal files give the rule preferences to check names against."""
+    return name in rules and bool(rules[name].options)
+
+
+def precheck_summary(violations: Sequence[PrecheckViolation], files: int, elapsed: float) -> str:
+    counts = {}
+    for violation in violations:
+        counts.setdefault((violation.rule, violation.severity), 0)
+        counts[(violation.rule, violation.severity)] += 1
+    rows = [[rule, severity, str(count)] for (rule, severity), count in sorted(counts.items())]
+    rows.append([f'Total ({files} files, {elapsed:.2f} s)', '', str(len(violations))])
+    return StringUtil().table(['Precheck rule', 'Severity', 'Violations'], rows, style='round', align=['left', 'left', 'right'])
+
+
+def write_precheck_report(violations: Sequence[PrecheckViolation], path: str) -> Path:
+    """Write the violations as CSV (rule,severity,file,line,message)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(PrecheckViolation._fields)
+        writer.writerows(violations)
+    return path
+
+
+def precheck_filelist(
+    filelists: Sequence[str],
+    goals: Optional[Sequence[str]] = None,
+    rule_names: Optional[Sequence[str]] = None,
+    jobs: Optional[int] = None,
+    cache: Optional[SourceCache] = None,
+    variables: Optional[Dict[str, str]] = None,
+    preprocess: bool = True
+) -> Tuple[List[PrecheckViolation], int, float]:
+    """
+    run_precheck() over the sources of filelists, in a process pool, preprocessed with
+    the filelist +incdir+ and +define+ unless preprocess is False; returns (violations, files, seconds).
+    """
+    start = time.perf_counter()
+    sources = read_filelist(filelists, variables)
+    files = sources.files
+    goals = list(goals or DEFAULT_GOALS)
+    options = dict(preprocess=preprocess, incdirs=sources.incdirs, defines=sources.defines)
+    if (jobs or os.cpu_count() or 1) > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            violations = run_precheck(files, goals, rule_names, cache, executor, **options)
+    else:
+        violations = run_precheck(files, goals, rule_names, cache, **options)
+    return violations, len(files), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate the pattern and naming rules of the lint goal locally, before a qverify run')
+    parser.add_argument('-f', '--filelist', nargs='+', required=True, help='Filelist(s) of the design')
+    parser.add_argument('-g', '--goal', nargs='+', default=list(DEFAULT_GOALS), help='Goal files with the rules (default: oc_lint.goal and openchip_design_rule.tcl)')
+    parser.add_argument('-r', '--rules', nargs='+', default=None, help='Rules to evaluate (default: all enabled ones)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('-o', '--output', default=None, help='Write the violations to this CSV file')
+    parser.add_argument('-db', '--cache', default=DEFAULT_CACHE, help=f'Source analysis cache (default: {DEFAULT_CACHE})')
+    parser.add_argument('--no_cache', action='store_true', help='Scan every file, do not read or write the cache')
+    parser.add_argument('--no_preprocess', action='store_true', help='Check the names of both `ifdef branches instead of preprocessing with the filelist +define+/+incdir+')
+    args = parser.parse_args()
+
+    with SourceCache(None if args.no_cache else args.cache) as cache:
+        violations, files, elapsed = precheck_filelist(args.filelist, args.goal, args.rules, args.jobs, cache,
+                                                       preprocess=not args.no_preprocess)
+    for warning in pattern_warnings(read_goal_rules(args.goal)[0]):
+        print(f"Warning: {warning}")
+    print(precheck_summary(violations, files, elapsed))
+    if args.output:
+        print(f"Violations: {write_precheck_report(violations, args.output)}")
+    else:
+        for violation in violations:
+            print(f"  {os.path.relpath(violation.file)}:{violation.line}: [{violation.rule}] {violation.message}")
+    if violations:
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import time
+import argparse
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from string_util import StringUtil
+from sv_lexer import (COMMENT_KINDS, DIRECTIVE, IDENTIFIER, KEYWORD, LAYOUT_KINDS, NUMBER, STRING,
+                      SYSTEM_IDENTIFIER, ESCAPED_IDENTIFIER, Token, tokenize)
+from violation_store import ViolationStore
+
+CHECK = 'parentheses_missing'
+
+# Binding level of the binary operators, IEEE 1800-2017 table 11-2 (higher binds tighter)
+BINARY_LEVELS = {
+    '**': 13,
+    '*': 12, '/': 12, '%': 12,
+    '+': 11, '-': 11,
+    '<<': 10, '>>': 10, '<<<': 10, '>>>': 10,
+    '<': 9, '<=': 9, '>': 9, '>=': 9, 'inside': 9,
+    '==': 8, '!=': 8, '===': 8, '!==': 8, '==?': 8, '!=?': 8,
+    '&': 7,
+    '^': 6, '~^': 6, '^~': 6,
+    '|': 5,
+    '&&': 4,
+    '||': 3,
+    '?': 2,
+    '->': 1, '<->': 1,
+}
+RIGHT_ASSOCIATIVE = frozenset(('?', '->', '<->'))
+UNARY_OPERATORS = frozenset(('+', '-', '!', '~', '&', '~&', '|', '~|', '^', '~^', '^~', '++', '--'))
+_OPERANDS = frozenset((IDENTIFIER, NUMBER, STRING, SYSTEM_IDENTIFIER, ESCAPED_IDENTIFIER))
+_SKIPPED = LAYOUT_KINDS | COMMENT_KINDS
+# Lines of the Questa text report, one violation each: Expression '...' ... Module '...' ... File '...' ... Line '...'
+_REPORT_RE = re.compile(r"\bparentheses_missing\b.*?Expression\s*'(?P<expression>.*?)'(?=[^']*Module\s*').*?"
+                        r"Module\s*'(?P<module>[^']*)'.*?File\s*'(?P<file>[^']+)'.*?Line\s*'(?P<line>\d+)'")
+# The expression may hold quotes itself (8'hFF): it ends at the quote after which the next field starts
+_EXPRESSION_RE = re.compile(r"Expression\s*'(.*?)'(?=[^']*(?:Module|File|Line)\s*'|[^']*$)")
+# Lines after the reported one the expression may start on (a statement reported at its first line)
+_SEARCH_LINES = 8
+
+
+class ParenthesesViolation(NamedTuple):
+    file: str
+    line: int
+    expression: str
+
+
+class FileFix(NamedTuple):
+    path: str
+    fixed: int                          # violations fixed
+    edits: int                          # parenthesis pairs inserted
+    unfixed: List[Tuple[int, str]]      # (line, reason)
+
+
+def read_parentheses_violations(path: str) -> List[ParenthesesViolation]:
+    """
+    parentheses_missing violations of a lint report, read in one pass.
+
+    A .csv or .json report is loaded into a ViolationStore and the expression taken
+    from the message ("Expression '...'") or the object; any other file is read as
+    the Questa text report, one violation per line.
+    """
+    if path.endswith(('.csv', '.json')):
+        store = ViolationStore.from_file(path)
+        violations = []
+        for v in store.rows(store.filter(check=CHECK)):
+            m = _EXPRESSION_RE.search(v.message)
+            violations.append(ParenthesesViolation(v.file, v.line, m.group(1) if m else v.object))
+        return violations
+    with open(path, 'r', errors='replace') as f:
+        return [ParenthesesViolation(m.group('file'), int(m.group('line')), m.group('expression'))
+                for m in map(_REPORT_RE.search, f) if m]
+
+
+class _Parser:
+    """
+    Precedence climbing parser over the tokens of one expression.
+
+    It builds no tree: every binary operation is returned as its binding level and
+    first/last token, and each operand that is itself a binary operation of another
+    level (its meaning relies on precedence) is recorded in self.wraps.
+    """
+
+    def __init__(self, tokens: Sequence[Token]):
+        self.tokens = tokens
+        self.i = 0
+        self.wraps = []     # (first token, last token) to enclose in parentheses
+
+    def peek(self) -> str:
+        return self.tokens[self.i].text if self.i < len(self.tokens) else ''
+
+    def expect(self, text: str) -> None:
+        if self.peek() != text:
+            raise ValueError(f"expected '{text}' at '{self.peek() or 'end of expression'}'")
+        self.i += 1
+
+    def expression(self, min_level: int = 0) -> Tuple[Optional[int], int, int]:
+        """(binding level or None for an operand, first token, last token) of the expression at self.i."""
+        left = self.unary()
+        while True:
+            op = self.peek()
+            level = BINARY_LEVELS.get(op)
+            if level is None or level < min_level:
+                return left
+            self.i += 1
+            if op == '?':
+                self.wrap(left, level)
+                self.expression()
+                self.expect(':')
+                right = self.expression(level)
+                left = (level, left[1], right[2])
+                continue
+            right = self.expression(level if op in RIGHT_ASSOCIATIVE else level + 1)
+            self.wrap(left, level)
+            self.wrap(right, level)
+            left = (level, left[1], right[2])
+
+    def wrap(self, operand: Tuple[Optional[int], int, int], level: int) -> None:
+        if operand[0] is not None and operand[0] != level:
+            self.wraps.append((operand[1], operand[2]))
+
+    def unary(self) -> Tuple[Optional[int], int, int]:
+        first = self.i
+        if self.peek() in UNARY_OPERATORS:
+            self.i += 1
+            self.unary()
+        else:
+            self.primary()
+        return None, first, self.i - 1
+
+    def primary(self) -> None:
+        if self.i >= len(self.tokens):
+            raise ValueError("expression ends early")
+        token = self.tokens[self.i]
+        self.i += 1
+        if token.text == '(':
+            self.expression()
+            self.expect(')')
+        elif token.text in ('{', "'{"):
+            self.concatenation()
+        elif token.kind in _OPERANDS or token.kind == DIRECTIVE or (token.kind == KEYWORD and token.text in ('this', 'null', 'super')):
+            if token.kind == DIRECTIVE and self.peek() == '(':
+                self.skip_balanced()     # macro arguments are text, not expressions
+        else:
+            raise ValueError(f"unexpected '{token.text}'")
+        self.postfix()
+
+    def postfix(self) -> None:
+        while True:
+            text = self.peek()
+            if text == '[':
+                self.i += 1
+                self.expression()
+                if self.peek() in (':', '+:', '-:'):
+                    self.i += 1
+                    self.expression()
+                self.expect(']')
+            elif text in ('.', '::'):
+                self.i += 1
+                if self.i >= len(self.tokens) or self.tokens[self.i].kind not in (IDENTIFIER, ESCAPED_IDENTIFIER):
+                    raise ValueError(f"expected a name after '{text}'")
+                self.i += 1
+            elif text == '(':
+                self.arguments(')')
+            elif text == "'" and self.i + 1 < len(self.tokens) and self.tokens[self.i + 1].text == '(':
+                self.i += 1         # cast: type'(expression), 8'(expression)
+                self.arguments(')')
+            else:
+                return
+
+    def arguments(self, close: str) -> None:
+        """'(' [expression {',' expression}] ')' of a call or cast; the opening token is at self.i."""
+        self.i += 1
+        if self.peek() == close:
+            self.i += 1
+            return
+        while True:
+            self.expression()
+            if self.peek() != ',':
+                break
+            self.i += 1
+        self.expect(close)
+
+    def concatenation(self) -> None:
+        """Concatenation, replication or assignment pattern after its '{'; ranges of an inside set are allowed."""
+        if self.peek() == '}':
+            self.i += 1
+            return
+        while True:
+            if self.peek() == '[':
+                self.i += 1
+                self.expression()
+                self.expect(':')
+                self.expression()
+                self.expect(']')
+            else:
+                self.expression()
+                if self.peek() == '{':      # replication {n{...}}
+                    self.i += 1
+                    self.concatenation()
+            if self.peek() != ',':
+                break
+            self.i += 1
+        self.expect('}')
+
+    def skip_balanced(self) -> None:
+        depth = 0
+        while self.i < len(self.tokens):
+            text = self.tokens[self.i].text
+            self.i += 1
+            depth += (text == '(') - (text == ')')
+            if depth == 0:
+                return
+        raise ValueError("unbalanced macro arguments")
+
+
+def parenthesize(tokens: Sequence[Token]) -> List[Tuple[int, int]]:
+    """
+    Operands to enclose in parentheses so that an expression no longer relies on precedence.
+
+    A binary operation used as the operand of an operator of another level, or as
+    the condition of ?:, is enclosed; chains of one level (a + b - c) are left alone.
+
+    Args:
+        tokens: Tokens of the expression, without whitespace and comments
+
+    Returns:
+        list: (first token, last token) index pairs, outermost last
+
+    Raises:
+        ValueError: if the tokens are not one expression this parser understands
+    """
+    parser = _Parser(tokens)
+    parser.expression()
+    if parser.i != len(tokens):
+        raise ValueError(f"unexpected '{tokens[parser.i].text}'")
+    return parser.wraps
+
+
+def _find_expression(tokens: List[Token], lines: List[int], line: int, expression: List[str]) -> Optional[int]:
+    """Index of the first file token of expression at or after line (within _SEARCH_LINES lines), or None."""
+    if not expression:
+        return None
+    first, size = expression[0], len(expression)
+    for i in range(bisect_left(lines, line), bisect_left(lines, line + _SEARCH_LINES)):
+        if tokens[i].text == first and [token.text for token in tokens[i:i + size]] == expression:
+            return i
+    return None
+
+
+def fix_file(path: str, violations: Sequence[Tuple[int, str]], dry_run: bool = False) -> FileFix:
+    """
+    Insert the missing parentheses of every violation of one file, reading and writing it once.
+
+    The file is tokenized once; each reported expression is located by its tokens
+    from the reported line on (a line to token index bisect, not a scan from the top)
+    and parsed. The insertions of all violations are deduplicated and applied from
+    the end of the text backwards, so no offset moves before it is used, and the
+    result replaces the file atomically (written next to it, then renamed).
+
+    Args:
+        path: Source file
+        violations: (line, expression) of its violations
+        dry_run: Only count what would be fixed
+
+    Returns:
+        FileFix: counts and the violations that could not be fixed, with the reason
+    """
+    try:
+        with open(path, 'r', newline='') as f:     # kept byte for byte: line endings as they are, no replaced characters
+            text = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return FileFix(path, 0, 0, [(line, str(e)) for line, _ in violations])
+    tokens = list(tokenize(text, _SKIPPED))
+    lines = [token.line for token in tokens]
+    spans, fixed, unfixed = set(), 0, []
+    for line, expression in sorted(set(violations)):
+        wanted = [token.text for token in tokenize(expression, _SKIPPED)]
+        start = _find_expression(tokens, lines, line, wanted)
+        if start is None:
+            unfixed.append((line, f"expression not found: {expression}"))
+            continue
+        found = tokens[start:start + len(wanted)]
+        try:
+            wraps = parenthesize(found)
+        except ValueError as e:
+            unfixed.append((line, f"{e}: {expression}"))
+            continue
+        spans.update((found[first].offset, found[last].offset + len(found[last].text)) for first, last in wraps)
+        fixed += 1
+
+    inserts = sorted([(begin, 1, '(') for begin, _ in spans] + [(end, 0, ')') for _, end in spans], reverse=True)
+    if inserts and not dry_run:
+        pieces, previous = [], len(text)
+        for offset, _, paren in inserts:
+            pieces.append(text[offset:previous])
+            pieces.append(paren)
+            previous = offset
+        pieces.append(text[:previous])
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', newline='') as f:
+            f.write(''.join(reversed(pieces)))
+        os.replace(tmp, path)
+    return FileFix(path, fixed, len(spans), unfixed)
+
+
+def fix_parentheses(
+    violations: Sequence[ParenthesesViolation],
+    jobs: Optional[int] = None,
+    dry_run: bool = False
+) -> List[FileFix]:
+    """
+    Fix parentheses_missing violations, grouped by file, with one pool task per file.
+
+    Args:
+        violations: Violations of the report
+        jobs: Worker processes (default: one per CPU, 1 fixes in this process)
+        dry_run: Only count what would be fixed, write nothing
+
+    Returns:
+        list: FileFix per file in report order
+    """
+    by_file = defaultdict(list)
+    for v in violations:
+        by_file[os.path.abspath(v.file)].append((v.line, v.expression))
+    workers = min(jobs or os.cpu_count() or 1, max(len(by_file), 1))
+    with (ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext()) as executor:
+        if executor is None:
+            return [fix_file(path, found, dry_run) for path, found in by_file.items()]
+        return list(executor.map(fix_file, by_file, by_file.values(), [dry_run] * len(by_file)))
+
+
+def fix_summary(results: Sequence[FileFix], elapsed: float, dry_run: bool = False) -> str:
+    rows = [[os.path.relpath(r.path), str(r.fixed), str(r.edits), str(len(r.unfixed))] for r in results]
+    rows.append([f'Total ({len(results)} files, {elapsed:.2f} s)', str(sum(r.fixed for r in results)),
+                 str(sum(r.edits for r in results)), str(sum(len(r.unfixed) for r in results))])
+    header = ['Source file', 'Fixable' if dry_run else 'Fixed', 'Parentheses', 'Not fixed']
+    return StringUtil().table(header, rows, style='round', align=['left', 'right', 'right', 'right'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Insert the parentheses reported missing by the parentheses_missing lint check')
+    parser.add_argument('-r', '--report', required=True, help='Lint report (Questa text report, .csv or .json)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('-n', '--dry_run', action='store_true', help='Only report what would be fixed')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    violations = read_parentheses_violations(args.report)
+    if not violations:
+        print(f"No {CHECK} violation in {args.report}")
+        return
+    results = fix_parentheses(violations, args.jobs, args.dry_run)
+    print(fix_summary(results, time.perf_counter() - start, args.dry_run))
+    for result in results:
+        for line, reason in result.unfixed:
+            print(f"  {os.path.relpath(result.path)}:{line}: not fixed, {reason}")
+    if any(result.unfixed for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import argparse
+from bisect import bisect_right
+from collections import Counter
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+from violation_store import ViolationStore, Violation
+
+# Section headers of the Questa lint text reports (lint.rpt: "Check: <name>", lint_full.rpt: "Module <n>: <name>")
+HEADER_RE = re.compile(r'^(?:Check:\s*(?P<check>\w+)|Module\s+\d+:\s*(?P<module>\w+))[^\n]*$', re.MULTILINE)
+# Module named inside a violation text when the report is grouped by check
+MODULE_IN_TEXT_RE = re.compile(r"\b[Mm]odule\s*[:=]?\s*['\"]?([\w$.]+)")
+
+CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class Match(NamedTuple):
+    pattern: int
+    check: str
+    module: str
+    line: int
+    text: str
+
+
+def read_patterns_file(path: Union[str, os.PathLike]) -> List[str]:
+    """Read one pattern per line, skipping empty lines and lines starting with '#'."""
+    with open(path, 'r') as f:
+        return [line.rstrip('\n') for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def _trie_regex(words: List[str]) -> str:
+    """Regex for a set of literals as a character trie ('sig_a|sig_b' -> 'sig_[ab]'), so shared prefixes are scanned once."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        if list(node) == ['']:
+            return ''
+        optional = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        if all(len(branch) == 1 or (len(branch) == 2 and branch[0] == '\\') for branch in branches):
+            body = '[' + ''.join(branches) + ']' if len(branches) > 1 else branches[0]
+        else:
+            body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if optional else body
+
+    return build(trie)
+
+
+class PatternSet:
+    """
+    Many user patterns searched in one pass.
+
+    The scan regex is the plain alternation of all patterns (or a trie of the literals),
+    without capture groups, so the regex engine keeps its first-character prefix scan.
+    Only at a hit is the named-group alternation matched to tell which pattern (p<index>) hit.
+    """
+
+    def __init__(self, patterns: List[str], literal: bool = False, ignore_case: bool = False):
+        """
+        Args:
+            patterns: Regular expressions (or plain strings with literal=True)
+            literal: Escape the patterns instead of treating them as regular expressions
+            ignore_case: Case insensitive matching
+
+        Raises:
+            ValueError: if no pattern is given or a pattern does not compile
+        """
+        if not patterns:
+            raise ValueError("No pattern given")
+        self.patterns = list(patterns)
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        sources = [re.escape(pattern) for pattern in patterns] if literal else list(patterns)
+        for source in sources:
+            try:
+                re.compile(source)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern '{source}': {e}")
+        self._named = re.compile('|'.join(f'(?P<p{i}>{source})' for i, source in enumerate(sources)), flags)
+        scan = _trie_regex(self.patterns) if literal else '|'.join(f'(?:{source})' for source in sources)
+        self._scan = re.compile(scan, flags)
+
+    def search(self, text: str, pos: int = 0) -> Optional[Tuple[int, int, int]]:
+        """Return (pattern index, start, end) of the first hit at or after pos, or None."""
+        m = self._scan.search(text, pos)
+        if m is None:
+            return None
+        named = self._named.match(text, m.start())
+        if named is None:  # only possible with lookarounds that behave differently in the two alternations
+            return 0, m.start(), m.end()
+        return int(named.lastgroup[1:]), named.start(), named.end()
+
+
+def _block_bounds(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Extend [start, end) to the whole violation block: its first line plus indented continuation lines."""
+    begin = text.rfind('\n', 0, start) + 1
+    while begin > 0 and text[begin:begin + 1] in (' ', '\t'):
+        begin = text.rfind('\n', 0, begin - 1) + 1
+    stop = text.find('\n', end)
+    while stop != -1 and text[stop + 1:stop + 2] in (' ', '\t'):
+        stop = text.find('\n', stop + 1)
+    return begin, len(text) if stop == -1 else stop
+
+
+def _last_block_start(text: str) -> int:
+    """Offset of the last line that starts a block (not indented), 0 if none."""
+    pos = len(text)
+    while pos > 0:
+        pos = text.rfind('\n', 0, pos - 1) + 1
+        if text[pos:pos + 1] not in (' ', '\t', '\n', ''):
+            return pos
+    return 0
+
+
+def filter_report(
+    path: Union[str, os.PathLike],
+    patterns: PatternSet,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[Match]:
+    """
+    Stream a lint text report and yield every violation block matching any of the patterns.
+
+    The report is read in large chunks that end on a block boundary; the pattern set
+    scans each chunk in C and only hits are mapped back to their block, line number
+    and enclosing Check/Module section. Each block is reported once, for the first
+    pattern that hits it.
+    """
+    check = module = ''
+    line_no = 1
+    carry = ''
+    with open(path, 'r', errors='replace') as f:
+        while True:
+            data = f.read(chunk_size)
+            text = carry + data
+            if not text:
+                break
+            if data:
+                cut = _last_block_start(text)
+                if cut == 0:
+                    carry = text
+                    continue
+                text, carry = text[:cut], text[cut:]
+            else:
+                carry = ''
+
+            headers = [(m.start(), m.group('check'), m.group('module')) for m in HEADER_RE.finditer(text)]
+            positions = [pos for pos, _, _ in headers]
+            counted = 0
+            pos = 0
+            while True:
+                hit = patterns.search(text, pos)
+                if hit is None:
+                    break
+                pattern, start, end = hit
+                begin, stop = _block_bounds(text, start, end)
+                pos = max(stop, end + 1)
+                i = bisect_right(positions, begin) - 1
+                if i >= 0 and headers[i][0] == begin:
+                    continue  # hit on a section header, not a violation
+                block_check, block_module = _context(headers, i, check, module)
+                line_no += text.count('\n', counted, begin)
+                counted = begin
+                block = text[begin:stop]
+                if not block_module:
+                    found = MODULE_IN_TEXT_RE.search(block)
+                    block_module = found.group(1) if found else ''
+                yield Match(pattern, block_check, block_module, line_no, block)
+
+            line_no += text.count('\n', counted)
+            check, module = _context(headers, len(headers) - 1, check, module)
+            if not data:
+                break
+
+
+def _context(headers: List[tuple], i: int, check: str, module: str) -> Tuple[str, str]:
+    """Check/module in effect after header i, starting from the context of the previous chunk."""
+    found_check = found_module = None
+    while i >= 0 and (found_check is None or found_module is None):
+        _, c, mod = headers[i]
+        if c and found_check is None:
+            found_check = c
+        if mod and found_module is None:
+            found_module = mod
+        i -= 1
+    return (check if found_check is None else found_check), (module if found_module is None else found_module)
+
+
+def filter_store(
+    store: ViolationStore,
+    patterns: PatternSet,
+    fields: Tuple[str, ...] = ('object', 'message', 'module', 'file')
+) -> Iterator[Tuple[int, Violation]]:
+    """
+    Yield (pattern index, violation) for every row of a ViolationStore matching any of the patterns.
+
+    The patterns run once per distinct interned value of each field rather than once per row.
+    """
+    hits = {}
+    for field in fields:
+        values = store.values(field)
+        hits[field] = [None] * len(values)
+        for idx, value in enumerate(values):
+            hit = patterns.search(value) if value else None
+            if hit is not None:
+                hits[field][idx] = hit[0]
+    columns = [(hits[field], store.column(field)) for field in fields]
+    for row in range(len(store)):
+        for field_hits, column in columns:
+            pattern = field_hits[column[row]]
+            if pattern is not None:
+                yield pattern, store.row(row)
+                break
+
+
+def print_matches(matches: Iterator[Match], patterns: List[str], out=sys.stdout) -> Counter:
+    """Print matching blocks grouped under their check/module and return the hit count per pattern."""
+    counts = Counter()
+    context = None
+    for match in matches:
+        counts[match.pattern] += 1
+        if (match.check, match.module) != context:
+            context = (match.check, match.module)
+            out.write(f"\nCheck: {match.check or '-'}  Module: {match.module or '-'}\n")
+        out.write(f"{match.line}: {match.text}\n")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Filter a lint report by many regular expressions in one pass')
+    parser.add_argument('report', help='Lint text report (lint.rpt / lint_full.rpt) or JSON/CSV report')
+    parser.add_argument('-e', '--regexp', nargs='*', default=[], help='Pattern(s)')
+    parser.add_argument('-p', '--patterns_file', default='', help='File with one pattern per line')
+    parser.add_argument('-F', '--literal', action='store_true', help='Treat patterns as plain strings')
+    parser.add_argument('-i', '--ignore_case', action='store_true', help='Case insensitive matching')
+    args = parser.parse_args()
+
+    patterns = args.regexp + (read_patterns_file(args.patterns_file) if args.patterns_file else [])
+    try:
+        pattern_set = PatternSet(patterns, literal=args.literal, ignore_case=args.ignore_case)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.report.endswith(('.json', '.csv')):
+        matches = (Match(p, v.check, v.module, v.line, f'{v.file} {v.object} {v.message}'.strip())
+                   for p, v in filter_store(ViolationStore.from_file(args.report), pattern_set))
+    else:
+        matches = filter_report(args.report, pattern_set)
+    counts = print_matches(matches, patterns)
+    for i, pattern in enumerate(patterns):
+        print(f'{counts[i]:>10}  {pattern}')
+
+
+if __name__ == '__main__':
+    main()
@@ -730,7 +730,33 @@ class StringUtil:
         filled = int(length * progress)
         bar = fill_char * filled + empty_char * (length - filled)
         return f"{brackets[0]}{bar}{brackets[1]} {int(progress * 100)}%"
-    
+
+    def sparkline(self, values: List[Union[int, float]], width: Optional[int] = None) -> str:
+        """
+        Generates a one-line sparkline of a series of values.
+
+        Args:
+            values: Series of numbers, oldest first
+            width: Only plot the last `width` values (default: all)
+
+        Returns:
+            Sparkline string using block characters (or ASCII levels if Unicode is unsupported)
+
+        Example:
+            >> string_util.sparkline([3, 5, 2, 8])
+            '▂▅▁█'
+        """
+        if width:
+            values = values[-width:]
+        if not values:
+            return ''
+        levels = '_.-~*#' if self.force_ascii else '▁▂▃▄▅▆▇█'
+        low, high = min(values), max(values)
+        if high == low:
+            return levels[len(levels) // 2] * len(values)
+        scale = (len(levels) - 1) / (high - low)
+        return ''.join(levels[int(round((value - low) * scale))] for value in values)
+
 
     def table_to_html(self, table: str) -> str:
         """Converts box-drawing table to HTML (basic implementation)."""
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import zlib
+import time
+import marshal
+import sqlite3
+import argparse
+from hashlib import blake2b
+from pathlib import Path
+from itertools import starmap
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from string_util import StringUtil
+from filelist import read_filelist
+from sv_lexer import DIRECTIVE, STRING, SourceText, directive_body, tokenize
+
+DEFAULT_CACHE = os.getenv('QSTRUN_SV_CACHE', os.path.join(os.path.expanduser('~'), '.questa_run', 'sv_cache.db'))
+_INCLUDE_LINE_RE = re.compile(r'^[^\n]*`include\b[^\n]*', re.MULTILINE)
+# `define NAME, then its body up to the first newline not escaped by a backslash
+_DEFINE_RE = re.compile(r'`define[ \t]+([A-Za-z_][\w$]*)((?:[^\n\\]|\\[\s\S])*)')
+# Paths per SELECT ... IN (...), below the SQLite host parameter limit
+_QUERY_CHUNK = 500
+# Preprocessed results kept per file by prune(), the most recently stored define sets first
+MAX_DEFINE_SETS = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path        TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    digest      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    path        TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    name        TEXT NOT NULL,
+    version     INTEGER NOT NULL,
+    data        BLOB NOT NULL,
+    PRIMARY KEY (path, name)
+);
+CREATE TABLE IF NOT EXISTS preprocessed (
+    path        TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    deps        BLOB NOT NULL,
+    data        BLOB NOT NULL,
+    PRIMARY KEY (path, key)
+);
+"""
+
+# Artifact name -> (version, function(SourceText) -> marshal-able value); bump the version when the output changes
+ANALYZERS: Dict[str, Tuple[int, Callable[[SourceText], object]]] = {}
+
+
+def analyzer(name: str, version: int = 1):
+    """Register a per-file analysis whose result is cached under name; analyses of one file share its tokens."""
+    def register(func):
+        ANALYZERS[name] = (version, func)
+        return func
+    return register
+
+
+@analyzer('stripped')
+def _stripped(source: SourceText) -> str:
+    return source.stripped
+
+
+def _directive_lines(text: str, pattern: 're.Pattern'):
+    """(1-based line, match) of the pattern matches, counting newlines only between matches."""
+    line, pos = 1, 0
+    for m in pattern.finditer(text):
+        line += text.count('\n', pos, m.start())
+        pos = m.start()
+        yield line, m
+
+
+@analyzer('includes')
+def find_includes(source: SourceText) -> List[Tuple[int, str, bool]]:
+    """
+    (line, included file, alone on its line apart from comments) of every `include.
+
+    Only the comment-stripped lines holding an `include are tokenized, so a string
+    literal that merely contains '`include' is not reported.
+    """
+    if '`include' not in source.text:
+        return []
+    includes = []
+    for line, m in _directive_lines(source.stripped, _INCLUDE_LINE_RE):
+        tokens = list(tokenize(m.group()))
+        for token, following in zip(tokens, tokens[1:] + [None]):
+            if token.kind != DIRECTIVE or token.text != '`include':
+                continue
+            if following is None or following.kind != STRING:
+                includes.append((line, '', False))
+            else:
+                includes.append((line, following.text[1:-1], len(tokens) == 2))
+    return includes
+
+
+@analyzer('defines')
+def find_defines(source: SourceText) -> List[Tuple[int, str, str]]:
+    """(line, macro name, body) of every `define; the body is joined over backslash-newlines, without comments."""
+    if '`define' not in source.text:
+        return []
+    return [(line, m.group(1), directive_body(m.group(2), 0)[0]) for line, m in _directive_lines(source.stripped, _DEFINE_RE)]
+
+
+def _pack(value) -> bytes:
+    return zlib.compress(marshal.dumps(value), 1)
+
+
+def _unpack(data: bytes):
+    return marshal.loads(zlib.decompress(data))
+
+
+def analyze(path: str, names: Sequence[str], known_digest: str = '') -> tuple:
+    """
+    Read one source file and compute its artifacts; runs in worker processes.
+
+    If the content hash equals known_digest (only the mtime changed), nothing is
+    recomputed and the caller just refreshes the stat key.
+
+    Returns:
+        tuple: (path, size, mtime_ns, digest, {name: packed artifact} or None if unchanged), None if unreadable
+    """
+    try:
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    digest = blake2b(data, digest_size=16).hexdigest()
+    if known_digest and digest == known_digest:
+        return path, stat.st_size, stat.st_mtime_ns, digest, None
+    source = SourceText(data.decode('utf-8', 'replace'), path)
+    return path, stat.st_size, stat.st_mtime_ns, digest, {name: _pack(ANALYZERS[name][1](source)) for name in names}
+
+
+class CacheStats(NamedTuple):
+    hits: int           # artifacts served without reading the file
+    rehashed: int       # files read and hashed because their stat changed, content unchanged
+    analyzed: int       # files (re)analyzed
+    missing: int        # files that could not be read
+
+
+class SourceCache:
+    """
+    Per-file analysis results (comment-stripped text, includes, defines, ...) kept in SQLite.
+
+    A file's artifacts are reused while its path, size and mtime match; when only the
+    stat changed its content hash is checked before anything is recomputed. Artifacts
+    are stored as zlib-compressed marshal blobs, tagged with their analyzer version.
+    """
+
+    def __init__(self, db_path: Optional[Union[str, os.PathLike]] = DEFAULT_CACHE):
+        if db_path is None:
+            self.conn = sqlite3.connect(':memory:')
+        else:
+            db_path = Path(db_path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(db_path), timeout=60)
+            self.conn.execute('PRAGMA journal_mode = WAL')
+            self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(SCHEMA)
+        self.hits = self.rehashed = self.analyzed = self.missing = 0
+
+    def __enter__(self) -> 'SourceCache':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.rehashed, self.analyzed, self.missing)
+
+    def _rows(self, paths: List[str], names: Sequence[str]) -> Tuple[Dict[str, tuple], Dict[Tuple[str, str], Tuple[int, bytes]]]:
+        files, artifacts = {}, {}
+        marks = ','.join('?' * len(names))
+        for i in range(0, len(paths), _QUERY_CHUNK):
+            chunk = paths[i:i + _QUERY_CHUNK]
+            holders = ','.join('?' * len(chunk))
+            for path, size, mtime_ns, digest in self.conn.execute(
+                    f'SELECT path, size, mtime_ns, digest FROM files WHERE path IN ({holders})', chunk):
+                files[path] = (size, mtime_ns, digest)
+            for path, name, version, data in self.conn.execute(
+                    f'SELECT path, name, version, data FROM artifacts WHERE path IN ({holders}) AND name IN ({marks})',
+                    chunk + list(names)):
+                artifacts[(path, name)] = (version, data)
+        return files, artifacts
+
+    def get_many(
+        self,
+        paths: Sequence[str],
+        names: Union[str, Sequence[str]],
+        executor=None,
+        chunk_size: int = 16
+    ) -> List[Optional[Dict[str, object]]]:
+        """
+        Artifacts of many files, recomputing only what is missing or out of date.
+
+        Args:
+            paths: Source files
+            names: Artifact name(s), see ANALYZERS
+            executor: Process pool to analyze the changed files in (default: this process)
+            chunk_size: Files per task sent to the pool
+
+        Returns:
+            list: {name: artifact} per path, in the order of paths (None for unreadable files)
+        """
+        names = [names] if isinstance(names, str) else list(names)
+        for name in names:
+            if name not in ANALYZERS:
+                raise ValueError(f"Unknown source artifact '{name}', expected one of {', '.join(ANALYZERS)}")
+        paths = [os.path.abspath(path) for path in paths]
+        unique = list(dict.fromkeys(paths))
+        files, artifacts = self._rows(unique, names)
+        results, jobs = {}, []
+        for path in unique:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.missing += 1
+                results[path] = None
+                continue
+            row = files.get(path)
+            cached = {name: artifacts.get((path, name)) for name in names}
+            current = all(entry is not None and entry[0] == ANALYZERS[name][0] for name, entry in cached.items())
+            if row is not None and row[:2] == (stat.st_size, stat.st_mtime_ns) and current:
+                self.hits += 1
+                results[path] = {name: _unpack(entry[1]) for name, entry in cached.items()}
+            else:
+                jobs.append((path, names, row[2] if row is not None and current else ''))
+
+        computed = executor.map(analyze, *zip(*jobs), chunksize=chunk_size) if executor is not None and jobs else starmap(analyze, jobs)
+        with self.conn:
+            for job, outcome in zip(jobs, computed):
+                path = job[0]
+                if outcome is None:
+                    self.missing += 1
+                    results[path] = None
+                    continue
+                _, size, mtime_ns, digest, packed = outcome
+                self.conn.execute('INSERT INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?) '
+                                  'ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, '
+                                  'digest = excluded.digest', (path, size, mtime_ns, digest))
+                if packed is None:
+                    self.rehashed += 1
+                    results[path] = {name: _unpack(artifacts[(path, name)][1]) for name in names}
+                    continue
+                self.analyzed += 1
+                if path not in files or files[path][2] != digest:
+                    self.conn.execute('DELETE FROM artifacts WHERE path = ?', (path,))
+                self.conn.executemany('INSERT OR REPLACE INTO artifacts (path, name, version, data) VALUES (?, ?, ?, ?)',
+                                      [(path, name, ANALYZERS[name][0], data) for name, data in packed.items()])
+                results[path] = {name: _unpack(data) for name, data in packed.items()}
+        return [results[path] for path in paths]
+
+    def get(self, path: str, name: str):
+        """One artifact of one file (None if the file cannot be read)."""
+        result = self.get_many([path], [name])[0]
+        return None if result is None else result[name]
+
+    def prune(self) -> int:
+        """
+        Forget files that no longer exist; returns how many were removed.
+
+        Their preprocessed results go too, and of the others only the MAX_DEFINE_SETS
+        most recently stored define sets per file are kept.
+        """
+        gone = [(path,) for (path,) in self.conn.execute('SELECT path FROM files') if not os.path.isfile(path)]
+        gone_preprocessed = [(path,) for (path,) in self.conn.execute('SELECT DISTINCT path FROM preprocessed')
+                             if not os.path.isfile(path)]
+        with self.conn:
+            self.conn.executemany('DELETE FROM files WHERE path = ?', gone)
+            self.conn.executemany('DELETE FROM preprocessed WHERE path = ?', gone_preprocessed)
+            self.conn.execute('DELETE FROM preprocessed WHERE rowid IN (SELECT rowid FROM (SELECT rowid, ROW_NUMBER() '
+                              'OVER (PARTITION BY path ORDER BY rowid DESC) AS n FROM preprocessed) WHERE n > ?)',
+                              (MAX_DEFINE_SETS,))
+        return len(gone)
+
+    def clear(self) -> None:
+        with self.conn:
+            self.conn.execute('DELETE FROM files')
+            self.conn.execute('DELETE FROM preprocessed')
+        self.conn.execute('VACUUM')
+
+    def summary(self) -> str:
+        files, = self.conn.execute('SELECT COUNT(*) FROM files').fetchone()
+        rows = [['Files cached', str(files)]]
+        for name, count, size in self.conn.execute('SELECT name, COUNT(*), SUM(LENGTH(data)) FROM artifacts GROUP BY name ORDER BY name'):
+            rows.append([f'  {name}', f'{count} ({size / 1e6:.1f} MB)'])
+        count, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM preprocessed').fetchone()
+        rows.append(['Preprocessed results', f'{count} ({size / 1e6:.1f} MB)'])
+        stats = self.stats
+        rows += [['Served from cache', str(stats.hits)], ['Rehashed, unchanged', str(stats.rehashed)],
+                 ['Analyzed', str(stats.analyzed)], ['Unreadable', str(stats.missing)]]
+        return StringUtil().table(['Source cache', 'Count'], rows, style='round', align=['left', 'right'])
+
+
+def source_artifacts(
+    paths: Sequence[str],
+    name: str,
+    cache: Optional[SourceCache] = None,
+    executor=None,
+    chunk_size: int = 16
+) -> List[object]:
+    """
+    One artifact of each file, from the cache if one is given, else computed directly.
+
+    Returns:
+        list: The artifact per path, in the order of paths (None for unreadable files)
+    """
+    if cache is not None:
+        return [None if result is None else result[name] for result in cache.get_many(paths, [name], executor, chunk_size)]
+    if name not in ANALYZERS:
+        raise ValueError(f"Unknown source artifact '{name}', expected one of {', '.join(ANALYZERS)}")
+    outcomes = executor.map(analyze, paths, [[name]] * len(paths), chunksize=chunk_size) if executor is not None else (analyze(path, [name]) for path in paths)
+    return [None if outcome is None else _unpack(outcome[4][name]) for outcome in outcomes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistent cache of per-file SystemVerilog analysis (stripped text, includes, defines)')
+    parser.add_argument('-f', '--filelist', nargs='+', default=[], help='Filelist(s) whose sources to analyze/warm up')
+    parser.add_argument('-a', '--artifacts', nargs='+', default=list(ANALYZERS), help=f"Artifacts to compute (default: {' '.join(ANALYZERS)})")
+    parser.add_argument('-db', '--database', default=DEFAULT_CACHE, help=f'Cache database (default: {DEFAULT_CACHE})')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes for changed files (default: one per CPU)')
+    parser.add_argument('--prune', action='store_true', help='Forget files that no longer exist')
+    parser.add_argument('--clear', action='store_true', help='Empty the cache')
+    args = parser.parse_args()
+
+    with SourceCache(args.database) as cache:
+        if args.clear:
+            cache.clear()
+        if args.prune:
+            print(f"Pruned {cache.prune()} files")
+        if args.filelist:
+            sources = read_filelist(args.filelist).files
+            start = time.perf_counter()
+            try:
+                if (args.jobs or os.cpu_count() or 1) > 1:
+                    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                        cache.get_many(sources, args.artifacts, executor)
+                else:
+                    cache.get_many(sources, args.artifacts)
+            except ValueError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            print(f"{len(sources)} sources in {time.perf_counter() - start:.2f} s")
+        print(cache.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+import re
+import sys
+import time
+import argparse
+import tempfile
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from pathlib import Path
+from collections import Counter
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+# Token kinds
+WHITESPACE = 'WHITESPACE'                   # including newlines
+CONTINUATION = 'CONTINUATION'               # backslash-newline, e.g. inside a `define body
+LINE_COMMENT = 'LINE_COMMENT'
+BLOCK_COMMENT = 'BLOCK_COMMENT'
+ATTRIBUTE = 'ATTRIBUTE'                     # (* ... *)
+STRING = 'STRING'
+DIRECTIVE = 'DIRECTIVE'                     # `include, `define, `MACRO_USE, `", ``
+ESCAPED_IDENTIFIER = 'ESCAPED_IDENTIFIER'   # \name, up to the next whitespace
+SYSTEM_IDENTIFIER = 'SYSTEM_IDENTIFIER'     # $display
+NUMBER = 'NUMBER'
+KEYWORD = 'KEYWORD'
+IDENTIFIER = 'IDENTIFIER'
+OPERATOR = 'OPERATOR'
+UNKNOWN = 'UNKNOWN'
+
+COMMENT_KINDS = frozenset((LINE_COMMENT, BLOCK_COMMENT))
+LAYOUT_KINDS = frozenset((WHITESPACE, CONTINUATION))
+
+KEYWORDS = frozenset('''
+    alias always always_comb always_ff always_latch and assert assign assume automatic before begin bind bins
+    binsof bit break buf bufif0 bufif1 byte case casex casez cell chandle checker class clocking cmos config const
+    constraint context continue cover covergroup coverpoint cross deassign default defparam design disable dist do
+    edge else end endcase endchecker endclass endclocking endconfig endfunction endgenerate endgroup endinterface
+    endmodule endpackage endprimitive endprogram endproperty endsequence endspecify endtable endtask enum event
+    eventually expect export extends extern final first_match for force foreach forever fork forkjoin function
+    generate genvar global highz0 highz1 if iff ifnone ignore_bins illegal_bins implements implies import incdir
+    include initial inout input inside instance int integer interconnect interface intersect join join_any
+    join_none large let liblist library local localparam logic longint macromodule matches medium modport module
+    nand negedge nettype new nexttime nmos nor noshowcancelled not notif0 notif1 null or output package packed
+    parameter pmos posedge primitive priority program property protected pull0 pull1 pulldown pullup
+    pulsestyle_ondetect pulsestyle_onevent pure rand randc randcase randsequence rcmos real realtime ref reg
+    reject_on release repeat restrict return rnmos rpmos rtran rtranif0 rtranif1 s_always s_eventually
+    s_nexttime s_until s_until_with scalared sequence shortint shortreal showcancelled signed small soft solve
+    specify specparam static string strong strong0 strong1 struct super supply0 supply1 sync_accept_on
+    sync_reject_on table tagged task this throughout time timeprecision timeunit tran tranif0 tranif1 tri tri0
+    tri1 triand trior trireg type typedef union unique unique0 unsigned until until_with untyped use uwire var
+    vectored virtual void wait wait_order wand weak weak0 weak1 while wildcard wire with within wor xnor xor
+'''.split())
+
+# One alternative per token kind, tried in this order (the most frequent first); each is free
+# of capturing groups so Match.lastgroup names the kind.
+TOKEN_SPEC = (
+    (WHITESPACE, r'\s+'),
+    (IDENTIFIER, r'[A-Za-z_][\w$]*'),
+    (CONTINUATION, r'\\\r?\n'),
+    (LINE_COMMENT, r'//[^\n]*'),
+    (BLOCK_COMMENT, r'/\*[\s\S]*?(?:\*/|\Z)'),
+    (ATTRIBUTE, r'\(\*(?!\s*\))[\s\S]*?\*\)'),                          # not @(*)
+    (STRING, r'"(?:[^"\\\n]|\\[\s\S])*"?'),                             # unterminated: up to the end of the line
+    (DIRECTIVE, r'`(?:[A-Za-z_][\w$]*|"|`|\\`")'),
+    (ESCAPED_IDENTIFIER, r'\\\S+'),
+    (SYSTEM_IDENTIFIER, r'\$[A-Za-z_][\w$]*'),
+    (NUMBER, r"(?:\d[\d_]*\s*)?'[sS]?[bBoOdDhH]\s*[0-9a-fA-FxXzZ?][0-9a-fA-FxXzZ?_]*"     # based
+             r"|'[01xXzZ](?![\w$])"                                                      # unbased unsized
+             r"|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d[\d_]*)?(?:[munpf]?s(?![\w$])|step(?![\w$]))?"),
+    # Longest first: '<<<=' before '<<<' before '<<' before '<=' and '<', so shifts are one token
+    (OPERATOR, r"<<<=|>>>=|===|!==|==\?|!=\?|<->|->>|<<=|>>=|<<<|>>>|<<|>>|\|->|\|=>|\*\*|&&&|"
+               r"<=|>=|==|!=|&&|\|\||->|\+\+|--|\+=|-=|\*=|/=|%=|&=|\|=|\^=|~&|~\||~\^|\^~|::|\+:|-:|##|\.\*|"
+               r"'\{|[-+*/%<>=!~&|^?:;,.#@'(){}\[\]]"),
+    (UNKNOWN, r'[\s\S]'),
+)
+MASTER_RE = re.compile('|'.join(f'(?P<{kind}>{pattern})' for kind, pattern in TOKEN_SPEC))
+_CONTINUATION_RE = re.compile(r'\\\r?\n')
+# Strings and escaped identifiers are matched only so the comment markers inside them are skipped
+_COMMENT_RE = re.compile(r'"(?:[^"\\\n]|\\[\s\S])*"?|\\\S+|(//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))')
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    line: int       # 1-based line of the first character
+    column: int     # 1-based column of the first character
+    offset: int     # character offset in the text
+
+
+def tokenize(text: str, skip: frozenset = LAYOUT_KINDS) -> Iterator[Token]:
+    """
+    Yield the tokens of SystemVerilog source text in one regex pass.
+
+    Line and column come from the line start offsets, found once with C-level
+    split/accumulate calls; the line is only looked up again (bisect) when a token
+    starts past the current one. Identifiers that are keywords get the KEYWORD kind.
+
+    Args:
+        text: Source text
+        skip: Token kinds not to yield (default: whitespace and continuations)
+    """
+    starts = array('l', [0])
+    starts.extend(accumulate(map((1).__add__, map(len, text.split('\n')))))
+    line, line_start, next_start = 1, 0, starts[1]
+    keywords = KEYWORDS
+    for m in MASTER_RE.finditer(text):
+        kind = m.lastgroup
+        if kind in skip:
+            continue
+        start = m.start()
+        if start >= next_start:
+            line = bisect_right(starts, start)
+            line_start = starts[line - 1]
+            next_start = starts[line]
+        value = m.group()
+        if kind == IDENTIFIER and value in keywords:
+            kind = KEYWORD
+        yield Token(kind, value, line, start - line_start + 1, start)
+
+
+def strip_comments(text: str) -> str:
+    """
+    Text with line and block comments removed; string literals and escaped identifiers are kept.
+
+    The newlines of block comments are kept, so line numbers of the stripped text match
+    the source.
+    """
+    def replace(m):
+        comment = m.group(1)
+        if comment is None:
+            return m.group()
+        return '\n' * comment.count('\n')
+    return _COMMENT_RE.sub(replace, text)
+
+
+def logical_line_end(text: str, start: int) -> int:
+    """Offset of the newline ending the line at start, past backslash-newline continuations (len(text) at the end)."""
+    end = start
+    while True:
+        end = text.find('\n', end)
+        if end == -1:
+            return len(text)
+        if not text[start:end].rstrip('\r').endswith('\\'):
+            return end
+        end += 1
+
+
+def directive_body(text: str, start: int) -> Tuple[str, int]:
+    """
+    Rest of a directive's logical line from offset start, e.g. a `define body.
+
+    Backslash-newlines continue the line and become spaces; comments are removed and
+    whitespace is collapsed.
+
+    Returns:
+        tuple: (body, offset of the newline ending it or len(text))
+    """
+    end = logical_line_end(text, start)
+    body = _CONTINUATION_RE.sub(' ', strip_comments(text[start:end]))
+    return ' '.join(body.split()), end
+
+
+class SourceText:
+    """Text of one source file with its tokens and comment-stripped text computed once, on first use."""
+
+    def __init__(self, text: str, path: str = ''):
+        self.text = text
+        self.path = path
+        self._tokens = None
+        self._stripped = None
+
+    @property
+    def tokens(self) -> List[Token]:
+        """Tokens without whitespace and continuations."""
+        if self._tokens is None:
+            self._tokens = list(tokenize(self.text))
+        return self._tokens
+
+    @property
+    def stripped(self) -> str:
+        if self._stripped is None:
+            self._stripped = strip_comments(self.text)
+        return self._stripped
+
+
+def read_source(path: str) -> str:
+    """Source file text; undecodable bytes are replaced rather than failing the whole file."""
+    with open(path, 'r', errors='replace') as f:
+        return f.read()
+
+
+def _benchmark_source(size: int) -> str:
+    """About size bytes of synthetic SystemVerilog with every token kind."""
+    block = '''// module {i}: generated for the lexer benchmark
+`include "pkg_{i}.svh"
+`define WIDTH_{i} 32
+(* keep = "true" *)
+module mod_{i} #(parameter int W = `WIDTH_{i}) (
+  input  logic         clk_i, rst_ni,
+  input  logic [W-1:0] data_i,  /* block comment
+                                   over two lines */
+  output logic [W-1:0] data_o
+);
+  logic [W-1:0] \\bus[0]$ ;
+  always_ff @(posedge clk_i or negedge rst_ni) begin
+    if (!rst_ni) data_o <= '0;
+    else if (data_i != 8'hFF && data_i[3:0] >= 4'b1010) data_o <= (data_i << 2) + 32'd17;
+    $display("value %0d // not a comment", data_o);
+  end
+endmodule : mod_{i}
+
+'''
+    parts = []
+    written = i = 0
+    while written < size:
+        part = block.format(i=i)
+        parts.append(part)
+        written += len(part)
+        i += 1
+    return ''.join(parts)
+
+
+def benchmark(megabytes: float = 8, directory: Optional[str] = None) -> None:
+    """Generate a SystemVerilog file of about `megabytes` MB, then time tokenize() and strip_comments() on it."""
+    directory = directory or tempfile.mkdtemp(prefix='sv_lexer_bench_')
+    path = Path(directory) / 'bench.sv'
+    path.write_text(_benchmark_source(int(megabytes * 1e6)))
+    text = read_source(str(path))
+    print(f"Benchmark file: {path} ({text.count(chr(10))} lines, {len(text) / 1e6:.1f} MB)")
+
+    start = time.perf_counter()
+    kinds = Counter(token.kind for token in tokenize(text, skip=frozenset()))
+    elapsed = time.perf_counter() - start
+    print(f"Tokenize: {sum(kinds.values())} tokens in {elapsed:.2f} s ({len(text) / elapsed / 1e6:.1f} MB/s)")
+
+    start = time.perf_counter()
+    stripped = strip_comments(text)
+    elapsed = time.perf_counter() - start
+    print(f"Strip comments: {len(text) - len(stripped)} characters removed in {elapsed:.2f} s ({len(text) / elapsed / 1e6:.1f} MB/s)")
+    for kind, count in kinds.most_common():
+        print(f"  {kind:<20} {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SystemVerilog lexer: list the tokens of a file, strip its comments or benchmark the lexer')
+    parser.add_argument('source', nargs='?', help='SystemVerilog source file')
+    parser.add_argument('-s', '--strip', action='store_true', help='Print the file without comments instead of its tokens')
+    parser.add_argument('--benchmark', type=float, nargs='?', const=8, default=0, help='Run the lexer benchmark on an N MB file (default 8)')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+    elif args.source:
+        text = read_source(args.source)
+        if args.strip:
+            sys.stdout.write(strip_comments(text))
+        else:
+            for token in tokenize(text):
+                print(f"{token.line}:{token.column}\t{token.kind}\t{token.text!r}")
+    else:
+        parser.print_usage()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import zlib
+import time
+import marshal
+import argparse
+from hashlib import blake2b
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from string_util import StringUtil
+from filelist import read_filelist
+from sv_lexer import SourceText, logical_line_end, read_source, strip_comments
+from sv_cache import ANALYZERS, DEFAULT_CACHE, SourceCache
+
+# Bump when the preprocessed output changes, so cached results are recomputed
+VERSION = 2
+# Nesting of `include before it is reported as recursive
+MAX_INCLUDE_DEPTH = 32
+
+# Strings, comments and escaped identifiers are copied whole so a backtick inside them is not a directive
+_SCAN_RE = re.compile(r'"(?:[^"\\\n]|\\[\s\S])*"?|//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)|\\\S+|`([A-Za-z_][\w$]*)')
+_STRING_RE = re.compile(r'"(?:[^"\\\n]|\\[\s\S])*"?')
+_NAME_RE = re.compile(r'[ \t]*([A-Za-z_][\w$]*)')
+_INCLUDE_ARG_RE = re.compile(r'[ \t]*(?:"([^"\n]*)"|<([^>\n]*)>)')
+# Inside a macro body: token pasting, stringification, strings (kept), macro uses (kept) and identifiers (arguments)
+_BODY_RE = re.compile(r'``|`\\`"|`"|"(?:[^"\\\n]|\\.)*"|`[A-Za-z_][\w$]*|[A-Za-z_][\w$]*')
+_NEWLINES_RE = re.compile(r'\\?\r?\n')
+_CONDITIONALS = ('ifdef', 'ifndef', 'elsif', 'else', 'endif')
+# Compiler directives passed through to the output for the compiler
+_TOOL_DIRECTIVES = frozenset('''
+    timescale default_nettype resetall celldefine endcelldefine unconnected_drive nounconnected_drive pragma line
+    begin_keywords end_keywords protect endprotect protected endprotected delay_mode_distributed delay_mode_path
+    delay_mode_unit delay_mode_zero default_decay_time default_trireg_strength
+'''.split())
+
+
+class Macro(NamedTuple):
+    name: str
+    params: Optional[Tuple[Tuple[str, Optional[str]], ...]]   # (name, default) per formal argument, None without ()
+    body: str
+
+
+class Diagnostic(NamedTuple):
+    file: str
+    line: int
+    message: str
+
+
+class LineMap(NamedTuple):
+    """Output line -> source location, as segments of consecutive lines from one file."""
+    starts: List[int]                       # first output line of each segment, ascending
+    segments: List[Tuple[str, int]]         # (source file, its line at the segment start)
+
+    def origin(self, line: int) -> Tuple[str, int]:
+        """(source file, line) an output line comes from."""
+        i = bisect_right(self.starts, line) - 1
+        if i < 0:
+            return '', line
+        path, first = self.segments[i]
+        return path, first + line - self.starts[i]
+
+
+class Preprocessed(NamedTuple):
+    text: str                   # code without inactive branches, macros expanded, includes inlined
+    line_map: LineMap
+    macros: Dict[str, Macro]    # macros defined at the end of the file, incoming ones included
+    includes: List[str]         # included files, resolved, in order
+    diagnostics: List[Diagnostic]
+
+
+def parse_defines(defines: Dict[str, str]) -> Dict[str, Macro]:
+    """Macros of +define+NAME=VALUE entries (filelist.Filelist.defines); a bare NAME expands to ''."""
+    return {name: Macro(name, None, value) for name, value in defines.items()}
+
+
+def define_set_key(macros: Dict[str, Macro], incdirs: Sequence[str] = ()) -> str:
+    """Digest of the incoming macros and include directories: what a file's preprocessed output depends on besides its text."""
+    data = marshal.dumps((VERSION, sorted((name, macro.params, macro.body) for name, macro in macros.items()), list(incdirs)))
+    return blake2b(data, digest_size=16).hexdigest()
+
+
+def _split_arguments(text: str, start: int) -> Optional[Tuple[List[str], int]]:
+    """Actual arguments of a macro call whose '(' is at text[start]; (arguments, offset after ')'), None if unbalanced."""
+    args, current, i = [], start + 1, start
+    closing = {')': '(', ']': '[', '}': '{'}
+    stack = []
+    while i < len(text):
+        char = text[i]
+        if char == '"':
+            i = _STRING_RE.match(text, i).end()
+            continue
+        if char in '([{':
+            stack.append(char)
+        elif char in closing:
+            if not stack or stack[-1] != closing[char]:
+                return None
+            stack.pop()
+            if not stack:
+                args.append(text[current:i])
+                return args, i + 1
+        elif char == ',' and len(stack) == 1:
+            args.append(text[current:i])
+            current = i + 1
+        i += 1
+    return None
+
+
+def _parse_params(text: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """Formal arguments of a `define from the text between its parentheses."""
+    params = []
+    for param in _split_arguments(f'({text})', 0)[0] if text.strip() else []:
+        name, equals, default = param.partition('=')
+        params.append((name.strip(), default.strip() if equals else None))
+    return tuple(params)
+
+
+class Preprocessor:
+    """
+    SystemVerilog preprocessor: `define/`undef, `ifdef/`ifndef/`elsif/`else/`endif,
+    `include through the include directories, and macro expansion with arguments,
+    defaults, `` pasting and `" strings.
+
+    The output keeps the lines of each file where they were: inactive branches and
+    directives become empty lines, and a macro call over several lines is followed by
+    the newlines it replaced. Only included files shift lines, which the LineMap of the
+    result records. Comments and other compiler directives (`timescale, ...) are kept.
+
+    Args:
+        incdirs: +incdir+ directories, searched after the directory of the including file
+        macros: Incoming macros, e.g. parse_defines() of the filelist +define+ entries
+    """
+
+    def __init__(self, incdirs: Sequence[str] = (), macros: Optional[Dict[str, Macro]] = None):
+        self.incdirs = list(incdirs)
+        self.initial = dict(macros or {})
+
+    def preprocess(self, path: str, text: Optional[str] = None) -> Preprocessed:
+        """Preprocess one file (read from path unless text is given) starting from the incoming macros."""
+        self.macros = dict(self.initial)
+        self.pieces: List[str] = []
+        self.line = 1                   # output line the next piece starts on
+        self.starts, self.segments = [], []
+        self.includes, self.diagnostics = [], []
+        self.missing: List[str] = []   # include candidates looked up and not found
+        self.cwd_searched = False       # an include lookup reached the working directory
+        path = os.path.abspath(path)
+        self._file(path, read_source(path) if text is None else text, 0)
+        return Preprocessed(''.join(self.pieces), LineMap(self.starts, self.segments), self.macros,
+                            self.includes, self.diagnostics)
+
+    def _emit(self, text: str) -> None:
+        if text:
+            self.pieces.append(text)
+            self.line += text.count('\n')
+
+    def _segment(self, path: str, line: int) -> None:
+        if self.starts and self.starts[-1] == self.line:
+            self.segments[-1] = (path, line)
+        else:
+            self.starts.append(self.line)
+            self.segments.append((path, line))
+
+    def _error(self, path: str, text: str, offset: int, message: str) -> None:
+        self.diagnostics.append(Diagnostic(path, text.count('\n', 0, offset) + 1, message))
+
+    def _resolve(self, name: str, including: str) -> Optional[str]:
+        """First existing candidate; the ones looked up before it are kept in self.missing for the cache."""
+        if os.path.isabs(name):
+            candidates = [name]
+        else:
+            directories = [os.path.dirname(including)] + self.incdirs + [os.getcwd()]
+            candidates = [os.path.normpath(os.path.join(directory, name)) for directory in directories]
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                break
+            self.missing.append(candidate)
+        else:
+            candidate = None
+        self.cwd_searched |= not os.path.isabs(name) and candidate in (None, candidates[-1])
+        return candidate
+
+    def _file(self, path: str, text: str, depth: int) -> None:
+        self._segment(path, 1)
+        stack = []          # per open `ifdef: [enclosing active, a branch was taken, this branch active]
+        active = True
+        pos = 0
+        while True:
+            m = _SCAN_RE.search(text, pos)
+            if m is None:
+                break
+            between = text[pos:m.start()]
+            self._emit(between if active else '\n' * between.count('\n'))
+            pos = m.end()
+            directive = m.group(1)
+            if directive is None:
+                self._emit(m.group() if active else '\n' * m.group().count('\n'))
+                continue
+
+            if directive in _CONDITIONALS:
+                name = None
+                if directive != 'else' and directive != 'endif':
+                    n = _NAME_RE.match(text, pos)
+                    if n is None:
+                        self._error(path, text, m.start(), f'`{directive} without a macro name')
+                        continue
+                    name, pos = n.group(1), n.end()
+                if directive in ('ifdef', 'ifndef'):
+                    taken = (name in self.macros) == (directive == 'ifdef')
+                    stack.append([active, taken, active and taken])
+                elif not stack:
+                    self._error(path, text, m.start(), f'`{directive} without `ifdef')
+                    continue
+                elif directive == 'endif':
+                    stack.pop()
+                else:
+                    entry = stack[-1]
+                    branch = not entry[1] and (directive == 'else' or name in self.macros)
+                    entry[1] = entry[1] or branch
+                    entry[2] = entry[0] and branch
+                active = stack[-1][2] if stack else True
+                continue
+            if not active:
+                continue
+
+            if directive == 'define':
+                end = logical_line_end(text, pos)
+                self._define(path, text, m.start(), pos, end)
+                self._emit('\n' * text.count('\n', pos, end))
+                pos = end
+            elif directive == 'undef':
+                n = _NAME_RE.match(text, pos)
+                if n is None:
+                    self._error(path, text, m.start(), '`undef without a macro name')
+                else:
+                    self.macros.pop(n.group(1), None)
+                    pos = n.end()
+            elif directive == 'undefineall':
+                self.macros.clear()
+            elif directive == 'include':
+                pos = self._include(path, text, m.start(), pos, depth)
+            elif directive == '__FILE__':
+                self._emit(f'"{path}"')
+            elif directive == '__LINE__':
+                self._emit(str(text.count('\n', 0, m.start()) + 1))
+            elif directive in self.macros:
+                expansion, end = self._call(path, text, m.start(), pos, set())
+                if expansion is None:
+                    self._emit(m.group())
+                else:
+                    self._emit(expansion + '\n' * text.count('\n', pos, end))
+                    pos = end
+            else:
+                if directive not in _TOOL_DIRECTIVES:
+                    self._error(path, text, m.start(), f'`{directive} is not defined')
+                self._emit(m.group())
+        tail = text[pos:]
+        self._emit(tail if active else '\n' * tail.count('\n'))
+        if stack:
+            self._error(path, text, len(text), f'{len(stack)} `ifdef not closed by `endif')
+
+    def _define(self, path: str, text: str, start: int, pos: int, end: int) -> None:
+        n = _NAME_RE.match(text, pos, end)
+        if n is None:
+            self._error(path, text, start, '`define without a macro name')
+            return
+        name, pos = n.group(1), n.end()
+        params = None
+        if pos < end and text[pos] == '(':
+            split = _split_arguments(text[:end], pos)
+            if split is None:
+                self._error(path, text, start, f'`define {name}: unbalanced argument list')
+                return
+            params = _parse_params(text[pos + 1:split[1] - 1])
+            pos = split[1]
+        body = _NEWLINES_RE.sub(' ', strip_comments(text[pos:end])).strip()
+        self.macros[name] = Macro(name, params, body)
+
+    def _call(self, path: str, text: str, start: int, pos: int, expanding: set) -> Tuple[Optional[str], int]:
+        """Expansion of the macro used at text[start:pos] and the offset after its arguments; (None, pos) on error."""
+        macro = self.macros[text[start + 1:pos]]
+        if macro.name in expanding:
+            self._error(path, text, start, f'`{macro.name} expands to itself')
+            return None, pos
+        values = {}
+        if macro.params is not None:
+            i = pos
+            while i < len(text) and text[i] in ' \t\r\n':
+                i += 1
+            split = _split_arguments(text, i) if i < len(text) and text[i] == '(' else None
+            if split is None:
+                self._error(path, text, start, f'`{macro.name} needs its arguments in parentheses')
+                return None, pos
+            args, pos = split
+            if args == [''] and not macro.params:
+                args = []
+            if len(args) > len(macro.params):
+                self._error(path, text, start, f'`{macro.name} takes {len(macro.params)} arguments, got {len(args)}')
+                return None, pos
+            for (param, default), value in zip(macro.params, args + [None] * (len(macro.params) - len(args))):
+                value = ' '.join(value.split()) if value is not None else ''
+                if not value:
+                    if default is None and value is None:
+                        self._error(path, text, start, f'`{macro.name}: no value for argument {param}')
+                        return None, pos
+                    value = default or ''
+                values[param] = value
+
+        def substitute(m):
+            token = m.group()
+            if token == '``':
+                return ''
+            if token == '`"':
+                return '"'
+            if token == '`\\`"':
+                return '\\"'
+            return values.get(token, token)
+        body = _BODY_RE.sub(substitute, macro.body) if values or '`' in macro.body else macro.body
+        return self._rescan(path, text, start, body, expanding | {macro.name}), pos
+
+    def _rescan(self, path: str, text: str, start: int, body: str, expanding: set) -> str:
+        """Macro uses inside an expansion, expanded in turn."""
+        if '`' not in body:
+            return body
+        pieces, pos, search = [], 0, 0
+        while True:
+            m = _SCAN_RE.search(body, search)
+            if m is None:
+                break
+            search = m.end()
+            name = m.group(1)
+            if name is None:
+                continue
+            if name == '__FILE__':
+                value, end = f'"{path}"', m.end()
+            elif name == '__LINE__':
+                value, end = str(text.count('\n', 0, start) + 1), m.end()
+            elif name in self.macros:
+                value, end = self._call(path, body, m.start(), m.end(), expanding)
+                if value is None:
+                    continue
+            else:
+                continue
+            pieces.append(body[pos:m.start()])
+            pieces.append(value)
+            pos = search = end
+        pieces.append(body[pos:])
+        return ''.join(pieces)
+
+    def _include(self, path: str, text: str, start: int, pos: int, depth: int) -> int:
+        end = text.find('\n', pos)
+        line_end = len(text) if end == -1 else end
+        argument = text[pos:line_end]
+        by_macro = argument.lstrip(' \t').startswith('`')
+        if by_macro:
+            argument = self._rescan(path, text, start, argument, set())     # `include `FILE_MACRO
+        n = _INCLUDE_ARG_RE.match(argument)
+        if n is None:
+            self._error(path, text, start, '`include without a "file" or <file> name')
+            return pos
+        name = n.group(1) if n.group(1) is not None else n.group(2)
+        consumed = line_end if by_macro else pos + n.end()
+        included = self._resolve(name, path)
+        if included is None:
+            self._error(path, text, start, f'`include "{name}" not found in the including directory or +incdir+')
+            return consumed
+        if depth >= MAX_INCLUDE_DEPTH:
+            self._error(path, text, start, f'`include "{name}" nested more than {MAX_INCLUDE_DEPTH} deep (recursive?)')
+            return consumed
+        try:
+            content = read_source(included)
+        except OSError as e:
+            self._error(path, text, start, f'`include "{name}": {e}')
+            return consumed
+        self.includes.append(included)
+        if self.pieces and not self.pieces[-1].endswith('\n'):
+            self._emit('\n')
+        self._file(included, content, depth + 1)
+        if not content.endswith('\n'):
+            self._emit('\n')
+        self._segment(path, text.count('\n', 0, consumed) + 1)
+        return consumed
+
+
+def _dependencies(result: Preprocessed, path: str, preprocessor: Preprocessor) -> tuple:
+    """
+    What a cached result stays valid for: (files read with their size and mtime, include
+    candidates that must still be missing, working directory if an include lookup reached it).
+    A header created later or a new file in an earlier +incdir+ shadowing the one used
+    shows up as a missing candidate that now exists.
+    """
+    files = []
+    for dep in dict.fromkeys([path] + result.includes):
+        stat = os.stat(dep)
+        files.append((dep, stat.st_size, stat.st_mtime_ns))
+    return files, list(dict.fromkeys(preprocessor.missing)), os.getcwd() if preprocessor.cwd_searched else ''
+
+
+def _pack_result(result: Preprocessed) -> bytes:
+    return zlib.compress(marshal.dumps((result.text, result.line_map.starts, result.line_map.segments,
+                  [tuple(macro) for macro in result.macros.values()], result.includes,
+                  [tuple(diagnostic) for diagnostic in result.diagnostics])), 1)
+
+
+def _unpack_result(data: bytes) -> Preprocessed:
+    text, starts, segments, macros, includes, diagnostics = marshal.loads(zlib.decompress(data))
+    return Preprocessed(text, LineMap(list(starts), [tuple(segment) for segment in segments]),
+                        {macro[0]: Macro(*macro) for macro in macros}, list(includes),
+                        [Diagnostic(*diagnostic) for diagnostic in diagnostics])
+
+
+def _preprocess_job(path: str, incdirs: Sequence[str], macros: Dict[str, Macro]) -> Optional[Tuple[bytes, list]]:
+    """Preprocess one file in a worker process; (packed result, dependencies), None if unreadable."""
+    try:
+        preprocessor = Preprocessor(incdirs, macros)
+        result = preprocessor.preprocess(path)
+        return _pack_result(result), _dependencies(result, path, preprocessor)
+    except OSError:
+        return None
+
+
+def _cached(cache: SourceCache, path: str, key: str) -> Optional[Preprocessed]:
+    row = cache.conn.execute('SELECT deps, data FROM preprocessed WHERE path = ? AND key = ?', (path, key)).fetchone()
+    if row is None:
+        return None
+    files, missing, cwd = marshal.loads(row[0])
+    if cwd and cwd != os.getcwd():
+        return None
+    for dep, size, mtime_ns in files:
+        try:
+            stat = os.stat(dep)
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+            return None
+    if any(os.path.isfile(candidate) for candidate in missing):
+        return None
+    return _unpack_result(row[1])
+
+
+def _store(cache: SourceCache, path: str, key: str, packed: bytes, deps: list) -> None:
+    with cache.conn:
+        cache.conn.execute('INSERT OR REPLACE INTO preprocessed (path, key, deps, data) VALUES (?, ?, ?, ?)',
+                           (path, key, marshal.dumps(deps), packed))
+
+
+def preprocess_files(
+    files: Sequence[str],
+    incdirs: Sequence[str] = (),
+    defines: Optional[Dict[str, str]] = None,
+    cache: Optional[SourceCache] = None,
+    executor=None,
+    chained: bool = False
+) -> List[Optional[Preprocessed]]:
+    """
+    Preprocess the sources of a filelist.
+
+    Results are cached per (file, incoming define set): a cached result is reused while
+    the file and every file it included keep their size and mtime, and no include
+    candidate that was missing (an unresolved `include, or a directory searched before
+    the one it was found in) has appeared.
+
+    Args:
+        files: Source files, in compile order
+        incdirs: +incdir+ directories
+        defines: +define+ entries, see filelist.Filelist.defines
+        cache: sv_cache.SourceCache whose database keeps the results
+        executor: Process pool for the files not cached (ignored when chained)
+        chained: Let the macros defined by a file reach the files after it, like one
+            compilation unit (vlog -mfcu); the files are then preprocessed in order
+
+    Returns:
+        list: Preprocessed per file, in the order of files (None for unreadable files)
+    """
+    files = [os.path.abspath(path) for path in files]
+    macros = parse_defines(defines or {})
+    if chained:
+        results = []
+        for path in files:
+            key = define_set_key(macros, incdirs)
+            result = _cached(cache, path, key) if cache is not None else None
+            if result is None:
+                outcome = _preprocess_job(path, incdirs, macros)
+                if outcome is not None:
+                    result = _unpack_result(outcome[0])
+                    if cache is not None:
+                        _store(cache, path, key, *outcome)
+            if result is not None:
+                macros = result.macros
+            results.append(result)
+        return results
+
+    key = define_set_key(macros, incdirs)
+    results = {path: _cached(cache, path, key) if cache is not None else None for path in files}
+    jobs = [path for path in dict.fromkeys(files) if results[path] is None]
+    if executor is not None and jobs:
+        outcomes = executor.map(_preprocess_job, jobs, [incdirs] * len(jobs), [macros] * len(jobs), chunksize=max(1, len(jobs) // 64))
+    else:
+        outcomes = (_preprocess_job(path, incdirs, macros) for path in jobs)
+    for path, outcome in zip(jobs, outcomes):
+        if outcome is None:
+            continue
+        results[path] = _unpack_result(outcome[0])
+        if cache is not None:
+            _store(cache, path, key, *outcome)
+    return [results[path] for path in files]
+
+
+def _analyze_text(text: str, path: str, names: Sequence[str]) -> Dict[str, object]:
+    """Artifacts of one preprocessed text; runs in worker processes."""
+    source = SourceText(text, path)
+    return {name: ANALYZERS[name][1](source) for name in names}
+
+
+def preprocessed_artifacts(
+    files: Sequence[str],
+    names: Sequence[str],
+    incdirs: Sequence[str] = (),
+    defines: Optional[Dict[str, str]] = None,
+    cache: Optional[SourceCache] = None,
+    executor=None,
+    chunk_size: int = 16
+) -> List[Optional[Tuple[Preprocessed, Dict[str, object]]]]:
+    """
+    sv_cache artifacts of the preprocessed text of each file, so only the active
+    `ifdef branches of the filelist +define+ set are analyzed.
+
+    The preprocessing is cached (see preprocess_files), the analysis is not: its line
+    numbers are lines of Preprocessed.text, which Preprocessed.line_map.origin() maps
+    back to (source file, line).
+
+    Returns:
+        list: (Preprocessed, {name: artifact}) per file, in the order of files (None for unreadable files)
+    """
+    results = preprocess_files(files, incdirs, defines, cache, executor)
+    present = [(os.path.abspath(path), result) for path, result in zip(files, results) if result is not None]
+    texts = [result.text for _, result in present]
+    paths = [path for path, _ in present]
+    if executor is not None and present:
+        computed = executor.map(_analyze_text, texts, paths, [names] * len(paths), chunksize=chunk_size)
+    else:
+        computed = map(_analyze_text, texts, paths, [names] * len(paths))
+    artifacts = iter(list(zip((result for _, result in present), computed)))
+    return [None if result is None else next(artifacts) for result in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Preprocess SystemVerilog sources: `ifdef branches, `include and macro expansion')
+    parser.add_argument('sources', nargs='*', help='Source files (default: the sources of the filelist)')
+    parser.add_argument('-f', '--filelist', nargs='+', default=[], help='Filelist(s) giving the sources, +incdir+ and +define+')
+    parser.add_argument('-D', '--define', nargs='+', default=[], help='Extra NAME or NAME=VALUE macros')
+    parser.add_argument('-I', '--incdir', nargs='+', default=[], help='Extra include directories')
+    parser.add_argument('-o', '--output_dir', default=None, help='Write each preprocessed file here (default: print it)')
+    parser.add_argument('-m', '--map', action='store_true', help='Prefix every output line with its source file and line')
+    parser.add_argument('--mfcu', action='store_true', help='Carry macros from each file to the next (one compilation unit)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('-db', '--cache', default=DEFAULT_CACHE, help=f'Cache database (default: {DEFAULT_CACHE})')
+    parser.add_argument('--no_cache', action='store_true', help='Preprocess every file, do not read or write the cache')
+    args = parser.parse_args()
+
+    sources = read_filelist(args.filelist) if args.filelist else None
+    files = args.sources or (sources.files if sources else [])
+    if not files:
+        parser.print_usage()
+        sys.exit(1)
+    incdirs = (sources.incdirs if sources else []) + [os.path.abspath(path) for path in args.incdir]
+    defines = dict(sources.defines) if sources else {}
+    for define in args.define:
+        name, _, value = define.partition('=')
+        defines[name] = value
+
+    start = time.perf_counter()
+    with SourceCache(None if args.no_cache else args.cache) as cache:
+        if (args.jobs or os.cpu_count() or 1) > 1 and not args.mfcu and len(files) > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                results = preprocess_files(files, incdirs, defines, cache, executor)
+        else:
+            results = preprocess_files(files, incdirs, defines, cache, chained=args.mfcu)
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for path, result in zip(files, results):
+        if result is None:
+            rows.append([path, '-', '-', 'unreadable'])
+            continue
+        rows.append([path, str(len(result.includes)), str(len(result.macros)), str(len(result.diagnostics))])
+        for diagnostic in result.diagnostics:
+            print(f"{diagnostic.file}:{diagnostic.line}: {diagnostic.message}", file=sys.stderr)
+        lines = result.text.split('\n')
+        if args.map:
+            lines = ['{}:{}: {}'.format(*result.line_map.origin(number), line) for number, line in enumerate(lines, 1)]
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            with open(os.path.join(args.output_dir, os.path.basename(path)), 'w') as f:
+                f.write('\n'.join(lines))
+        elif len(files) == 1:
+            sys.stdout.write('\n'.join(lines))
+    if args.output_dir or len(files) > 1:
+        rows.append([f'Total ({elapsed:.2f} s)', str(sum(len(r.includes) for r in results if r)), '',
+                     str(sum(len(r.diagnostics) for r in results if r))])
+        print(StringUtil().table(['Source', 'Includes', 'Macros', 'Diagnostics'], rows, style='round',
+                                 align=['left', 'right', 'right', 'right']))
+    if any(result is None or result.diagnostics for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
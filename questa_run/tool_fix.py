@@ -24,4 +24,9 @@ class ToolFix:
         subparser.add_argument('-f','--file',help='filelist',action=Extend,nargs='*',required=False,type=str,default=[])
         subparser.add_argument('-r','--report',help='report file with checks',required=False,type=str)
         subparser.add_argument('-mm','--multiple_module',help='fix source file having multiple module defined',required=False,action='store_true')
+        subparser.add_argument('-par','--parentheses',help='insert the parentheses of the parentheses_missing violations of the report (-r)',required=False,action='store_true')
+        subparser.add_argument('-od','--output_dir',help='directory of the files split per module (default: next to each source)',required=False,type=str,default=None)
+        subparser.add_argument('-j','--jobs',help='worker processes (default: one per CPU)',required=False,type=int,default=None)
+        subparser.add_argument('-rm','--remove_split',help='with -mm, delete each split source whose name matches none of its modules',required=False,action='store_true')
+        subparser.add_argument('-dry','--dry_run',help='only list what would be fixed',required=False,action='store_true')
         subparser.set_defaults(func=lint_func.lint_fix_handling)
\ No newline at end of file
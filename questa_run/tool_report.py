@@ -24,7 +24,15 @@ class ToolReport:
         subparser.add_argument('-h','--help', action='help',default=argparse.SUPPRESS,help=argparse.SUPPRESS)
         subparser.add_argument('-t','--top',help='top module. Use as identifier',required=True, type=str, default=None)
         subparser.add_argument('-f','--file',help='full report file',required=False, type=str, default='')
-        subparser.add_argument('-regexp','--regexp',help="define a regular expression",required=False, type=str, default='')
+        subparser.add_argument('-regexp','--regexp',help="only show violations matching any of these regular expressions",action=Extend,nargs='*',required=False,type=str,default=[])
+        subparser.add_argument('-rf','--regexp_file',help="file with one -regexp pattern per line",required=False,type=str,default='')
+        subparser.add_argument('-lit','--literal',help="treat -regexp patterns as plain strings",action='store_true',required=False)
+        subparser.add_argument('-ic','--ignore_case',help="case insensitive -regexp matching",action='store_true',required=False)
         subparser.add_argument('-sbm','--split_by_module',help='split the full lint report into different files based on modules',action='store_true',required=False)
         subparser.add_argument('-sbc','--split_by_checks',help='split the full lint report into individual files based on checks',action='store_true',required=False)
-        subparser.set_defaults(func=lint_func.lint_fix_handling)
\ No newline at end of file
+        subparser.add_argument('-gb','--group_by',help='count violations of the JSON/CSV report grouped by a field',required=False,type=str,default='',choices=['','check','module','file','severity','status'])
+        subparser.add_argument('-q','--query',help='filter violations as <field>=<value> (glob allowed)',action=Extend,nargs='*',required=False,type=str,default=[])
+        subparser.add_argument('-n','--limit',help='only show the N largest groups',required=False,type=int,default=0)
+        subparser.add_argument('-diff','--diff',help='reference JSON/CSV report to diff the current report against (new/fixed/persisting)',required=False,type=str,default='')
+        subparser.add_argument('-tr','--trend',help='show per-check violation trend of the last N runs (default 20) from the run history database',required=False,type=int,nargs='?',const=20,default=0)
+        subparser.set_defaults(func=lint_func.lint_report_handling)
\ No newline at end of file
@@ -0,0 +1,30 @@
+from argsparser import Extend
+from waiver_bulk import ACTIONS, DEFAULT_GLOB
+
+import lint_func
+
+class ToolWaiver:
+
+    def __init__(self, tool,path_dict, cwd, git_root,logger,subparser):
+        self._tool = tool
+        self._templates_dir = f"{path_dict['questa_run_dir']}/templates"
+        self._cwd = cwd
+        self._tool_run_dir = path_dict['current_dir'].replace(path_dict['git_root'],r"${CompPath}")
+        self._git_root = path_dict['git_root']
+        # Initialize logger
+        self.logger = logger
+        self.add_subcommands(subparser)
+        
+    def add_subcommands(self,subparser):
+        subparser.add_argument('waiver_action',help='waiver maintenance action',choices=ACTIONS + ('stale', 'hits'))
+        subparser.add_argument('-wf','--waiver_files',help=f'waiver files or globs, relative to the git root (default: {DEFAULT_GLOB})',action=Extend,nargs='*',required=False,type=str,default=[])
+        subparser.add_argument('-r','--report',help='lint JSON/CSV report(s) to match the waivers against, each paired with the <top>_lint_waivers.tcl of the top its name starts with (prune-unused, hits)',action=Extend,nargs='*',required=False,type=str,default=[])
+        subparser.add_argument('-sr','--status_report',help='qverify status report(s) with per-waiver counts, instead of -r (hits)',action=Extend,nargs='*',required=False,type=str,default=[])
+        subparser.add_argument('-fl','--source_filelist',help='filelist(s) of the design, e.g. the filelist.f of the lint run, to resolve -file names (stale)',action=Extend,nargs='*',required=False,type=str,default=[])
+        subparser.add_argument('-ck','--checks',help='checks to group into their own file, every check if not given (group)',action=Extend,nargs='*',required=False,type=str,default=[])
+        subparser.add_argument('-od','--output_dir',help="output directory, or the merged file for merge",required=False,type=str,default=None)
+        subparser.add_argument('-ip','--in_place',help="rewrite the waiver files instead of writing .cleaned/.pruned/.ordered copies",action='store_true',required=False)
+        subparser.add_argument('-qt','--quarantine',help="move the zero-hit directives into <name>_quarantine.tcl, appended to what it already holds (hits)",action='store_true',required=False)
+        subparser.add_argument('-j','--jobs',help='worker processes (default: one per CPU)',required=False,type=int,default=None)
+        subparser.add_argument('-dry','--dry_run',help='only report, do not write any file',action='store_true',required=False)
+        subparser.set_defaults(func=lint_func.lint_waiver_handling,waiver_root=self._git_root or self._cwd)
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+from subprocess import check_output, CalledProcessError, DEVNULL
+from typing import Dict, List, Optional, Tuple, Union
+from string_util import StringUtil
+from violation_store import ViolationStore
+
+DEFAULT_DB = os.getenv('QSTRUN_HISTORY_DB', os.path.join(os.path.expanduser('~'), '.questa_run', 'history.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    top         TEXT NOT NULL,
+    tool        TEXT NOT NULL,
+    run_tag     TEXT NOT NULL,
+    git_commit  TEXT,
+    created     REAL NOT NULL,
+    workdir     TEXT,
+    UNIQUE (top, tool, run_tag)
+);
+CREATE TABLE IF NOT EXISTS violations (
+    run_id      INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    check_name  TEXT NOT NULL,
+    module      TEXT,
+    file        TEXT,
+    line        INTEGER,
+    severity    TEXT,
+    object      TEXT,
+    message     TEXT,
+    status      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_top_tool ON runs(top, tool, created);
+CREATE INDEX IF NOT EXISTS idx_violations_run ON violations(run_id);
+CREATE INDEX IF NOT EXISTS idx_violations_check ON violations(check_name);
+CREATE INDEX IF NOT EXISTS idx_violations_module ON violations(module);
+CREATE INDEX IF NOT EXISTS idx_violations_file ON violations(file);
+"""
+
+# Append-only per-check counts: no foreign key, so replacing or deleting a run keeps its history
+TREND_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trend (
+    run_id      INTEGER NOT NULL,
+    run_tag     TEXT NOT NULL DEFAULT '',
+    top         TEXT NOT NULL,
+    tool        TEXT NOT NULL,
+    created     REAL NOT NULL,
+    check_name  TEXT NOT NULL,
+    count       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trend_top_tool ON trend(top, tool, created);
+"""
+# PRAGMA user_version of a database migrated by migrate()
+SCHEMA_VERSION = 1
+
+
+def connect(db_path: Union[str, os.PathLike] = DEFAULT_DB) -> sqlite3.Connection:
+    """Open (and create if needed) the run history database."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=60)
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.executescript(SCHEMA)
+    if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+        migrate(conn)
+    return conn
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    """
+    Bring a database of an older schema to SCHEMA_VERSION, once.
+
+    A trend table created with ON DELETE CASCADE (or without run_tag) is rebuilt
+    without it, and the counts of runs stored before the trend table existed are
+    aggregated (backfill_trend).
+    """
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'trend'").fetchone()
+    if row is not None and ('REFERENCES' in row[0] or 'run_tag' not in row[0]):
+        with conn:
+            conn.execute('ALTER TABLE trend RENAME TO trend_old')
+            conn.execute('DROP INDEX IF EXISTS idx_trend_top_tool')
+        conn.executescript(TREND_SCHEMA)
+        with conn:
+            conn.execute(
+                "INSERT INTO trend (run_id, run_tag, top, tool, created, check_name, count) "
+                "SELECT t.run_id, COALESCE(r.run_tag, ''), t.top, t.tool, t.created, t.check_name, t.count "
+                "FROM trend_old t LEFT JOIN runs r USING (run_id)"
+            )
+            conn.execute('DROP TABLE trend_old')
+    else:
+        conn.executescript(TREND_SCHEMA)
+    backfill_trend(conn)
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+
+def backfill_trend(conn: sqlite3.Connection) -> None:
+    """Aggregate per-check counts for runs stored before the trend table existed."""
+    with conn:
+        conn.execute(
+            'INSERT INTO trend (run_id, run_tag, top, tool, created, check_name, count) '
+            'SELECT r.run_id, r.run_tag, r.top, r.tool, r.created, v.check_name, COUNT(*) FROM runs r JOIN violations v USING (run_id) '
+            'WHERE r.run_id NOT IN (SELECT DISTINCT run_id FROM trend) GROUP BY r.run_id, v.check_name'
+        )
+
+
+def get_git_commit(path: Union[str, os.PathLike] = '.') -> str:
+    """Return the HEAD commit of the repo containing path, or '' outside git."""
+    try:
+        return check_output(['git', '-C', str(path), 'rev-parse', 'HEAD'], stderr=DEVNULL, text=True).strip()
+    except (CalledProcessError, FileNotFoundError, NotADirectoryError):
+        return ''
+
+
+def ingest(
+    conn: sqlite3.Connection,
+    reports: List[Union[str, os.PathLike]],
+    top: str,
+    tool: str,
+    run_tag: Optional[str] = None,
+    git_commit: Optional[str] = None,
+    workdir: str = ''
+) -> Optional[int]:
+    """
+    Store the violations of one finished run.
+
+    All reports are loaded through ViolationStore and written with a single executemany
+    inside one transaction, together with the per-check counts of the trend table.
+    Re-ingesting the same (top, tool, run_tag) replaces the violations of that run; the
+    trend rows of the replaced run are kept (the trend table is append-only).
+
+    Args:
+        conn: Connection from connect()
+        reports: lint JSON/CSV, cdc/rdc crossings CSV or SpyGlass moresimple.csv files
+        top: Top module of the run
+        tool: lint, cdc, rdc, sgcdc or vclint
+        run_tag: Run identifier (default: timestamp)
+        git_commit: Commit the run was done on (default: HEAD of the first report's repo)
+        workdir: Work directory of the run, kept for reference
+
+    Returns:
+        int: run_id of the stored run, None if no report could be loaded (nothing is
+            stored then, so a failed tool run does not show up as a clean latest run)
+    """
+    store = ViolationStore()
+    loaded = 0
+    for report in reports:
+        if not os.path.isfile(report):
+            print(f"Warning: report not found, skipped: {report}")
+            continue
+        try:
+            store.load_file(report, tool=tool)
+        except (OSError, ValueError, UnicodeError) as e:
+            print(f"Warning: could not read report {report}: {e}")
+            continue
+        loaded += 1
+    if not loaded:
+        print(f"Error: no report of the {tool} run of {top} could be loaded, run not stored")
+        return None
+
+    run_tag = run_tag or time.strftime('%Y%m%d_%H%M%S')
+    if git_commit is None:
+        git_commit = get_git_commit(os.path.dirname(os.path.abspath(reports[0])) if reports else '.')
+
+    created = time.time()
+    with conn:
+        conn.execute('DELETE FROM runs WHERE top = ? AND tool = ? AND run_tag = ?', (top, tool, run_tag))
+        cursor = conn.execute(
+            'INSERT INTO runs (top, tool, run_tag, git_commit, created, workdir) VALUES (?, ?, ?, ?, ?, ?)',
+            (top, tool, run_tag, git_commit, created, workdir)
+        )
+        run_id = cursor.lastrowid
+        conn.executemany(
+            'INSERT INTO violations (run_id, check_name, module, file, line, severity, object, message, status) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            ((run_id, v.check, v.module, v.file, v.line, v.severity, v.object, v.message, v.status) for v in store)
+        )
+        conn.executemany(
+            'INSERT INTO trend (run_id, run_tag, top, tool, created, check_name, count) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((run_id, run_tag, top, tool, created, check, count) for check, count in store.group_by('check').items())
+        )
+    print(f"Stored {len(store)} {tool} violations of {top} as run {run_tag} (id {run_id})")
+    return run_id
+
+
+def latest_runs(conn: sqlite3.Connection, tool: Optional[str] = None) -> List[int]:
+    """Return the run_id of the most recent run of every (top, tool)."""
+    sql = 'SELECT MAX(run_id) FROM runs'
+    params = ()
+    if tool:
+        sql += ' WHERE tool = ?'
+        params = (tool,)
+    sql += ' GROUP BY top, tool'
+    return [row[0] for row in conn.execute(sql, params)]
+
+
+def top_checks(conn: sqlite3.Connection, limit: int = 20, tool: Optional[str] = None) -> List[tuple]:
+    """
+    Most frequent checks across the latest run of every block.
+
+    Returns:
+        list: (check_name, violations, number_of_tops) tuples, largest first
+    """
+    run_ids = latest_runs(conn, tool)
+    if not run_ids:
+        return []
+    marks = ','.join('?' * len(run_ids))
+    return conn.execute(
+        f'SELECT v.check_name, COUNT(*), COUNT(DISTINCT r.top) FROM violations v JOIN runs r USING (run_id) '
+        f'WHERE v.run_id IN ({marks}) GROUP BY v.check_name ORDER BY 2 DESC LIMIT ?',
+        (*run_ids, limit)
+    ).fetchall()
+
+
+def trend(conn: sqlite3.Connection, top: str, tool: str = 'lint', runs: int = 20) -> Tuple[List[tuple], Dict[str, List[int]]]:
+    """
+    Per-check violation counts of the last runs of a top.
+
+    Only the aggregated trend table is read, never the violations of old runs. Runs
+    that were replaced or deleted keep their place through their trend rows.
+
+    Args:
+        conn: Connection from connect()
+        top: Top module
+        tool: Tool of the runs
+        runs: Number of most recent runs
+
+    Returns:
+        tuple: ([(run_id, run_tag, created), ...] oldest first, {check_name: [count per run]})
+    """
+    run_rows = conn.execute(
+        'SELECT run_id, run_tag, created FROM runs WHERE top = ? AND tool = ? '
+        'UNION SELECT DISTINCT run_id, run_tag, created FROM trend WHERE top = ? AND tool = ? '
+        'ORDER BY created DESC LIMIT ?',
+        (top, tool, top, tool, runs)
+    ).fetchall()[::-1]
+    position = {run_id: i for i, (run_id, _, _) in enumerate(run_rows)}
+    series = {}
+    if run_rows:
+        marks = ','.join('?' * len(run_rows))
+        for run_id, check_name, count in conn.execute(
+            f'SELECT run_id, check_name, count FROM trend WHERE run_id IN ({marks})', tuple(position)
+        ):
+            series.setdefault(check_name, [0] * len(run_rows))[position[run_id]] = count
+    return run_rows, series
+
+
+def trend_table(run_rows: List[tuple], series: Dict[str, List[int]], limit: int = 0) -> str:
+    """
+    Render the output of trend() as a table with a sparkline and the delta to the previous run.
+
+    Checks are sorted by their count in the latest run; limit keeps only the largest ones.
+    """
+    if not run_rows:
+        return 'No runs recorded.'
+    su = StringUtil()
+
+    def delta(counts):
+        change = counts[-1] - counts[-2] if len(counts) > 1 else 0
+        return f'{change:+d}' if change else '0'
+
+    checks = sorted(series, key=lambda check: (-series[check][-1], check))
+    rows = [[check, su.sparkline(series[check]), str(series[check][0]), str(series[check][-1]), delta(series[check])]
+            for check in checks[:limit or None]]
+    totals = [sum(counts) for counts in zip(*series.values())] if series else [0] * len(run_rows)
+    rows.append(['Total', su.sparkline(totals), str(totals[0]), str(totals[-1]), delta(totals)])
+
+    first, last = (time.strftime('%Y-%m-%d', time.localtime(run_rows[i][2])) for i in (0, -1))
+    title = f'{len(run_rows)} runs from {first} ({run_rows[0][1]}) to {last} ({run_rows[-1][1]})'
+    return title + '\n' + su.table(['Check', 'Trend', 'First', 'Last', 'Delta'], rows, style='round',
+                                   align=['left', 'left', 'right', 'right', 'right'])
+
+
+def first_seen(
+    conn: sqlite3.Connection,
+    check: str,
+    module: Optional[str] = None,
+    obj: Optional[str] = None,
+    top: Optional[str] = None
+) -> Optional[tuple]:
+    """
+    First run in which a violation appeared.
+
+    module/obj/top accept SQL LIKE patterns ('%' and '_').
+
+    Returns:
+        tuple: (top, tool, run_tag, git_commit, created) or None if never seen
+    """
+    sql = ('SELECT r.top, r.tool, r.run_tag, r.git_commit, r.created FROM violations v JOIN runs r USING (run_id) '
+           'WHERE v.check_name = ?')
+    params = [check]
+    for column, value in (('v.module', module), ('v.object', obj), ('r.top', top)):
+        if value:
+            sql += f' AND {column} LIKE ?'
+            params.append(value)
+    sql += ' ORDER BY r.created LIMIT 1'
+    return conn.execute(sql, params).fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-run lint/CDC/RDC violation history')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'History database (default: {DEFAULT_DB})')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ingest', help='Store the reports of a finished run')
+    p.add_argument('-t', '--top', required=True, help='Top module')
+    p.add_argument('--tool', required=True, choices=['lint', 'cdc', 'rdc', 'sgcdc', 'vclint'])
+    p.add_argument('-r', '--report', nargs='+', required=True, help='Report files of the run')
+    p.add_argument('--run', default=None, help='Run identifier (default: timestamp)')
+    p.add_argument('--commit', default=None, help='Git commit (default: HEAD)')
+    p.add_argument('-o', '--workdir', default='', help='Work directory of the run')
+
+    p = sub.add_parser('top-checks', help='Most frequent checks across the latest run of every top')
+    p.add_argument('-n', '--limit', type=int, default=20)
+    p.add_argument('--tool', default=None)
+
+    p = sub.add_parser('trend', help='Per-check counts of the last runs of a top')
+    p.add_argument('-t', '--top', required=True)
+    p.add_argument('--tool', default='lint')
+    p.add_argument('-n', '--runs', type=int, default=20)
+
+    p = sub.add_parser('first-seen', help='First run a violation appeared in')
+    p.add_argument('-c', '--check', required=True)
+    p.add_argument('-m', '--module', default=None, help='Module (LIKE pattern)')
+    p.add_argument('--object', default=None, help='Object (LIKE pattern)')
+    p.add_argument('-t', '--top', default=None, help='Top (LIKE pattern)')
+
+    args = parser.parse_args()
+    conn = connect(args.db)
+
+    if args.command == 'ingest':
+        if ingest(conn, args.report, args.top, args.tool, args.run, args.commit, os.path.abspath(args.workdir) if args.workdir else '') is None:
+            sys.exit(1)
+    elif args.command == 'top-checks':
+        for check_name, count, tops in top_checks(conn, args.limit, args.tool):
+            print(f'{count:>10}  {check_name}  ({tops} tops)')
+    elif args.command == 'trend':
+        run_rows, series = trend(conn, args.top, args.tool, args.runs)
+        print(trend_table(run_rows, series))
+    elif args.command == 'first-seen':
+        hit = first_seen(conn, args.check, args.module, args.object, args.top)
+        if hit is None:
+            print('Never seen.')
+            sys.exit(1)
+        top, tool, run_tag, commit, created = hit
+        print(f"{top} {tool} run {run_tag} at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))} commit {commit or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+import os
+import re
+import csv
+import sys
+import argparse
+from hashlib import blake2b
+from collections import Counter
+from typing import Dict, List, Tuple, Union
+from string_util import StringUtil
+from violation_store import ViolationStore, Violation
+
+# Parts of a message that change without the violation itself changing: file references and
+# standalone numbers (line numbers). Quoted names are matched only to be kept as they are, so
+# 'req1' and 'req2' or a bit-select stay apart.
+_TEMPLATE_RE = re.compile(r"(?P<quoted>'[^']*'|\"[^\"]*\"|`[^`]*`)"
+                          r"|(?P<file>\S+\.(?:sv|svh|v|vh|vhd|vhdl)(?::\d+)?\b)"
+                          r"|(?P<number>\b\d+\b)")
+_PLACEHOLDERS = {'file': '<file>', 'number': '#'}
+
+DIFF_CLASSES = ('new', 'fixed', 'persisting')
+
+
+def message_template(message: str) -> str:
+    """
+    Reduce a violation message to its template.
+
+    File references and standalone numbers (which covers line references) are
+    replaced by placeholders so the same violation reported at another line hashes the
+    same. Digits inside names ('u_arb3') and quoted names are kept, since they tell
+    distinct violations apart.
+    """
+    if not message:
+        return ''
+    message = _TEMPLATE_RE.sub(lambda m: _PLACEHOLDERS.get(m.lastgroup, m.group()), message)
+    return ' '.join(message.split())
+
+
+def normalize_object(name: str) -> str:
+    """Strip whitespace from an object name; bit/part selects are kept ('u_a.q [3]' -> 'u_a.q[3]')."""
+    if not name:
+        return ''
+    return ''.join(name.split())
+
+
+def fingerprint(violation: Violation) -> str:
+    """
+    Stable fingerprint of a violation: check, module, normalized object and message template.
+
+    Line and file are deliberately left out so pure line shifts do not turn a
+    violation into a new/fixed pair. The digest does not depend on PYTHONHASHSEED,
+    so fingerprints can be stored and compared across runs.
+    """
+    return _digest(violation.check, violation.module, normalize_object(violation.object), message_template(violation.message))
+
+
+def _digest(check: str, module: str, obj: str, template: str) -> str:
+    key = '\0'.join((check, module, obj, template))
+    return blake2b(key.encode('utf-8', 'replace'), digest_size=8).hexdigest()
+
+
+def fingerprint_store(store: ViolationStore) -> Tuple[Counter, Dict[tuple, int]]:
+    """
+    Count the violations of a store per fingerprint key.
+
+    The key is the (check, module, normalized object, message template) tuple that
+    fingerprint() hashes. Normalization runs once per distinct interned value and the
+    per-row work is a zip over the id columns, so large reports stay linear and fast.
+
+    Returns:
+        tuple: (Counter key -> occurrences, dict key -> first row id)
+    """
+    checks = store.values('check')
+    modules = store.values('module')
+    objects = [normalize_object(name) for name in store.values('object')]
+    templates = [message_template(message) for message in store.values('message')]
+    keys = list(zip(
+        map(checks.__getitem__, store.column('check')),
+        map(modules.__getitem__, store.column('module')),
+        map(objects.__getitem__, store.column('object')),
+        map(templates.__getitem__, store.column('message')),
+    ))
+    first_row = dict(zip(reversed(keys), range(len(keys) - 1, -1, -1)))
+    return Counter(keys), first_row
+
+
+def diff_stores(reference: ViolationStore, current: ViolationStore) -> Dict[str, List[Tuple[Violation, int]]]:
+    """
+    Classify violations of two runs as new, fixed or persisting.
+
+    Fingerprints are compared as multisets: if a fingerprint occurs 3 times in the
+    reference and 5 times in the current run, 3 are persisting and 2 are new.
+
+    Returns:
+        dict: 'new'/'fixed'/'persisting' -> list of (sample violation, count)
+    """
+    ref_counts, ref_rows = fingerprint_store(reference)
+    cur_counts, cur_rows = fingerprint_store(current)
+
+    result = {name: [] for name in DIFF_CLASSES}
+    for key, count in cur_counts.items():
+        ref_count = ref_counts.get(key, 0)
+        if count > ref_count:
+            result['new'].append((current.row(cur_rows[key]), count - ref_count))
+        if ref_count:
+            result['persisting'].append((current.row(cur_rows[key]), min(count, ref_count)))
+    for key, ref_count in ref_counts.items():
+        count = cur_counts.get(key, 0)
+        if ref_count > count:
+            result['fixed'].append((reference.row(ref_rows[key]), ref_count - count))
+    for entries in result.values():
+        entries.sort(key=lambda entry: (entry[0].check, entry[0].module, entry[0].object))
+    return result
+
+
+def diff_reports(
+    reference: List[Union[str, os.PathLike]],
+    current: List[Union[str, os.PathLike]],
+    tool: str = 'lint'
+) -> Dict[str, List[Tuple[Violation, int]]]:
+    """Load two sets of report files of the same tool and diff them."""
+    return diff_stores(ViolationStore.from_file(*reference, tool=tool), ViolationStore.from_file(*current, tool=tool))
+
+
+def diff_summary(result: Dict[str, List[Tuple[Violation, int]]]) -> str:
+    """Table of new/fixed/persisting violation counts per check."""
+    per_check = {}
+    for name in DIFF_CLASSES:
+        for violation, count in result[name]:
+            per_check.setdefault(violation.check, Counter())[name] += count
+    rows = [[check] + [str(counts[name]) for name in DIFF_CLASSES] for check, counts in sorted(per_check.items())]
+    rows.append(['Total'] + [str(sum(count for _, count in result[name])) for name in DIFF_CLASSES])
+    return StringUtil().table(['Check', 'New', 'Fixed', 'Persisting'], rows, style='round', align=['left', 'right', 'right', 'right'])
+
+
+def write_diff_csv(result: Dict[str, List[Tuple[Violation, int]]], path: Union[str, os.PathLike]) -> None:
+    """Write every new/fixed/persisting entry with its fingerprint to a CSV file."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['diff', 'count', 'fingerprint', *Violation._fields])
+        for name in DIFF_CLASSES:
+            for violation, count in result[name]:
+                writer.writerow([name, count, fingerprint(violation), *violation])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff the violations of two lint/CDC/RDC runs without a tool license')
+    parser.add_argument('-r', '--reference', nargs='+', required=True, help='Report(s) of the reference run')
+    parser.add_argument('-c', '--current', nargs='+', required=True, help='Report(s) of the current run')
+    parser.add_argument('--tool', default='lint', choices=['lint', 'cdc', 'rdc', 'sgcdc', 'vclint'], help='Tool that wrote the reports')
+    parser.add_argument('-o', '--output', default='', help='Write the full diff to this CSV file')
+    parser.add_argument('-n', '--limit', type=int, default=20, help='Number of new violations listed (0: all)')
+    parser.add_argument('--fail_on_new', action='store_true', help='Exit with status 1 if there are new violations')
+    args = parser.parse_args()
+
+    result = diff_reports(args.reference, args.current, args.tool)
+    print(diff_summary(result))
+
+    new = result['new']
+    if new:
+        print(f"\nNew violations ({len(new)}):")
+        for violation, count in new[:args.limit or None]:
+            print(f"  {violation.check:<24} {violation.module:<24} {violation.object or '-'}  (x{count}) {violation.file}:{violation.line}")
+        if args.limit and len(new) > args.limit:
+            print(f"  ... {len(new) - args.limit} more")
+
+    if args.output:
+        write_diff_csv(result, args.output)
+        print(f"\nDiff written to {args.output}")
+
+    if args.fail_on_new and new:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
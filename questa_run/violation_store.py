@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+import os
+import csv
+import json
+import argparse
+from array import array
+from fnmatch import fnmatchcase
+from collections import namedtuple, Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+Violation = namedtuple('Violation', ['check', 'module', 'file', 'line', 'severity', 'object', 'message', 'status'])
+
+# Header / JSON key spellings used by the different report writers, normalised
+# (lower case, no spaces, no underscores) -> canonical Violation field
+FIELD_ALIASES = {
+    'check': 'check', 'checkname': 'check', 'rule': 'check', 'rulename': 'check', 'tag': 'check',
+    'module': 'module', 'modulename': 'module', 'designunit': 'module', 'du': 'module',
+    'file': 'file', 'filename': 'file', 'filepath': 'file', 'sourcefile': 'file',
+    'line': 'line', 'linenumber': 'line', 'lineno': 'line', 'sourceline': 'line',
+    'severity': 'severity', 'sev': 'severity', 'type': 'severity',
+    'object': 'object', 'objectname': 'object', 'signal': 'object', 'instance': 'object',
+    'message': 'message', 'msg': 'message', 'description': 'message', 'details': 'message',
+    'status': 'status', 'waiverstatus': 'status',
+}
+
+# Extra column spellings per tool, layered over FIELD_ALIASES when loading that tool's CSV
+TOOL_ALIASES = {
+    'cdc': {'violationtype': 'check', 'crossingtype': 'check', 'schemetype': 'check', 'type': 'check',
+            'destination': 'object', 'destinationsignal': 'object', 'rxsignal': 'object',
+            'destinationmodule': 'module'},
+    'rdc': {'violationtype': 'check', 'crossingtype': 'check', 'type': 'check',
+            'destination': 'object', 'destinationsignal': 'object', 'destinationmodule': 'module'},
+    'sgcdc': {'rule': 'check', 'wt': None},
+    'vclint': {'tag': 'check', 'rule': 'check'},
+}
+
+
+def normalize_field_name(name: str, aliases: Optional[dict] = None) -> Optional[str]:
+    """Map a report column / JSON key onto a canonical Violation field (or None)."""
+    if not isinstance(name, str):
+        return None
+    key = name.strip().lower().replace(' ', '').replace('_', '')
+    if aliases and key in aliases:
+        return aliases[key]
+    return FIELD_ALIASES.get(key)
+
+
+class StringPool:
+    """
+    Intern table mapping strings to small integer ids.
+
+    Every distinct string is stored once; columns in ViolationStore only hold the ids.
+    """
+    def __init__(self):
+        self._ids = {}
+        self.values = []
+
+    def intern(self, value: str) -> int:
+        """Return the id of value, adding it to the pool if it is new."""
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self._ids[value] = idx
+            self.values.append(value)
+        return idx
+
+    def lookup(self, value: str) -> Optional[int]:
+        """Return the id of value or None if it was never interned."""
+        return self._ids.get(value)
+
+    def match(self, pattern: str) -> List[int]:
+        """Return the ids of all pooled strings matching a glob pattern (*, ?, [])."""
+        if not any(c in pattern for c in '*?['):
+            idx = self._ids.get(pattern)
+            return [] if idx is None else [idx]
+        return [i for i, value in enumerate(self.values) if fnmatchcase(value, pattern)]
+
+    def __getitem__(self, idx: int) -> str:
+        return self.values[idx]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class ViolationStore:
+    """
+    Columnar in-memory store for lint/CDC/RDC violations.
+
+    Each field is kept as an array of interned string ids (array('I')), so a row costs a
+    few dozen bytes regardless of how often a check/module/file name repeats. Hash indexes
+    (value id -> array of row ids) are maintained for the INDEXED_FIELDS so that
+    filter/count/group_by on those fields never scans the whole table.
+
+    Example:
+        >> store = ViolationStore.from_file('Results/report/top_lint.json')
+        >> store.group_by('check', severity='error').most_common(5)
+        >> store.count(module='VtCpu*')
+    """
+    TEXT_FIELDS = ('check', 'module', 'file', 'severity', 'object', 'message', 'status')
+    INDEXED_FIELDS = ('check', 'module', 'file', 'severity')
+
+    def __init__(self):
+        self._pools = {field: StringPool() for field in self.TEXT_FIELDS}
+        self._cols = {field: array('I') for field in self.TEXT_FIELDS}
+        self._lines = array('i')
+        self._index = {field: {} for field in self.INDEXED_FIELDS}
+        self._key_cache = {}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def append(self, check: str, module: str = '', file: str = '', line: int = 0,
+               severity: str = '', object: str = '', message: str = '', status: str = '') -> int:
+        """Append a single violation and return its row id."""
+        row = len(self._lines)
+        for field, value in zip(self.TEXT_FIELDS, (check, module, file, severity, object, message, status)):
+            idx = self._pools[field].intern('' if value is None else str(value))
+            self._cols[field].append(idx)
+            index = self._index.get(field)
+            if index is not None:
+                posting = index.get(idx)
+                if posting is None:
+                    posting = index[idx] = array('I')
+                posting.append(row)
+        self._lines.append(_to_int(line))
+        return row
+
+    def append_record(self, record: dict) -> Optional[int]:
+        """Append a dict keyed by canonical field names. Records without a check are skipped."""
+        if not record.get('check'):
+            return None
+        return self.append(**{k: v for k, v in record.items() if k in Violation._fields})
+
+    def load_csv(self, path: Union[str, os.PathLike], defaults: Optional[dict] = None, tool: str = 'lint') -> int:
+        """
+        Load a CSV report (lint -csv, cdc/rdc crossings -csv, SpyGlass moresimple.csv).
+
+        Column headers are mapped with FIELD_ALIASES (plus TOOL_ALIASES[tool]),
+        unknown columns are ignored.
+
+        Args:
+            path: CSV report file
+            defaults: Values used for fields missing from the CSV (e.g. {'check': 'crossing'})
+            tool: Tool that wrote the report (lint, cdc, rdc, sgcdc, vclint)
+
+        Returns:
+            int: Number of violations loaded
+        """
+        loaded = 0
+        with open(path, 'r', newline='', errors='replace') as f:
+            reader = csv.reader(f)
+            header = None
+            for row in reader:
+                if not row or row[0].lstrip().startswith('#'):
+                    continue
+                if header is None:
+                    header = [normalize_field_name(col, TOOL_ALIASES.get(tool)) for col in row]
+                    continue
+                record = dict(defaults or {})
+                for field, value in zip(header, row):
+                    if field and value != '':
+                        record[field] = value.strip()
+                if self.append_record(record) is not None:
+                    loaded += 1
+        return loaded
+
+    def load_json(self, path: Union[str, os.PathLike]) -> int:
+        """
+        Load a JSON report (lint generate report -json).
+
+        The exact nesting differs between tool versions (flat list of violations or
+        violations grouped under their check/module), so the document is walked and
+        every leaf object inherits the check/module/severity of its enclosing groups.
+
+        Returns:
+            int: Number of violations loaded
+        """
+        with open(path, 'r', errors='replace') as f:
+            data = json.load(f)
+        before = len(self)
+        self._walk_json(data, {})
+        return len(self) - before
+
+    def _walk_json(self, node, context: dict) -> None:
+        if isinstance(node, list):
+            for item in node:
+                self._walk_json(item, context)
+            return
+        if not isinstance(node, dict):
+            return
+
+        local = dict(context)
+        children = []
+        items = list(node.items())
+        for key, value in items:
+            if isinstance(value, dict) and not any(isinstance(v, (list, dict)) for v in value.values()):
+                items.extend(value.items())     # flat sub-object of this node, e.g. "location": {"file", "line"}
+                continue
+            if isinstance(value, (list, dict)):
+                children.append(value)
+                continue
+            field = self._key_cache.get(key)
+            if field is None:
+                field = self._key_cache[key] = normalize_field_name(key) or ''
+            if field and value is not None:
+                local[field] = value
+
+        # A node with its own location/message is a violation even when it also holds nested ones
+        own = any(f in local and local[f] != context.get(f) for f in ('file', 'line', 'object', 'message'))
+        if own or (not children and len(local) > len(context) and any(f in local for f in ('module', 'file', 'line', 'object', 'message'))):
+            self.append_record(local)
+        for child in children:
+            self._walk_json(child, local)
+
+    def load_rpt(self, path: Union[str, os.PathLike], tool: str = 'vclint') -> int:
+        """
+        Load a text report made of 'Key : Value' blocks (VC SpyGlass report_violations -verbose).
+
+        A block ends on a separator line (dashes/equals) or an empty line. Keys are mapped
+        like CSV headers, blocks without a check are skipped.
+
+        Returns:
+            int: Number of violations loaded
+        """
+        aliases = TOOL_ALIASES.get(tool)
+        fields = {}
+        loaded = 0
+        record = {}
+        with open(path, 'r', errors='replace') as f:
+            for line in f:
+                stripped = line.strip()
+                if not stripped or stripped[0] in '-=' and stripped.strip('-=') == '':
+                    if record and self.append_record(record) is not None:
+                        loaded += 1
+                    record = {}
+                    continue
+                key, sep, value = stripped.partition(':')
+                if not sep:
+                    continue
+                field = fields.get(key)
+                if field is None:
+                    field = fields[key] = normalize_field_name(key, aliases) or ''
+                if field and field not in record:
+                    record[field] = value.strip()
+        if record and self.append_record(record) is not None:
+            loaded += 1
+        return loaded
+
+    def load_file(self, path: Union[str, os.PathLike], tool: str = 'lint') -> int:
+        """Load a .json, .csv or .rpt report and return the number of violations loaded."""
+        if str(path).endswith('.json'):
+            return self.load_json(path)
+        if str(path).endswith('.rpt'):
+            return self.load_rpt(path, tool=tool)
+        defaults = {'check': f'{tool}_crossing'} if tool in ('cdc', 'rdc') else None
+        return self.load_csv(path, defaults=defaults, tool=tool)
+
+    @classmethod
+    def from_file(cls, *paths: Union[str, os.PathLike], tool: str = 'lint') -> 'ViolationStore':
+        """Create a store from one or more .json/.csv/.rpt reports."""
+        store = cls()
+        for path in paths:
+            store.load_file(path, tool=tool)
+        return store
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __iter__(self) -> Iterator[Violation]:
+        pools = [self._pools[field].values for field in self.TEXT_FIELDS]
+        columns = [self._cols[field] for field in self.TEXT_FIELDS]
+        for line, *ids in zip(self._lines, *columns):
+            check, module, file, severity, obj, message, status = [pool[idx] for pool, idx in zip(pools, ids)]
+            yield Violation(check, module, file, line, severity, obj, message, status)
+
+    def row(self, row: int) -> Violation:
+        """Return a single row as a Violation namedtuple."""
+        check, module, file, severity, obj, message, status = [
+            self._pools[field].values[self._cols[field][row]] for field in self.TEXT_FIELDS
+        ]
+        return Violation(check, module, file, self._lines[row], severity, obj, message, status)
+
+    def rows(self, row_ids: Iterable[int]) -> Iterator[Violation]:
+        """Yield the Violation for each row id."""
+        for row in row_ids:
+            yield self.row(row)
+
+    def value(self, field: str, row: int):
+        """Return a single field of a row without building the full namedtuple."""
+        if field == 'line':
+            return self._lines[row]
+        return self._pools[field][self._cols[field][row]]
+
+    def values(self, field: str) -> List[str]:
+        """Return the distinct values stored for a text field."""
+        return list(self._pools[field].values)
+
+    def column(self, field: str) -> array:
+        """Return the id column of a text field; ids index the list returned by values(field)."""
+        if field == 'line':
+            return self._lines
+        return self._cols[field]
+
+    # ------------------------------------------------------------------
+    # Query API
+    # ------------------------------------------------------------------
+    def filter(self, predicate=None, **criteria) -> array:
+        """
+        Return the row ids matching all criteria.
+
+        Args:
+            predicate: Optional callable(Violation) -> bool applied last
+            **criteria: field=value pairs. A value may be a string, a glob pattern
+                        (e.g. module='VtCpu*') or an iterable of strings/patterns (OR).
+                        'line' accepts an int or an iterable of ints.
+
+        Returns:
+            array: Sorted row ids
+        """
+        candidates = None
+        scans = []
+        for field, wanted in criteria.items():
+            if wanted is None:
+                continue
+            if field not in self.TEXT_FIELDS and field != 'line':
+                raise ValueError(f"Unknown violation field: {field}")
+            wanted = [wanted] if isinstance(wanted, (str, int)) else list(wanted)
+            if field == 'line':
+                scans.append((field, {_to_int(w) for w in wanted}))
+                continue
+            ids = set()
+            for pattern in wanted:
+                ids.update(self._pools[field].match(str(pattern)))
+            if field in self._index:
+                rows = self._rows_for_ids(field, ids)
+                candidates = rows if candidates is None else candidates.intersection(rows)
+                if not candidates:
+                    return array('I')
+            else:
+                scans.append((field, ids))
+
+        if candidates is None:
+            result = range(len(self))
+        else:
+            result = sorted(candidates)
+        for field, ids in scans:
+            column = self._lines if field == 'line' else self._cols[field]
+            result = [row for row in result if column[row] in ids]
+        if predicate is not None:
+            result = [row for row in result if predicate(self.row(row))]
+        return array('I', result)
+
+    def _rows_for_ids(self, field: str, ids: Iterable[int]) -> set:
+        index = self._index[field]
+        rows = set()
+        for idx in ids:
+            rows.update(index.get(idx, ()))
+        return rows
+
+    def count(self, **criteria) -> int:
+        """Return the number of rows matching the criteria (see filter)."""
+        if not criteria:
+            return len(self)
+        if len(criteria) == 1:
+            field, wanted = next(iter(criteria.items()))
+            if field in self._index and isinstance(wanted, str):
+                index = self._index[field]
+                return sum(len(index.get(idx, ())) for idx in self._pools[field].match(wanted))
+        return len(self.filter(**criteria))
+
+    def group_by(self, field: str, rows: Optional[Iterable[int]] = None, **criteria) -> Counter:
+        """
+        Count rows per distinct value of a field.
+
+        Args:
+            field: Field to group on (any Violation field)
+            rows: Optional precomputed row ids to restrict the grouping to
+            **criteria: Filter applied before grouping (see filter)
+
+        Returns:
+            Counter: {value: count}
+        """
+        if rows is None and not criteria and field in self._index:
+            pool = self._pools[field]
+            return Counter({pool[idx]: len(posting) for idx, posting in self._index[field].items()})
+        if rows is None:
+            rows = self.filter(**criteria) if criteria else range(len(self))
+        if field == 'line':
+            return Counter(self._lines[row] for row in rows)
+        column = self._cols[field]
+        pool = self._pools[field]
+        return Counter({pool[idx]: n for idx, n in Counter(column[row] for row in rows).items()})
+
+
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_query(items: List[str]) -> Dict[str, List[str]]:
+    """Turn ['check=foo', 'module=Vt*'] into {'check': ['foo'], 'module': ['Vt*']}."""
+    criteria = {}
+    for item in items or []:
+        if '=' not in item:
+            raise ValueError(f"Query must be <field>=<value>, got: {item}")
+        field, value = item.split('=', 1)
+        criteria.setdefault(field.strip(), []).append(value.strip())
+    return criteria
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query lint/CDC/RDC JSON or CSV reports')
+    parser.add_argument('reports', nargs='+', help='JSON/CSV report files')
+    parser.add_argument('-q', '--query', nargs='*', default=[], help='Filter as <field>=<value> (glob allowed)')
+    parser.add_argument('-gb', '--group_by', choices=Violation._fields, default='check', help='Field to group by')
+    parser.add_argument('-n', '--limit', type=int, default=0, help='Only print the N largest groups')
+    args = parser.parse_args()
+
+    store = ViolationStore.from_file(*args.reports)
+    groups = store.group_by(args.group_by, **parse_query(args.query))
+    for value, count in groups.most_common(args.limit or None):
+        print(f'{count:>10}  {value}')
+    print(f'{sum(groups.values()):>10}  total ({len(store)} loaded)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+from pathlib import Path
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from string_util import StringUtil
+from violation_store import ViolationStore
+from waiver_model import Waiver, WaiverIndex, load_waivers, parse_waiver
+from waiver_parser import WaiverEditor, iter_file_records
+from waiver_dedup import find_redundant
+from waiver_merge import merge_waivers, write_merged
+
+ACTIONS = ('clean', 'group', 'merge', 'prune-unused')
+DEFAULT_GLOB = '**/rtl_lint/waivers/*_lint_waivers.tcl'
+WAIVER_SUFFIX = '_lint_waivers.tcl'
+_UNSAFE_CHARS_RE = re.compile(r'[^\w.-]+')
+
+
+class FileResult(NamedTuple):
+    path: str
+    waivers: int
+    removed: int
+    lines_removed: int
+    outputs: List[str]
+    error: str = ''
+
+
+def find_waiver_files(patterns: Sequence[str], root: Union[str, os.PathLike] = '.') -> List[str]:
+    """
+    Expand waiver file globs ('**' allowed) into a sorted list of unique files.
+
+    Args:
+        patterns: File names or glob patterns; relative ones are taken from root
+        root: Directory of the relative patterns (default: current directory)
+    """
+    files = set()
+    for pattern in patterns or [DEFAULT_GLOB]:
+        pattern = pattern if os.path.isabs(pattern) else os.path.join(root, pattern)
+        files.update(os.path.abspath(path) for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(files)
+
+
+def waiver_top(path: str) -> Optional[str]:
+    """Top of a '<top>_lint_waivers.tcl' file, None for other names."""
+    name = os.path.basename(path)
+    return name[:-len(WAIVER_SUFFIX)] if name.endswith(WAIVER_SUFFIX) and len(name) > len(WAIVER_SUFFIX) else None
+
+
+def pair_reports(files: Sequence[str], reports: Sequence[str]) -> Dict[str, List[str]]:
+    """
+    Reports of each waiver file, so that the waivers of one top are never matched against another top's run.
+
+    A report belongs to the '<top>_lint_waivers.tcl' files whose top is the longest
+    prefix of the report name followed by '_' or '.' (e.g. 'cpu_core_lint.json' goes to
+    cpu_core, not cpu). A single waiver file without a top in its name gets every report.
+
+    Returns:
+        dict: {waiver file: reports}, [] for a file without a report of its top
+    """
+    tops = {path: waiver_top(path) for path in files}
+    if len(files) == 1 and tops[files[0]] is None:
+        return {files[0]: list(reports)}
+    paired = {path: [] for path in files}
+    for report in reports:
+        name = os.path.basename(report)
+        owners = [path for path, top in tops.items() if top and name.startswith((f'{top}_', f'{top}.'))]
+        longest = max((len(tops[path]) for path in owners), default=0)
+        for path in owners:
+            if len(tops[path]) == longest:
+                paired[path].append(report)
+    return paired
+
+
+def _output_path(path: str, output_dir: Optional[str], suffix: str, in_place: bool) -> str:
+    if in_place:
+        return path
+    name = f"{os.path.basename(path)}{suffix}"
+    return os.path.join(output_dir, name) if output_dir else f"{path}{suffix}"
+
+
+def _removal_result(path: str, removals: List[Waiver], waivers: int, output: str, dry_run: bool) -> FileResult:
+    """Splice the removals out of path into output and describe the change."""
+    editor = WaiverEditor(path)
+    lines = 0
+    for waiver in removals:
+        editor.remove(waiver)
+        lines += waiver.end_line - waiver.start_line + 1
+    outputs = []
+    if removals and not dry_run:
+        outputs.append(str(editor.apply(output)))
+    return FileResult(path, waivers, len(removals), lines, outputs)
+
+
+def clean_file(path: str, output_dir: Optional[str] = None, in_place: bool = False, dry_run: bool = False) -> FileResult:
+    """Remove duplicate and subsumed waivers of one file (see waiver_dedup.find_redundant)."""
+    waivers = load_waivers(path)
+    redundant = find_redundant(waivers)
+    output = _output_path(path, output_dir, '.cleaned', in_place)
+    return _removal_result(path, [entry.waiver for entry in redundant], len(waivers), output, dry_run)
+
+
+def group_file(path: str, checks: Sequence[str] = (), output_dir: Optional[str] = None, dry_run: bool = False) -> FileResult:
+    """
+    Split the waivers of one file into one file per check, like lint_report_item.group_specific_checks.
+
+    Commands of the checks listed in checks (every check if empty) go to
+    '<check>_commands.tcl', all other commands to 'other_commands.tcl', in a directory
+    named after the waiver file under output_dir (default: next to the waiver file).
+    """
+    groups = {}
+    wanted = set(checks)
+    count = 0
+    for record in iter_file_records(path):
+        waiver = parse_waiver(*record)
+        count += 1
+        check = waiver.check if waiver is not None and (not wanted or waiver.check in wanted) else ''
+        groups.setdefault(check, []).append(record.stripped_text())
+
+    stem = Path(path).name.rsplit('.', 1)[0]
+    target = Path(output_dir or os.path.dirname(path)) / f"{stem}_grouped"
+    outputs = []
+    for check in sorted(groups, key=lambda name: (not name, name)):
+        name = f"{_UNSAFE_CHARS_RE.sub('_', check)}_commands.tcl" if check else 'other_commands.tcl'
+        outputs.append(str(target / name))
+        if not dry_run:
+            target.mkdir(parents=True, exist_ok=True)
+            with open(target / name, 'w') as f:
+                f.write('\n\n'.join(groups[check]) + '\n')
+    return FileResult(path, count, 0, 0, outputs)
+
+
+def _load(path: str) -> Tuple[str, List[Waiver]]:
+    return path, load_waivers(path)
+
+
+def _run(executor, func, jobs: List[tuple]) -> List[FileResult]:
+    """Run func over the argument tuples, in order; a failing file is reported instead of aborting the batch."""
+    futures = [executor.submit(func, *args) for args in jobs]
+    results = []
+    for args, future in zip(jobs, futures):
+        try:
+            results.append(future.result())
+        except (OSError, ValueError, UnicodeError) as e:
+            results.append(FileResult(args[0], 0, 0, 0, [], str(e)))
+    return results
+
+
+def prune_unused(
+    executor,
+    files: List[str],
+    reports: List[str],
+    output_dir: Optional[str] = None,
+    in_place: bool = False,
+    dry_run: bool = False
+) -> List[FileResult]:
+    """
+    Remove the waivers that match no violation of their top's lint JSON/CSV reports.
+
+    The files are parsed in parallel and paired with the reports of their top
+    (pair_reports); the files sharing the same reports are matched together in one
+    WaiverIndex pass, and the unused waivers of each file are then spliced out in
+    parallel. A file without a report of its top, an unreadable file or a report that
+    does not load is not pruned and reported as an error; the other files still are.
+    """
+    loaded, failed = {}, {}
+    for outcome in _run(executor, _load, [(path,) for path in files]):
+        if isinstance(outcome, FileResult):
+            failed[outcome.path] = outcome
+        else:
+            loaded[outcome[0]] = outcome[1]
+    paired = pair_reports(files, reports)
+    groups = {}
+    for path in loaded:
+        if paired[path]:
+            groups.setdefault(tuple(paired[path]), []).append(path)
+    hits = {}
+    for group_reports, paths in groups.items():
+        try:
+            store = ViolationStore.from_file(*group_reports)
+        except (OSError, ValueError, UnicodeError) as e:
+            error = f"report {', '.join(os.path.basename(report) for report in group_reports)} not loaded ({e}), not pruned"
+            failed.update((path, FileResult(path, len(loaded[path]), 0, 0, [], error)) for path in paths)
+            continue
+        waivers = [waiver for path in paths for waiver in loaded[path]]
+        coverage = WaiverIndex(waivers).coverage(store)
+        offset = 0
+        for path in paths:
+            hits[path] = coverage.hits[offset:offset + len(loaded[path])]
+            offset += len(loaded[path])
+    jobs = []
+    for path in files:
+        if path in hits:
+            removals = [waiver for waiver, hit in zip(loaded[path], hits[path]) if not hit]
+            jobs.append((path, removals, len(loaded[path]), _output_path(path, output_dir, '.pruned', in_place), dry_run))
+    done = {result.path: result for result in _run(executor, _removal_result, jobs)}
+    done.update(failed)
+    return [done[path] if path in done else
+            FileResult(path, len(loaded[path]), 0, 0, [], f"no report of top {waiver_top(path) or os.path.basename(path)}, not pruned")
+            for path in files]
+
+
+def merge_files(executor, files: List[str], output: str, dry_run: bool = False) -> List[FileResult]:
+    """Merge the waiver files into one canonical, deduplicated and sorted file (see waiver_merge)."""
+    result = merge_waivers(files, executor)
+    kept = Counter(waiver.source[0] for waiver in result.waivers + result.unparsed)
+    if not dry_run:
+        write_merged(result, output, os.path.commonpath([os.path.dirname(path) for path in files]))
+    return [FileResult(path, result.read[path], result.read[path] - kept[path], 0, [output]) for path in files]
+
+
+def run_bulk(
+    action: str,
+    files: List[str],
+    jobs: Optional[int] = None,
+    reports: Sequence[str] = (),
+    checks: Sequence[str] = (),
+    output: Optional[str] = None,
+    in_place: bool = False,
+    dry_run: bool = False
+) -> List[FileResult]:
+    """
+    Run one waiver maintenance action over many waiver files in a process pool.
+
+    Args:
+        action: 'clean', 'group', 'merge' or 'prune-unused'
+        files: Waiver TCL files (see find_waiver_files)
+        jobs: Worker processes (default: one per CPU)
+        reports: Lint JSON/CSV reports, required by prune-unused and paired with the
+            files by top (see pair_reports)
+        checks: Checks to group, every check if empty (group only)
+        output: Output directory, or the merged file for merge
+        in_place: Rewrite the waiver files instead of writing '.cleaned'/'.pruned' copies
+        dry_run: Only report, do not write any file
+
+    Returns:
+        list: One FileResult per waiver file, in the order of files
+
+    Raises:
+        ValueError: on an unknown action or missing reports/output
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown waiver action '{action}', expected one of {', '.join(ACTIONS)}")
+    if action == 'prune-unused' and not reports:
+        raise ValueError("prune-unused needs the lint JSON/CSV report(s) to match the waivers against")
+    if action == 'merge' and not output:
+        raise ValueError("merge needs an output file")
+    if not files:
+        return []
+
+    with ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(files))) as executor:
+        if action == 'clean':
+            return _run(executor, clean_file, [(path, output, in_place, dry_run) for path in files])
+        if action == 'group':
+            return _run(executor, group_file, [(path, tuple(checks), output, dry_run) for path in files])
+        if action == 'prune-unused':
+            return prune_unused(executor, files, list(reports), output, in_place, dry_run)
+        return merge_files(executor, files, output, dry_run)
+
+
+def bulk_summary(action: str, results: List[FileResult], elapsed: float, root: str = '') -> str:
+    """Table of the per-file results with a total row."""
+    removed_title = 'Duplicates' if action == 'merge' else 'Removed'
+    rows = []
+    for result in results:
+        path = os.path.relpath(result.path, root) if root else result.path
+        if result.error:
+            detail = f"error: {result.error}"
+        elif action == 'group':
+            detail = f"{len(result.outputs)} files"
+        else:
+            detail = f"{result.lines_removed} lines" if result.lines_removed else '-'
+        rows.append([path, str(result.waivers), str(result.removed), detail])
+    rows.append([f"Total ({len(results)} files, {elapsed:.2f} s)", str(sum(r.waivers for r in results)),
+                 str(sum(r.removed for r in results)), ''])
+    title = f"Waiver {action}"
+    return StringUtil().table([title, 'Waivers', removed_title, 'Details'], rows, style='round',
+                              align=['left', 'right', 'right', 'left'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Clean, group, merge or prune many lint waiver files in parallel')
+    parser.add_argument('action', choices=ACTIONS, help='Maintenance action')
+    parser.add_argument('waiver_files', nargs='*', help=f'Waiver files or globs (default: {DEFAULT_GLOB})')
+    parser.add_argument('-r', '--report', nargs='+', default=[], help='Lint JSON/CSV report(s) for prune-unused')
+    parser.add_argument('-c', '--checks', nargs='+', default=[], help='Checks to group (default: every check)')
+    parser.add_argument('-o', '--output', default=None, help='Output directory, or merged file for merge')
+    parser.add_argument('-i', '--in_place', action='store_true', help='Rewrite the waiver files in place')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('-n', '--dry_run', action='store_true', help='Report only, do not write any file')
+    args = parser.parse_args()
+
+    files = find_waiver_files(args.waiver_files)
+    if not files:
+        print("Error: no waiver files found")
+        sys.exit(1)
+    start = time.perf_counter()
+    try:
+        results = run_bulk(args.action, files, args.jobs, args.report, args.checks, args.output, args.in_place, args.dry_run)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(bulk_summary(args.action, results, time.perf_counter() - start, os.getcwd()))
+    if any(result.error for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
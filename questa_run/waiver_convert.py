@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+import os
+import re
+import csv
+import sys
+import argparse
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from string_util import StringUtil
+from waiver_model import OPTION_ALIASES
+from waiver_merge import canonical_text
+from waiver_parser import WAIVER_COMMAND, WaiverRecord, iter_file_records, tcl_words
+
+FORMATS = ('questa', 'awl', 'vc')
+# Command that starts a waiver in each format
+FORMAT_COMMANDS = {'questa': WAIVER_COMMAND, 'awl': 'waive ', 'vc': 'waive_lint'}
+# Column header of the check map CSV -> format, for headers not named after the format
+MAP_COLUMNS = {'spyglass': 'awl', 'sg': 'awl', 'vclint': 'vc'}
+DEFAULT_CHECK_MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lint_goal', 'waiver_check_map.csv')
+
+# Option spellings of the SpyGlass 'waive' (AWL) and VC SpyGlass 'waive_lint' commands -> WaiverIR field
+VENDOR_OPTIONS = {
+    'rule': 'check', 'rules': 'check', 'tag': 'check',
+    'du': 'module', 'module': 'module',
+    'file': 'file', 'line': 'line',
+    'msg': 'message', 'message': 'message',
+    'comment': 'comment',
+    'regexp': 'regexp',
+}
+_BACKSLASH_RE = re.compile(r'\\(.)')
+# WaiverIR fields each format can express (check is always required)
+FORMAT_FIELDS = {
+    'questa': frozenset(('module', 'file', 'line', 'object', 'comment')),
+    'awl': frozenset(('module', 'file', 'line', 'message', 'comment', 'regexp')),
+    'vc': frozenset(('module', 'file', 'line', 'message', 'comment', 'regexp')),
+}
+# Questa -status values that waive the violation; other items (bug, pending, fixed, ...) are not converted
+WAIVED_STATUSES = frozenset(('waived', 'waive'))
+
+
+class WaiverIR(NamedTuple):
+    """Vendor neutral waiver: what it matches and why, plus where it was read from."""
+    check: str
+    module: str = ''
+    file: str = ''
+    line: int = 0
+    object: str = ''
+    message: str = ''
+    comment: str = ''
+    regexp: bool = False    # message is a regular expression instead of a glob
+    status: str = ''        # Questa -status, '' when not given
+    origin: Tuple[str, int] = ('', 0)
+
+
+class Unmappable(NamedTuple):
+    origin: Tuple[str, int]
+    reason: str
+
+
+class CheckMap:
+    """Check/rule names between formats, read from a CSV with one column per format."""
+
+    def __init__(self, path: Optional[Union[str, os.PathLike]] = DEFAULT_CHECK_MAP):
+        self._maps = {}     # (from format, to format) -> {name: name}
+        if path is None or not os.path.isfile(path):
+            return
+        with open(path, 'r', newline='') as f:
+            rows = [row for row in csv.reader(f) if row and not row[0].lstrip().startswith('#')]
+        if not rows:
+            return
+        header = [MAP_COLUMNS.get(name.strip().lower(), name.strip().lower()) for name in rows[0]]
+        for row in rows[1:]:
+            names = {fmt: value.strip() for fmt, value in zip(header, row) if value.strip()}
+            for src, src_name in names.items():
+                for dst, dst_name in names.items():
+                    self._maps.setdefault((src, dst), {}).setdefault(src_name, dst_name)
+
+    def translate(self, check: str, src: str, dst: str) -> Optional[str]:
+        """Name of check in format dst, or None if the table has no mapping."""
+        if src == dst:
+            return check
+        return self._maps.get((src, dst), {}).get(check)
+
+
+def _value(word: str) -> str:
+    """Option value without braces/quotes, including a '{ "W240" }' style quoted value inside braces."""
+    value = word.strip()
+    for _ in range(2):
+        if len(value) >= 2 and value[0] == '{' and value[-1] == '}':
+            value = value[1:-1].strip()
+        elif len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+            value = _BACKSLASH_RE.sub(r'\1', value[1:-1]).strip()
+    return ' '.join(value.split())
+
+
+def _options(text: str, command: str, aliases: Dict[str, str]) -> Dict[str, List[str]]:
+    """Option -> values of one command; a value holding several quoted names ('{"W240" "W241"}') gives several values."""
+    words = list(tcl_words(text))[len(command.split()):]
+    options = {}
+    i = 0
+    while i < len(words):
+        word = words[i]
+        i += 1
+        if not word.startswith('-') or len(word) < 2:
+            continue
+        field = aliases.get(word[1:].lower())
+        value = None
+        if i < len(words) and not (words[i].startswith('-') and len(words[i]) > 1 and not words[i][1].isdigit()):
+            value = words[i]
+            i += 1
+        if field is None:
+            continue
+        if value is None:
+            options.setdefault(field, []).append('')
+        elif field == 'check' and value.startswith('{') and value.count('"') > 2:
+            options.setdefault(field, []).extend(name for name in value[1:-1].replace('"', ' ').split())
+        else:
+            options.setdefault(field, []).append(_value(value))
+    return options
+
+
+def read_ir(record: WaiverRecord, fmt: str, path: str = '') -> List[WaiverIR]:
+    """IR of one waiver command of format fmt (one per rule when a command lists several)."""
+    command = FORMAT_COMMANDS[fmt]
+    aliases = OPTION_ALIASES if fmt == 'questa' else VENDOR_OPTIONS
+    options = _options(record.text.replace('\\\n', ' '), command, aliases)
+    first = {field: values[0] for field, values in options.items() if values}
+    line = first.get('line', '')
+    fields = dict(
+        module=first.get('module', ''),
+        file=first.get('file', ''),
+        line=int(line) if line.isdigit() else 0,
+        object=first.get('object', ''),
+        message=first.get('message', ''),
+        comment=first.get('justification', first.get('comment', '')),
+        regexp='regexp' in options,
+        status=first.get('status', ''),
+        origin=(path, record.start_line),
+    )
+    return [WaiverIR(check, **fields) for check in options.get('check', []) if check]
+
+
+def write_ir(waiver: WaiverIR, fmt: str, name: str = '') -> str:
+    """Command text of an IR waiver in format fmt (name is the -add label of VC waivers)."""
+    if fmt == 'questa':
+        options = {'check': waiver.check}
+        for field, value in (('module', waiver.module), ('file', waiver.file), ('line', str(waiver.line) if waiver.line else ''),
+                             ('object', waiver.object), ('status', waiver.status or 'waived'), ('justification', waiver.comment)):
+            if value:
+                options[field] = value
+        return canonical_text(options)
+
+    def quoted(value):
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+    if fmt == 'awl':
+        parts = ['waive', f'-rule {{ {quoted(waiver.check)} }}']
+        if waiver.module:
+            parts.append(f'-du {{ {quoted(waiver.module)} }}')
+    else:
+        parts = ['waive_lint', f'-tag {quoted(waiver.check)}', f'-add {quoted(name or waiver.check)}']
+        if waiver.module:
+            parts.append(f'-module {quoted(waiver.module)}')
+    if waiver.file:
+        parts.append(f'-file {quoted(waiver.file)}')
+    if waiver.line:
+        parts.append(f'-line {waiver.line}')
+    if waiver.message:
+        parts.append(f'-msg {quoted(waiver.message)}')
+    if waiver.regexp:
+        parts.append('-regexp')
+    if waiver.comment:
+        parts.append(f'-comment {quoted(waiver.comment)}')
+    return ' '.join(parts)
+
+
+def convert_ir(
+    waiver: WaiverIR,
+    src: str,
+    dst: str,
+    check_map: CheckMap,
+    object_to_msg: bool = False
+) -> Union[WaiverIR, Unmappable]:
+    """
+    Translate one IR waiver from format src to dst.
+
+    The check is renamed through check_map; any field dst cannot express makes the
+    waiver unmappable rather than silently widening it. With object_to_msg a Questa
+    -object becomes a '*<object>*' message glob for the vendor formats.
+    """
+    check = check_map.translate(waiver.check, src, dst)
+    if check is None:
+        return Unmappable(waiver.origin, f"no {dst} name for check '{waiver.check}'")
+    waiver = waiver._replace(check=check)
+    if waiver.object and 'object' not in FORMAT_FIELDS[dst] and object_to_msg and not waiver.message:
+        waiver = waiver._replace(object='', message=f'*{waiver.object}*')
+    for field in ('module', 'file', 'line', 'object', 'message', 'comment', 'regexp'):
+        if getattr(waiver, field) and field not in FORMAT_FIELDS[dst]:
+            return Unmappable(waiver.origin, f"-{field} has no {dst} equivalent")
+    return waiver
+
+
+def is_waived(waiver: WaiverIR) -> bool:
+    """False for a Questa item whose -status is not a waiver (no -status counts as waived)."""
+    return not waiver.status or waiver.status.lower() in WAIVED_STATUSES
+
+
+def iter_ir(path: Union[str, os.PathLike], fmt: str) -> Iterator[WaiverIR]:
+    """Stream the IR waivers of a waiver file."""
+    for record in iter_file_records(path, FORMAT_COMMANDS[fmt]):
+        yield from read_ir(record, fmt, str(path))
+
+
+def detect_format(path: Union[str, os.PathLike]) -> str:
+    """Guess a waiver file's format: .awl is SpyGlass, a TCL file starting with waive_lint is VC, else Questa."""
+    if str(path).endswith('.awl'):
+        return 'awl'
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith('waive_lint'):
+                return 'vc'
+            if stripped.startswith(WAIVER_COMMAND):
+                return 'questa'
+    return 'questa'
+
+
+def convert_files(
+    inputs: List[str],
+    dst: str,
+    output_path: Union[str, os.PathLike],
+    src: Optional[str] = None,
+    check_map: Optional[CheckMap] = None,
+    object_to_msg: bool = False
+) -> Tuple[int, int, List[Unmappable], List[Unmappable]]:
+    """
+    Convert waiver files into one file of format dst, streaming record by record.
+
+    Questa items whose -status is not a waiver (see WAIVED_STATUSES) are skipped.
+
+    Args:
+        inputs: Waiver files
+        dst: Output format ('questa', 'awl' or 'vc')
+        output_path: Converted file
+        src: Input format (default: detected per file)
+        check_map: Check name table (default: lint_goal/waiver_check_map.csv)
+        object_to_msg: Turn Questa -object into a -msg glob for SpyGlass/VC
+
+    Returns:
+        tuple: (waivers read, waivers written, unmappable waivers, skipped items)
+    """
+    check_map = check_map or CheckMap()
+    read = written = 0
+    unmappable, skipped = [], []
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as out:
+        for path in inputs:
+            fmt = src or detect_format(path)
+            out.write(f"# converted from {fmt}: {path}\n")
+            for waiver in iter_ir(path, fmt):
+                read += 1
+                if not is_waived(waiver):
+                    skipped.append(Unmappable(waiver.origin, f"-status {waiver.status} is not a waiver"))
+                    continue
+                result = convert_ir(waiver, fmt, dst, check_map, object_to_msg)
+                if isinstance(result, Unmappable):
+                    unmappable.append(result)
+                    continue
+                written += 1
+                out.write(write_ir(result, dst, name=f'{Path(path).stem}_{waiver.origin[1]}') + '\n')
+    return read, written, unmappable, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert lint waivers between Questa TCL, SpyGlass AWL and VC SpyGlass waive_lint')
+    parser.add_argument('inputs', nargs='+', help='Waiver files')
+    parser.add_argument('-t', '--to', required=True, choices=FORMATS, help='Output format')
+    parser.add_argument('-s', '--source', default=None, choices=FORMATS, help='Input format (default: detected per file)')
+    parser.add_argument('-o', '--output', required=True, help='Converted waiver file')
+    parser.add_argument('-m', '--map', default=DEFAULT_CHECK_MAP, help='Check name mapping CSV (default: lint_goal/waiver_check_map.csv)')
+    parser.add_argument('--object_to_msg', action='store_true', help='Convert Questa -object into a -msg glob for SpyGlass/VC')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List every skipped and unmappable waiver')
+    args = parser.parse_args()
+
+    if args.map and not os.path.isfile(args.map):
+        print(f"Error: check map not found: {args.map}")
+        sys.exit(1)
+    read, written, unmappable, skipped = convert_files(args.inputs, args.to, args.output, args.source, CheckMap(args.map), args.object_to_msg)
+    reasons = {}
+    for entry in unmappable:
+        reasons[entry.reason] = reasons.get(entry.reason, 0) + 1
+    rows = [['Waivers read', str(read)], ['Converted', str(written)], ['Skipped (-status not waived)', str(len(skipped))],
+            ['Unmappable', str(len(unmappable))]]
+    rows += [[f'  {reason}', str(count)] for reason, count in sorted(reasons.items(), key=lambda item: -item[1])[:20]]
+    print(StringUtil().table([f'Waiver conversion to {args.to}', 'Count'], rows, style='round', align=['left', 'right']))
+    if args.verbose:
+        for entry in skipped + unmappable:
+            print(f"  {entry.origin[0]}:{entry.origin[1]}: {entry.reason}")
+    print(f"Converted file: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+import os
+import argparse
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Union
+from waiver_model import Waiver, glob_match, load_waivers, is_wildcard
+from waiver_parser import WaiverEditor
+
+
+class Redundant(NamedTuple):
+    waiver: Waiver
+    kept: Waiver
+    reason: str         # 'duplicate' or 'subsumed'
+
+
+def literal_prefix(pattern: str) -> str:
+    """Part of a glob pattern before its first wildcard ('[' is literal, see waiver_model.glob_regex)."""
+    for i, char in enumerate(pattern):
+        if char in '*?':
+            return pattern[:i]
+    return pattern
+
+
+def _is_prefix_pattern(pattern: str) -> bool:
+    """'u_top.u_core.*' style pattern: a literal prefix followed by a single trailing '*'."""
+    return pattern.endswith('*') and not is_wildcard(pattern[:-1])
+
+
+def covers(broad: str, narrow: str) -> bool:
+    """
+    True if every name matched by the waiver field pattern narrow is also matched by broad.
+
+    Exact for empty/equal/literal fields and for 'prefix*' patterns; any other pair of
+    wildcard patterns is conservatively reported as not covered.
+    """
+    if not broad or broad == narrow:
+        return True
+    if not narrow:
+        return False
+    if not is_wildcard(narrow):
+        return glob_match(broad, narrow) if is_wildcard(broad) else False
+    return _is_prefix_pattern(broad) and literal_prefix(narrow).startswith(broad[:-1])
+
+
+def _file_covers(broad: str, narrow: str) -> bool:
+    if broad and narrow and '/' not in broad and '/' in narrow:
+        narrow = os.path.basename(narrow)
+    return covers(broad, narrow)
+
+
+class _CoverMap:
+    """Items keyed by a waiver field pattern; covering(pattern) returns the items of every pattern covering it."""
+
+    def __init__(self):
+        self.exact = {}
+        self.any = []
+        self.wild = {}
+
+    def add(self, pattern: str, item) -> None:
+        if not pattern:
+            self.any.append(item)
+        elif is_wildcard(pattern):
+            self.wild.setdefault(pattern, []).append(item)
+        else:
+            self.exact.setdefault(pattern, []).append(item)
+
+    def covering(self, pattern: str) -> List:
+        found = list(self.any)
+        if pattern:
+            found.extend(self.exact.get(pattern, ()))
+            for broad, items in self.wild.items():
+                if covers(broad, pattern):
+                    found.extend(items)
+        return found
+
+
+class _ObjectIndex:
+    """
+    Object patterns of the waivers sharing a check and module.
+
+    Literal objects are a dict; 'prefix*' objects sit in a prefix index that is probed at every
+    position of the narrow object's literal prefix, so finding the broader hierarchical
+    waivers of a path costs O(len(path)) lookups instead of a scan of all waivers.
+    """
+
+    def __init__(self):
+        self.exact = {}
+        self.prefixes = {}
+        self.any = []
+        self.other = []
+
+    def add(self, pattern: str, wid: int) -> None:
+        if not pattern:
+            self.any.append(wid)
+        elif _is_prefix_pattern(pattern):
+            self.prefixes.setdefault(pattern[:-1], []).append(wid)
+        elif is_wildcard(pattern):
+            self.other.append((pattern, wid))
+        else:
+            self.exact.setdefault(pattern, []).append(wid)
+
+    def covering(self, pattern: str) -> List[int]:
+        found = list(self.any)
+        if not pattern:
+            return found
+        found.extend(self.exact.get(pattern, ()))
+        prefix = literal_prefix(pattern)
+        prefixes = self.prefixes
+        for end in range(len(prefix) + 1):
+            wids = prefixes.get(prefix[:end])
+            if wids:
+                found.extend(wids)
+        for broad, wid in self.other:
+            if covers(broad, pattern):
+                found.append(wid)
+        return found
+
+
+class _WaiverTree:
+    """Waivers indexed by check, then module (_CoverMap levels), then object (_ObjectIndex)."""
+
+    def __init__(self, waivers: List[Waiver]):
+        self.waivers = waivers
+        self._checks = _CoverMap()
+        module_maps = {}
+        object_indexes = {}
+        for wid, waiver in enumerate(waivers):
+            objects = object_indexes.get((waiver.check, waiver.module))
+            if objects is None:
+                objects = object_indexes[(waiver.check, waiver.module)] = _ObjectIndex()
+                module_map = module_maps.get(waiver.check)
+                if module_map is None:
+                    module_map = module_maps[waiver.check] = _CoverMap()
+                    self._checks.add(waiver.check, module_map)
+                module_map.add(waiver.module, objects)
+            objects.add(waiver.object, wid)
+
+    def broader(self, wid: int, skip: set) -> Optional[int]:
+        """Id of another waiver (not in skip) covering waiver wid with the same status, or None."""
+        waiver = self.waivers[wid]
+        for module_map in self._checks.covering(waiver.check):
+            for objects in module_map.covering(waiver.module):
+                for other in objects.covering(waiver.object):
+                    if other == wid or other in skip:
+                        continue
+                    broad = self.waivers[other]
+                    if broad.status != waiver.status or broad.key() == waiver.key():
+                        continue
+                    if (not broad.line or broad.line == waiver.line) and _file_covers(broad.file, waiver.file):
+                        return other
+        return None
+
+
+def find_redundant(waivers: List[Waiver]) -> List[Redundant]:
+    """
+    Find waivers that are exact duplicates of, or subsumed by, another waiver with the same status.
+
+    Each waiver only visits the waivers whose check, module and object patterns cover its
+    own. Of two identical waivers the first one in the file is kept; a subsumed waiver is
+    dropped in favour of the broader one.
+    """
+    tree = _WaiverTree(waivers)
+    redundant = []
+    removed = set()
+    first_of_key = {}
+    for wid, waiver in enumerate(waivers):
+        original = first_of_key.setdefault(waiver.key(), wid)
+        if original != wid:
+            redundant.append(Redundant(waiver, waivers[original], 'duplicate'))
+            removed.add(wid)
+            continue
+        other = tree.broader(wid, removed)
+        if other is not None:
+            redundant.append(Redundant(waiver, waivers[other], 'subsumed'))
+            removed.add(wid)
+    return redundant
+
+
+def write_cleaned(
+    waiver_path: Union[str, os.PathLike],
+    redundant: List[Redundant],
+    output_path: Optional[Union[str, os.PathLike]] = None
+) -> Path:
+    """
+    Write the waiver file without the redundant commands, like lint_report_item.clean_waiver_file.
+
+    Args:
+        waiver_path: Input waiver file
+        redundant: Result of find_redundant()
+        output_path: Output file (default: '<waiver_path>.cleaned')
+
+    Returns:
+        Path: The cleaned file
+    """
+    editor = WaiverEditor(waiver_path)
+    lines = 0
+    for entry in redundant:
+        editor.remove(entry.waiver)
+        lines += entry.waiver.end_line - entry.waiver.start_line + 1
+    waiver_path = Path(waiver_path)
+    output_path = editor.apply(output_path if output_path is not None else waiver_path.with_name(f"{waiver_path.name}.cleaned"))
+
+    print(f"Removed {lines} lines from {len(redundant)} commands")
+    print(f"Clean file: {output_path}")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove duplicate and subsumed lint waivers without running qverify')
+    parser.add_argument('waiver_file', help='Waiver TCL file')
+    parser.add_argument('-o', '--output', default=None, help='Cleaned file (default: <waiver_file>.cleaned)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List every removed waiver')
+    args = parser.parse_args()
+
+    redundant = find_redundant(load_waivers(args.waiver_file))
+    if args.verbose:
+        for entry in redundant:
+            print(f"  line {entry.waiver.start_line}: {entry.reason} by line {entry.kept.start_line}")
+    if not redundant:
+        print("No duplicate or subsumed waivers found")
+        return
+    write_cleaned(args.waiver_file, redundant, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+import os
+import re
+import csv
+import sys
+import argparse
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from string_util import StringUtil
+from violation_store import ViolationStore
+from waiver_model import WaiverIndex, parse_waiver
+from waiver_parser import WAIVER_COMMAND, WaiverEditor, WaiverRecord, iter_file_records
+from waiver_merge import canonicalize
+from waiver_bulk import pair_reports, waiver_top
+
+# '<waiver file>:<line>' followed somewhere on the line by a count, in a text status report
+_LOCATION_RE = re.compile(r'(\S+\.tcl):(\d+)\b\D*?(\d+)\s*$')
+# Trailing count after a waiver command, in a text status report
+_COUNT_RE = re.compile(r'(\d+)\s*$')
+# Column names of a CSV status report
+_COUNT_COLUMNS = ('hits', 'count', 'waived', 'matches', 'violations')
+_FILE_COLUMNS = ('waiver_file', 'source', 'file')
+_LINE_COLUMNS = ('waiver_line', 'line')
+_TEXT_COLUMNS = ('waiver', 'command', 'directive')
+
+
+class WaiverHits(NamedTuple):
+    record: WaiverRecord
+    hits: int               # violations the directive matches, -1 if the counts have no entry for it
+    digest: str = ''        # canonical digest, '' for commands without -check
+
+
+class StatusCounts(NamedTuple):
+    """Per-waiver counts read from qverify status reports, by location and by canonical digest."""
+    by_location: Dict[Tuple[str, int], int]     # (waiver file basename, first line) -> count
+    by_digest: Dict[str, int]
+
+    def lookup(self, path: str, record: WaiverRecord, digest: str) -> int:
+        count = self.by_location.get((os.path.basename(path), record.start_line))
+        if count is None:
+            count = self.by_digest.get(digest, -1)
+        return count
+
+
+def _column(header: Sequence[str], names: Sequence[str]) -> Optional[int]:
+    lowered = [name.strip().lower() for name in header]
+    for name in names:
+        if name in lowered:
+            return lowered.index(name)
+    return None
+
+
+def read_status_reports(paths: Sequence[Union[str, os.PathLike]]) -> StatusCounts:
+    """
+    Read per-waiver counts from qverify status reports.
+
+    A CSV report needs a count column (hits/count/waived/...) and either the waiver
+    location (waiver_file + waiver_line) or the waiver command text. A text report is
+    read line by line: '<file>.tcl:<line> ... <count>' or a waiver command ending in its
+    count. Counts of the same waiver in several reports are added up.
+    """
+    by_location, by_digest = {}, {}
+
+    def add(table, key, count):
+        table[key] = table.get(key, 0) + count
+
+    for path in paths:
+        with open(path, 'r', errors='replace', newline='') as f:
+            content = f.read()
+        if str(path).endswith('.csv'):
+            rows = list(csv.reader(content.splitlines()))
+            if not rows:
+                continue
+            header = rows[0]
+            count_col = _column(header, _COUNT_COLUMNS)
+            file_col, line_col = _column(header, _FILE_COLUMNS), _column(header, _LINE_COLUMNS)
+            text_col = _column(header, _TEXT_COLUMNS)
+            if count_col is None:
+                raise ValueError(f"{path}: no count column ({', '.join(_COUNT_COLUMNS)})")
+            for row in rows[1:]:
+                if len(row) <= count_col or not row[count_col].strip().isdigit():
+                    continue
+                count = int(row[count_col])
+                if text_col is not None and text_col < len(row) and row[text_col].strip():
+                    waiver = canonicalize(row[text_col])
+                    if waiver is not None:
+                        add(by_digest, waiver.digest, count)
+                        continue
+                if file_col is not None and line_col is not None and row[line_col].strip().isdigit():
+                    add(by_location, (os.path.basename(row[file_col].strip()), int(row[line_col])), count)
+            continue
+        for line in content.splitlines():
+            stripped = line.strip()
+            if stripped.startswith(WAIVER_COMMAND):
+                m = _COUNT_RE.search(stripped)
+                waiver = canonicalize(stripped[:m.start()]) if m else None
+                if waiver is not None:
+                    add(by_digest, waiver.digest, int(m.group(1)))
+                continue
+            m = _LOCATION_RE.search(stripped)
+            if m:
+                add(by_location, (os.path.basename(m.group(1)), int(m.group(2))), int(m.group(3)))
+    return StatusCounts(by_location, by_digest)
+
+
+def _digest(record: WaiverRecord) -> str:
+    waiver = canonicalize(record.text)
+    return waiver.digest if waiver is not None else ''
+
+
+def hits_from_store(paths: Sequence[str], store: ViolationStore) -> Dict[str, List[WaiverHits]]:
+    """
+    Violations matched by every directive of the waiver files, in one WaiverIndex pass.
+
+    Every match counts, not only the first one, so the count of a directive does not
+    depend on its position in the file. Commands without -check get -1.
+    """
+    records = {path: list(iter_file_records(path)) for path in paths}
+    parsed = {path: [parse_waiver(*record) for record in records[path]] for path in paths}
+    waivers = [waiver for path in paths for waiver in parsed[path] if waiver is not None]
+    hits = iter(WaiverIndex(waivers).coverage(store).hits)
+    return {path: [WaiverHits(record, -1 if waiver is None else next(hits), _digest(record))
+                   for record, waiver in zip(records[path], parsed[path])]
+            for path in paths}
+
+
+def hits_from_reports(paths: Sequence[str], reports: Sequence[str]) -> Dict[str, List[WaiverHits]]:
+    """
+    hits_from_store() with each waiver file matched only against the reports of its top.
+
+    Reports are paired with the files by waiver_bulk.pair_reports(); the directives of a
+    file without a report of its top get no count (-1), so they are neither reordered by
+    a count of another top nor quarantined.
+    """
+    paired = pair_reports(paths, reports)
+    groups = {}
+    for path in paths:
+        groups.setdefault(tuple(paired[path]), []).append(path)
+    hits = {}
+    for group_reports, group in groups.items():
+        if group_reports:
+            hits.update(hits_from_store(group, ViolationStore.from_file(*group_reports)))
+        else:
+            hits.update({path: [WaiverHits(record, -1, _digest(record)) for record in iter_file_records(path)] for path in group})
+    return {path: hits[path] for path in paths}
+
+
+def unpaired(paths: Sequence[str], reports: Sequence[str]) -> List[str]:
+    """Waiver files without a report of their top (see hits_from_reports)."""
+    paired = pair_reports(paths, reports)
+    return [path for path in paths if not paired[path]]
+
+
+def hits_from_status(paths: Sequence[str], counts: StatusCounts) -> Dict[str, List[WaiverHits]]:
+    """Counts of every directive of the waiver files looked up in read_status_reports() results."""
+    result = {}
+    for path in paths:
+        entries = []
+        for record in iter_file_records(path):
+            digest = _digest(record)
+            entries.append(WaiverHits(record, counts.lookup(path, record, digest), digest))
+        result[path] = entries
+    return result
+
+
+def _with_comments(lines: List[bytes], entries: List[WaiverHits]) -> List[WaiverHits]:
+    """Entries whose record is widened to the comment lines directly above the directive."""
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    widened = []
+    previous_end = 0    # first line (0-based) not belonging to the previous directive
+    for entry in entries:
+        record = entry.record
+        start = record.start_line - 1
+        while start > previous_end and lines[start - 1].lstrip().startswith(b'#'):
+            start -= 1
+        text = b''.join(lines[start:record.end_line]).decode('utf-8', 'replace')
+        widened.append(entry._replace(record=record._replace(text=text, start_line=start + 1, start_byte=offsets[start])))
+        previous_end = record.end_line
+    return widened
+
+
+def quarantine_path(path: Union[str, os.PathLike], output_dir: Optional[str] = None) -> Path:
+    """'<stem>_quarantine.tcl' next to the waiver file, or under output_dir."""
+    path = Path(path)
+    return Path(output_dir or path.parent) / f"{path.name.rsplit('.', 1)[0]}_quarantine.tcl"
+
+
+def reorder_file(
+    path: str,
+    entries: List[WaiverHits],
+    output_path: Optional[str] = None,
+    quarantine: Optional[Union[str, os.PathLike]] = None
+) -> Tuple[int, int]:
+    """
+    Rewrite a waiver file with its most hit directives first and its zero-hit directives moved out.
+
+    Directives (with the comment lines directly above them) are sorted by descending
+    hit count, ties keeping their file order, and written where the first directive
+    was; anything else in the file stays in place. Directives without a count (-1) go
+    last. When directives with different -status overlap, the order can change which
+    status a violation gets, so review the diff of such files.
+
+    Args:
+        path: Waiver file
+        entries: Result of hits_from_store()/hits_from_status() for path
+        output_path: Reordered file (default: in place)
+        quarantine: File the zero-hit directives are appended to (default: they are kept, before
+            the uncounted ones); directives already in it are not added twice
+
+    Returns:
+        tuple: (directives kept, directives quarantined)
+    """
+    if not entries:
+        return 0, 0
+    with open(path, 'rb') as f:
+        entries = _with_comments(f.read().splitlines(True), entries)
+    unused = [entry for entry in entries if entry.hits == 0] if quarantine is not None else []
+    kept = [entry for entry in entries if quarantine is None or entry.hits != 0]
+    kept.sort(key=lambda entry: -entry.hits if entry.hits >= 0 else 1)
+
+    def block(entries):
+        return ''.join(entry.record.text if entry.record.text.endswith('\n') else entry.record.text + '\n' for entry in entries)
+
+    editor = WaiverEditor(path)
+    for entry in entries:
+        editor.remove(entry.record)
+    if kept:
+        editor.insert(entries[0].record.start_byte, block(kept))
+    if unused:
+        quarantine = Path(quarantine)
+        quarantine.parent.mkdir(parents=True, exist_ok=True)
+        present = {_digest(record) for record in iter_file_records(quarantine)} if quarantine.exists() else set()
+        added = [entry for entry in unused if not entry.digest or entry.digest not in present]
+        if added:
+            header = '' if quarantine.exists() and quarantine.stat().st_size else f"# Waivers of {path} matching no violation\n"
+            with open(quarantine, 'a') as f:
+                f.write(f"{header}\n{block(added)}")
+    editor.apply(output_path)
+    return len(kept), len(unused)
+
+
+def hits_summary(hits: Dict[str, List[WaiverHits]], root: str = '') -> str:
+    """Per waiver file: directives, violations matched, zero-hit and uncounted directives, and the busiest directive."""
+    rows = []
+    for path, entries in hits.items():
+        counted = [entry.hits for entry in entries if entry.hits >= 0]
+        rows.append([os.path.relpath(path, root) if root else path, str(len(entries)), str(sum(counted)),
+                     str(counted.count(0)), str(len(entries) - len(counted)), str(max(counted, default=0))])
+    every = [entry.hits for entries in hits.values() for entry in entries]
+    rows.append(['Total', str(len(every)), str(sum(count for count in every if count > 0)),
+                 str(every.count(0)), str(every.count(-1)), str(max(every, default=0))])
+    return StringUtil().table(['Waiver file', 'Directives', 'Hits', 'Zero-hit', 'No count', 'Max'], rows,
+                              style='round', align=['left', 'right', 'right', 'right', 'right', 'right'])
+
+
+def top_directives(hits: Dict[str, List[WaiverHits]], count: int = 20, root: str = '') -> str:
+    """Table of the most hit directives over all waiver files."""
+    ranked = sorted(((entry.hits, path, entry.record) for path, entries in hits.items() for entry in entries if entry.hits > 0),
+                    key=lambda item: -item[0])[:count]
+    rows = [[str(hits), f"{os.path.relpath(path, root) if root else path}:{record.start_line}",
+             ' '.join(record.text.replace('\\\n', ' ').split())[:100]] for hits, path, record in ranked]
+    return StringUtil().table(['Hits', 'Location', 'Directive'], rows, style='round', align=['right', 'left', 'left'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count the violations each lint waiver directive suppresses and reorder the waiver files by it')
+    parser.add_argument('waiver_files', nargs='+', help='Waiver TCL files')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('-r', '--report', nargs='+', help='Lint JSON/CSV report(s) of the run without waivers applied')
+    source.add_argument('-s', '--status_report', nargs='+', help='qverify status report(s) with per-waiver counts (CSV or text)')
+    parser.add_argument('-o', '--output_dir', default=None, help="Write '<name>.ordered' copies and the quarantine files here")
+    parser.add_argument('-ip', '--in_place', action='store_true', help='Reorder the waiver files in place')
+    parser.add_argument('-q', '--quarantine', action='store_true', help="Move the zero-hit directives into '<name>_quarantine.tcl' (appended) instead of keeping them last")
+    parser.add_argument('-t', '--top', type=int, default=20, help='Number of most hit directives to list (default: 20)')
+    args = parser.parse_args()
+
+    paths = [os.path.abspath(path) for path in args.waiver_files]
+    missing = [path for path in paths if not os.path.isfile(path)]
+    if missing:
+        print(f"Error: waiver file(s) not found: {', '.join(missing)}")
+        sys.exit(1)
+    try:
+        if args.report:
+            hits = hits_from_reports(paths, args.report)
+            for path in unpaired(paths, args.report):
+                print(f"Warning: no report of top {waiver_top(path) or os.path.basename(path)}, {os.path.basename(path)} is not counted")
+        else:
+            hits = hits_from_status(paths, read_status_reports(args.status_report))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    root = os.getcwd()
+    print(hits_summary(hits, root))
+    if args.top:
+        print(top_directives(hits, args.top, root))
+    if not (args.output_dir or args.in_place):
+        return
+    for path, entries in hits.items():
+        if all(entry.hits < 0 for entry in entries):
+            continue    # nothing counted, e.g. no report of its top
+        output = path if args.in_place else os.path.join(args.output_dir, os.path.basename(path) + '.ordered')
+        quarantine = quarantine_path(path, args.output_dir) if args.quarantine else None
+        kept, moved = reorder_file(path, entries, output, quarantine)
+        note = f", {moved} quarantined into {os.path.relpath(quarantine, root)}" if moved else ''
+        print(f"{os.path.relpath(output, root)}: {kept} directives by hit count{note}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import argparse
+from hashlib import blake2b
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from string_util import StringUtil
+from waiver_model import OPTION_ALIASES
+from waiver_parser import WAIVER_COMMAND, is_option_word, iter_file_records, tcl_words, unwrap_word
+
+# Option order of the canonical command; other options follow sorted by name, then the UNHASHED ones
+CANONICAL_ORDER = ('check', 'module', 'file', 'line', 'object', 'status')
+# Options that do not change what a waiver covers, so they are left out of its hash
+UNHASHED = ('justification',)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class CanonicalWaiver(NamedTuple):
+    digest: str
+    sort_key: tuple
+    text: str                   # command with its options in canonical order, spelled as written
+    source: Tuple[str, int]     # (waiver file, first line of the command)
+
+
+class MergeResult(NamedTuple):
+    waivers: List[CanonicalWaiver]                      # unique waivers, sorted
+    sources: Dict[str, List[Tuple[str, int]]]           # digest -> every (file, line) it was read from
+    read: Dict[str, int]                                # waiver file -> commands read
+    unparsed: List[CanonicalWaiver]                     # commands without -check, kept verbatim
+
+
+def normalize_path(path: str) -> str:
+    """Forward slashes, no '.'/'..'/duplicate separators, no leading './'."""
+    path = path.replace('\\', '/')
+    return os.path.normpath(path).replace(os.sep, '/') if path else path
+
+
+def option_words(text: str, tool_command: str = WAIVER_COMMAND) -> Optional[List[Tuple[str, str, str]]]:
+    """
+    Options of one waiver command as written.
+
+    Returns:
+        list: (option with alias spellings folded, option word, value word or ''), in
+            command order, or None if the text is not a waiver command
+    """
+    words = list(tcl_words(text.strip()))
+    command = tool_command.split()
+    if words[:len(command)] != command:
+        return None
+    options = []
+    rest = words[len(command):]
+    i = 0
+    while i < len(rest):
+        word = rest[i]
+        i += 1
+        if not is_option_word(word):
+            continue
+        name = word[1:].lower()
+        value = ''
+        if i < len(rest) and not is_option_word(rest[i]):
+            value = rest[i]
+            i += 1
+        options.append((OPTION_ALIASES.get(name, name), word, value))
+    return options
+
+
+def canonical_options(text: str, tool_command: str = WAIVER_COMMAND) -> Optional[Dict[str, str]]:
+    """
+    Options of one waiver command, with alias spellings folded and whitespace normalized.
+
+    Returns:
+        dict: option -> value ('' for a flag), or None if the text is not a waiver command
+    """
+    words = option_words(text, tool_command)
+    return None if words is None else _folded(words)
+
+
+def _folded(words: List[Tuple[str, str, str]]) -> Dict[str, str]:
+    options = {}
+    for name, _, value in words:
+        value = _WHITESPACE_RE.sub(' ', unwrap_word(value)).strip()
+        if name == 'file':
+            value = normalize_path(value)
+        options.setdefault(name, value)
+    return options
+
+
+def _quote(value: str) -> str:
+    if '{' not in value and '}' not in value:
+        return f'{{{value}}}'
+    depth = 0
+    for char in value:
+        depth += {'{': 1, '}': -1}.get(char, 0)
+        if depth < 0:
+            break
+    return f'{{{value}}}' if depth == 0 else '"' + value.replace('"', '\\"') + '"'
+
+
+def _option_text(name: str, value: str) -> str:
+    if not value:
+        return f'-{name}'
+    if name == 'line' and value.isdigit():
+        return f'-line {value}'
+    return f'-{name} {_quote(value)}'
+
+
+def _canonical_names(names) -> List[str]:
+    """Option names in CANONICAL_ORDER, then any others sorted by name, then the UNHASHED ones."""
+    ordered = [name for name in CANONICAL_ORDER if name in names]
+    ordered += sorted(name for name in names if name not in CANONICAL_ORDER and name not in UNHASHED)
+    return ordered + [name for name in UNHASHED if name in names]
+
+
+def canonical_text(options: Dict[str, str], tool_command: str = WAIVER_COMMAND) -> str:
+    """Single-line command with the options in canonical order (see _canonical_names)."""
+    return ' '.join([tool_command] + [_option_text(name, options[name]) for name in _canonical_names(options)])
+
+
+def ordered_text(words: List[Tuple[str, str, str]], tool_command: str = WAIVER_COMMAND) -> str:
+    """Command with the option_words() in canonical order, each keeping its option spelling and value text."""
+    rank = {name: i for i, name in enumerate(_canonical_names({name for name, _, _ in words}))}
+    ordered = sorted(words, key=lambda word: rank[word[0]])
+    return ' '.join([tool_command] + [f'{option} {value}' if value else option for _, option, value in ordered])
+
+
+def canonicalize(text: str, source: Tuple[str, int] = ('', 0), tool_command: str = WAIVER_COMMAND) -> Optional[CanonicalWaiver]:
+    """
+    Canonical form of one waiver command, or None if it has no -check.
+
+    The digest covers every option except the UNHASHED ones, so waivers that differ
+    only in option order, alias spelling, whitespace, path spelling or justification
+    hash the same. The aliases only serve that identity: the text keeps the option
+    names and values as written, in canonical order.
+    """
+    words = option_words(text, tool_command)
+    options = _folded(words) if words else None
+    if not options or not options.get('check'):
+        return None
+    for name in UNHASHED:
+        options.pop(name, None)
+    hashed = canonical_text(options, tool_command)
+    digest = blake2b(hashed.encode('utf-8'), digest_size=12).hexdigest()
+    line = options.get('line', '')
+    sort_key = (options['check'], options.get('module', ''), options.get('file', ''),
+                int(line) if line.isdigit() else 0, options.get('object', ''), digest)
+    return CanonicalWaiver(digest, sort_key, ordered_text(words, tool_command), source)
+
+
+def canonicalize_file(path: str, tool_command: str = WAIVER_COMMAND) -> Tuple[List[CanonicalWaiver], List[CanonicalWaiver]]:
+    """
+    Canonicalize every command of one waiver file.
+
+    Returns:
+        tuple: (canonical waivers, commands without -check kept verbatim), in file order
+    """
+    waivers, unparsed = [], []
+    for record in iter_file_records(path, tool_command):
+        waiver = canonicalize(record.text, (path, record.start_line), tool_command)
+        if waiver is None:
+            text = record.stripped_text()
+            digest = blake2b(text.encode('utf-8'), digest_size=12).hexdigest()
+            unparsed.append(CanonicalWaiver(digest, (), text, (path, record.start_line)))
+        else:
+            waivers.append(waiver)
+    return waivers, unparsed
+
+
+def merge_waivers(paths: Sequence[str], executor=None, jobs: Optional[int] = None) -> MergeResult:
+    """
+    Merge waiver files into one deduplicated, deterministically ordered set.
+
+    The files are canonicalized in a process pool (executor, or a new pool of jobs
+    workers), then deduplicated by digest keeping the first occurrence in the order of
+    paths, and sorted by check, module, file, line and object.
+    """
+    paths = list(paths)
+    if executor is None and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(paths))) as pool:
+            return merge_waivers(paths, pool)
+    per_file = list(executor.map(canonicalize_file, paths)) if executor is not None else [canonicalize_file(path) for path in paths]
+
+    unique, sources, read = {}, {}, {}
+    unparsed, seen_unparsed = [], set()
+    for path, (waivers, others) in zip(paths, per_file):
+        read[path] = len(waivers) + len(others)
+        for waiver in waivers:
+            unique.setdefault(waiver.digest, waiver)
+            sources.setdefault(waiver.digest, []).append(waiver.source)
+        for other in others:
+            if other.digest not in seen_unparsed:
+                seen_unparsed.add(other.digest)
+                unparsed.append(other)
+    return MergeResult(sorted(unique.values(), key=lambda waiver: waiver.sort_key), sources, read, unparsed)
+
+
+def write_merged(result: MergeResult, output_path: Union[str, os.PathLike], root: str = '') -> Path:
+    """
+    Write the merged waivers, each under a '# <file>:<line>' comment naming every place it came from.
+
+    Args:
+        result: Result of merge_waivers()
+        output_path: Merged waiver file
+        root: Directory the provenance paths are written relative to (default: absolute paths)
+    """
+    names = {}
+
+    def where(source):
+        path, line = source
+        name = names.get(path)
+        if name is None:
+            name = names[path] = os.path.relpath(path, root) if root else path
+        return f"{name}:{line}"
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        f.write(f"# Merged from {len(result.read)} waiver files: {len(result.waivers)} unique waivers\n\n")
+        for waiver in result.waivers:
+            f.write(f"# {', '.join(where(source) for source in result.sources[waiver.digest])}\n{waiver.text}\n")
+        if result.unparsed:
+            f.write("\n# Commands without -check, kept as written\n")
+            for other in result.unparsed:
+                f.write(f"# {where(other.source)}\n{other.text}\n")
+    return output_path
+
+
+def merge_summary(result: MergeResult) -> str:
+    read = sum(result.read.values())
+    kept = len(result.waivers) + len(result.unparsed)
+    rows = [
+        ['Waiver files', str(len(result.read))],
+        ['Commands read', str(read)],
+        ['Unique waivers', str(len(result.waivers))],
+        ['Without -check (kept verbatim)', str(len(result.unparsed))],
+        ['Duplicates removed', str(read - kept)],
+    ]
+    return StringUtil().table(['Waiver merge', 'Count'], rows, style='round', align=['left', 'right'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge lint waiver files into one canonical, deduplicated and sorted file')
+    parser.add_argument('waiver_files', nargs='+', help='Waiver TCL files, earlier files win on duplicates')
+    parser.add_argument('-o', '--output', required=True, help='Merged waiver file')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    missing = [path for path in args.waiver_files if not os.path.isfile(path)]
+    if missing:
+        print(f"Error: waiver file(s) not found: {', '.join(missing)}")
+        sys.exit(1)
+    result = merge_waivers([os.path.abspath(path) for path in args.waiver_files], jobs=args.jobs)
+    print(merge_summary(result))
+    print(f"Merged file: {write_merged(result, args.output, os.getcwd())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+import os
+import re
+import argparse
+from array import array
+from fnmatch import translate
+from functools import lru_cache
+from collections import Counter
+from typing import List, NamedTuple, Optional, Tuple, Union
+from string_util import StringUtil
+from violation_store import ViolationStore
+from waiver_parser import WAIVER_COMMAND, is_option_word, iter_file_records, tcl_words, unwrap_word
+
+# -option spellings of 'lint report item' -> Waiver field
+OPTION_ALIASES = {
+    'check': 'check', 'checks': 'check', 'rule': 'check',
+    'module': 'module', 'du': 'module', 'design_unit': 'module',
+    'file': 'file', 'filename': 'file',
+    'line': 'line', 'linenumber': 'line',
+    'object': 'object', 'signal': 'object', 'instance': 'object', 'net': 'object', 'path': 'object',
+    'status': 'status',
+    'justification': 'justification', 'comment': 'justification', 'reason': 'justification',
+}
+
+# Only '*' and '?' are wildcards: '[' is literal, so bit-selects like 'u_a.q[3]' match themselves
+_WILDCARD_CHARS = frozenset('*?')
+
+
+class Waiver(NamedTuple):
+    check: str
+    module: str = ''
+    file: str = ''
+    line: int = 0
+    object: str = ''
+    status: str = ''
+    justification: str = ''
+    start_line: int = 0
+    end_line: int = 0
+    start_byte: int = 0
+    end_byte: int = 0
+
+    def key(self) -> tuple:
+        """Fields that decide which violations the waiver covers."""
+        return (self.check, self.module, self.file, self.line, self.object, self.status)
+
+
+def is_wildcard(pattern: str) -> bool:
+    """True if the pattern contains a glob wildcard."""
+    return not _WILDCARD_CHARS.isdisjoint(pattern)
+
+
+def parse_waiver(text: str, start_line: int = 0, end_line: int = 0, start_byte: int = 0, end_byte: int = 0) -> Optional[Waiver]:
+    """Parse the options of one 'lint report item' command; None if it has no -check."""
+    fields = {}
+    words = tcl_words(text)
+    for i, word in enumerate(words):
+        field = OPTION_ALIASES.get(word[1:].lower()) if word[0] == '-' else None
+        if field is None or field in fields:
+            continue
+        value = words[i + 1] if i + 1 < len(words) and not is_option_word(words[i + 1]) else ''
+        fields[field] = unwrap_word(value).strip()
+    if not fields.get('check'):
+        return None
+    try:
+        fields['line'] = int(fields.get('line') or 0)
+    except ValueError:
+        fields['line'] = 0
+    return Waiver(start_line=start_line, end_line=end_line, start_byte=start_byte, end_byte=end_byte, **fields)
+
+
+def load_waivers(path: Union[str, os.PathLike], tool_command: str = WAIVER_COMMAND) -> List[Waiver]:
+    """Parse every waiver of a waiver TCL file."""
+    waivers = (parse_waiver(*record) for record in iter_file_records(path, tool_command))
+    return [waiver for waiver in waivers if waiver is not None]
+
+
+@lru_cache(maxsize=4096)
+def glob_regex(pattern: str):
+    """Compiled regex of a waiver glob: '*' and '?' are wildcards, '[' and ']' are literal."""
+    return re.compile(translate(pattern.replace('[', '[[]')))
+
+
+def glob_match(pattern: str, value: str) -> bool:
+    """Waiver field match: empty matches anything, '*'/'?' use glob rules, otherwise exact."""
+    if not pattern:
+        return True
+    return glob_regex(pattern).match(value) is not None if is_wildcard(pattern) else pattern == value
+
+
+def _file_matches(pattern: str, value: str) -> bool:
+    """Waiver -file without a directory matches on the basename of the violation's file."""
+    if pattern and '/' not in pattern:
+        value = os.path.basename(value)
+    return glob_match(pattern, value)
+
+
+class _PatternMap:
+    """
+    Items keyed by a glob pattern; lookup(value) returns the items of every pattern matching value.
+
+    Exact patterns are a dict lookup, the empty pattern matches anything and each distinct
+    wildcard pattern is compiled once.
+    """
+
+    def __init__(self):
+        self.exact = {}
+        self.any = []
+        self.wild = {}
+
+    def add(self, pattern: str, item) -> None:
+        if not pattern:
+            self.any.append(item)
+        elif is_wildcard(pattern):
+            self.wild.setdefault(pattern, (glob_regex(pattern).match, []))[1].append(item)
+        else:
+            self.exact.setdefault(pattern, []).append(item)
+
+    def lookup(self, value: str) -> List:
+        found = self.exact.get(value, [])[:]
+        found.extend(self.any)
+        for match, items in self.wild.values():
+            if match(value):
+                found.extend(items)
+        return found
+
+
+class _Bucket:
+    """Waivers of one (check, module) pair, keyed by object pattern, with per-object results cached."""
+
+    def __init__(self, waivers: List[Waiver], wids: List[int]):
+        self.objects = _PatternMap()
+        for wid in wids:
+            self.objects.add(waivers[wid].object, wid)
+        self.cache = {}
+
+    def for_object(self, object_id: int, obj: str) -> List[int]:
+        wids = self.cache.get(object_id)
+        if wids is None:
+            wids = self.cache[object_id] = sorted(self.objects.lookup(obj))
+        return wids
+
+
+class WaiverIndex:
+    """
+    Waivers indexed by check, then module, then object.
+
+    Every level is a _PatternMap, so exact names are dict lookups and each distinct
+    wildcard is matched once per distinct name. Candidate waivers are resolved once per
+    distinct (check, module) pair and once per object within it, which keeps coverage
+    of a large report near linear.
+    """
+
+    def __init__(self, waivers: List[Waiver]):
+        self.waivers = list(waivers)
+        self._checks = _PatternMap()    # check pattern -> _PatternMap(module pattern -> waiver id)
+        modules = {}
+        for wid, waiver in enumerate(self.waivers):
+            module_map = modules.get(waiver.check)
+            if module_map is None:
+                module_map = modules[waiver.check] = _PatternMap()
+                self._checks.add(waiver.check, module_map)
+            module_map.add(waiver.module, wid)
+
+    def candidates(self, check: str, module: str) -> List[int]:
+        """Waiver ids whose check and module match, in file order."""
+        found = []
+        for module_map in self._checks.lookup(check):
+            found.extend(module_map.lookup(module))
+        found.sort()
+        return found
+
+    def matches(self, wid: int, check: str, module: str, file: str, line: int, obj: str) -> bool:
+        """True if waiver wid covers the violation."""
+        waiver = self.waivers[wid]
+        return (glob_match(waiver.check, check) and glob_match(waiver.module, module)
+                and (not waiver.line or waiver.line == line)
+                and _file_matches(waiver.file, file) and glob_match(waiver.object, obj))
+
+    def coverage(self, store: ViolationStore) -> 'WaiverCoverage':
+        """Match every violation of the store against the waivers."""
+        waivers = self.waivers
+        hits = array('I', bytes(4 * len(waivers)))         # violations matched by each waiver
+        first_hits = array('I', bytes(4 * len(waivers)))   # violations where the waiver is the first match
+        waived = 0
+        unwaived = Counter()
+
+        checks, modules, files = (store.values(field) for field in ('check', 'module', 'file'))
+        objects = store.values('object')
+        buckets = {}
+        columns = zip(store.column('check'), store.column('module'), store.column('file'),
+                      store.column('line'), store.column('object'))
+        for check_id, module_id, file_id, line, object_id in columns:
+            bucket = buckets.get((check_id, module_id))
+            if bucket is None:
+                bucket = buckets[(check_id, module_id)] = _Bucket(waivers, self.candidates(checks[check_id], modules[module_id]))
+            first = True
+            for wid in bucket.for_object(object_id, objects[object_id]):
+                waiver = waivers[wid]
+                if waiver.line and waiver.line != line or waiver.file and not _file_matches(waiver.file, files[file_id]):
+                    continue
+                hits[wid] += 1
+                if first:
+                    first_hits[wid] += 1
+                    first = False
+            if first:
+                unwaived[checks[check_id]] += 1
+            else:
+                waived += 1
+        return WaiverCoverage(self.waivers, hits, first_hits, waived, unwaived)
+
+
+class WaiverCoverage(NamedTuple):
+    waivers: List[Waiver]
+    hits: array
+    first_hits: array
+    waived: int
+    unwaived: Counter
+
+    def unused(self) -> List[Waiver]:
+        """Waivers that match no violation."""
+        return [w for w, count in zip(self.waivers, self.hits) if not count]
+
+    def shadowed(self) -> List[Waiver]:
+        """Waivers whose violations are all already matched by an earlier waiver."""
+        return [w for w, count, first in zip(self.waivers, self.hits, self.first_hits) if count and not first]
+
+    def duplicates(self) -> List[Tuple[Waiver, Waiver]]:
+        """(duplicate, original) pairs of waivers with identical options."""
+        seen = {}
+        pairs = []
+        for waiver in self.waivers:
+            original = seen.setdefault(waiver.key(), waiver)
+            if original is not waiver:
+                pairs.append((waiver, original))
+        return pairs
+
+    def summary(self) -> str:
+        rows = [
+            ['Waivers', str(len(self.waivers))],
+            ['Used', str(sum(1 for count in self.hits if count))],
+            ['Unused', str(len(self.unused()))],
+            ['Shadowed by an earlier waiver', str(len(self.shadowed()))],
+            ['Exact duplicates', str(len(self.duplicates()))],
+            ['Violations waived', str(self.waived)],
+            ['Violations not waived', str(sum(self.unwaived.values()))],
+        ]
+        return StringUtil().table(['Waiver coverage', 'Count'], rows, style='round', align=['left', 'right'])
+
+
+def _describe(waiver: Waiver) -> str:
+    parts = [f'-{field} {value}' for field, value in zip(Waiver._fields[1:5], waiver[1:5]) if value]
+    return f'line {waiver.start_line}: {waiver.check} ' + ' '.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Match lint waivers against a lint JSON/CSV report without a tool license')
+    parser.add_argument('-w', '--waiver', nargs='+', required=True, help='Waiver TCL file(s)')
+    parser.add_argument('-r', '--report', nargs='+', required=True, help='Lint JSON/CSV report(s) of the run without waivers applied')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List unused, shadowed and duplicate waivers')
+    args = parser.parse_args()
+
+    waivers = [waiver for path in args.waiver for waiver in load_waivers(path)]
+    store = ViolationStore.from_file(*args.report)
+    result = WaiverIndex(waivers).coverage(store)
+    print(result.summary())
+
+    if args.verbose:
+        for title, entries in (('Unused', result.unused()), ('Shadowed', result.shadowed())):
+            print(f'\n{title} waivers ({len(entries)}):')
+            for waiver in entries:
+                print(f'  {_describe(waiver)}')
+        print(f'\nDuplicate waivers ({len(result.duplicates())}):')
+        for waiver, original in result.duplicates():
+            print(f'  {_describe(waiver)} (same as line {original.start_line})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import time
+import shutil
+import resource
+import argparse
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+WAIVER_COMMAND = 'lint report item'
+# One flat word: {braced} without nested braces, "quoted" or bare
+_FLAT_WORD = r'\{[^{}\\]*\}|"[^"\\]*(?:\\.[^"\\]*)*"|(?:[^\s\\{"]|\\[^\r\n])[^\s\\]*(?:\\[^\r\n][^\s\\]*)*'
+_FLAT_WORD_RE = re.compile(_FLAT_WORD)
+_SEPARATORS = r'(?:\s|\\\r?\n)*'
+_SEPARATORS_RE = re.compile(_SEPARATORS)
+# Separators, then one flat word if any
+_WORD_RE = re.compile(rf'{_SEPARATORS}({_FLAT_WORD})?')
+
+
+class WaiverRecord(NamedTuple):
+    text: str
+    start_line: int     # 1-based, inclusive
+    end_line: int       # 1-based, inclusive
+    start_byte: int     # offset of the first byte of start_line
+    end_byte: int       # offset just past the newline of end_line
+
+    def stripped_text(self) -> str:
+        """Command with each line stripped, as lint_report_item.extract_tool_commands returns it."""
+        return '\n'.join(line.strip() for line in self.text.splitlines())
+
+
+def iter_records(lines: Iterable[bytes], tool_command: str = WAIVER_COMMAND) -> Iterator[WaiverRecord]:
+    """
+    Yield a WaiverRecord for every waiver command in a stream of raw lines.
+
+    A command starts on a line beginning with tool_command. It ends on a line ending
+    with '}' once its braces are balanced, unless the next line still continues it
+    (starts with '-' or '}'), so neither a '}' inside a justification nor a braced
+    option value ends it early. A blank or comment line outside braces, or the next
+    command, also ends it. Only the lines of the current command are held in memory.
+
+    Args:
+        lines: Raw lines including their line endings (e.g. a file opened in 'rb' mode)
+        tool_command: Command that starts a waiver
+    """
+    command = tool_command.encode()
+    block = []
+    start_line = start_byte = depth = 0
+    continued = closed = False
+    offset = 0
+    for i, raw in enumerate(lines, 1):
+        stripped = raw.strip()
+        starts = stripped.startswith(command)
+        if block and (closed or depth <= 0 and not continued):
+            if starts or not stripped.startswith((b'-', b'}')):
+                yield WaiverRecord(b''.join(block).decode('utf-8', 'replace'), start_line, i - 1, start_byte, offset)
+                block = []
+        if starts:
+            if block:
+                yield WaiverRecord(b''.join(block).decode('utf-8', 'replace'), start_line, i - 1, start_byte, offset)
+            block, start_line, start_byte, depth = [], i, offset, 0
+        if block or starts:
+            block.append(raw)
+            depth += stripped.count(b'{') - stripped.count(b'}')
+            continued = stripped.endswith(b'\\')
+            closed = depth <= 0 and stripped.endswith(b'}')
+        offset += len(raw)
+    if block:
+        yield WaiverRecord(b''.join(block).decode('utf-8', 'replace'), start_line, start_line + len(block) - 1, start_byte, offset)
+
+
+def iter_file_records(path: Union[str, os.PathLike], tool_command: str = WAIVER_COMMAND) -> Iterator[WaiverRecord]:
+    """Stream the waiver records of a file."""
+    with open(path, 'rb') as f:
+        yield from iter_records(f, tool_command)
+
+
+def iter_text_records(content: str, tool_command: str = WAIVER_COMMAND) -> Iterator[WaiverRecord]:
+    """Waiver records of an in-memory text; byte offsets refer to its UTF-8 encoding."""
+    return iter_records(content.encode('utf-8').splitlines(True), tool_command)
+
+
+def tcl_words(text: str) -> List[str]:
+    """
+    Split a Tcl command into its words.
+
+    Braced words keep nested braces, quoted words may contain spaces and a
+    backslash-newline is a word separator; the enclosing braces/quotes are kept.
+    A command of flat words only is split by one regex pass; otherwise it is walked
+    word by word and nested braces are scanned by hand.
+    """
+    words = _FLAT_WORD_RE.findall(text)
+    if _SEPARATORS_RE.fullmatch(_FLAT_WORD_RE.sub(' ', text)):
+        return words
+    words = []
+    i, n = 0, len(text)
+    while i < n:
+        m = _WORD_RE.match(text, i)
+        i = m.end()
+        if m.lastindex:
+            words.append(m.group(1))
+            continue
+        if i >= n:
+            break
+        start, depth = i, 0
+        while i < n:
+            char = text[i]
+            if char == '\\':
+                i += 2
+                continue
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+            i += 1
+            if depth == 0:
+                break
+        words.append(text[start:i])
+    return words
+
+
+def unwrap_word(word: str) -> str:
+    """Word without its enclosing braces or quotes."""
+    if len(word) >= 2 and (word[0], word[-1]) in (('{', '}'), ('"', '"')):
+        return word[1:-1]
+    return word
+
+
+def is_option_word(word: str) -> bool:
+    """True for a -option word (not a negative number)."""
+    return word.startswith('-') and len(word) > 1 and not word[1].isdigit()
+
+
+class WaiverEditor:
+    """
+    Collects splices on a waiver file and applies them in one streaming pass.
+
+    Each edit replaces the byte range [start, end) of the original file. The file is copied
+    chunk by chunk into a temporary file in the same directory with the edits spliced in,
+    then moved over the target with os.replace, so the rewrite is atomic and the file is
+    never held in memory.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = Path(path)
+        self._edits = []
+
+    def remove(self, record: WaiverRecord) -> None:
+        self._edits.append((record.start_byte, record.end_byte, b''))
+
+    def replace(self, record: WaiverRecord, text: str) -> None:
+        self._edits.append((record.start_byte, record.end_byte, _as_line(text)))
+
+    def insert(self, offset: int, text: str) -> None:
+        self._edits.append((offset, offset, _as_line(text)))
+
+    def move(self, record: WaiverRecord, offset: int) -> None:
+        """Move a record to a byte offset of the original file (e.g. another record's start_byte)."""
+        self.remove(record)
+        self.insert(offset, record.text)
+
+    def __len__(self) -> int:
+        return len(self._edits)
+
+    def apply(self, output_path: Optional[Union[str, os.PathLike]] = None, chunk_size: int = 1 << 20) -> Path:
+        """
+        Write the edited file to output_path (default: in place) and return its path.
+
+        Raises:
+            ValueError: if two edits overlap
+        """
+        output_path = Path(output_path) if output_path is not None else self.path
+        edits = sorted(self._edits, key=lambda edit: (edit[0], edit[1]))
+        for (_, prev_end, _), (start, _, _) in zip(edits, edits[1:]):
+            if start < prev_end:
+                raise ValueError(f"Overlapping edits at byte {start} of {self.path}")
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, prefix=f'.{output_path.name}.')
+        try:
+            with open(self.path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                pos = 0
+                for start, end, data in edits:
+                    _copy_range(src, dst, start - pos, chunk_size)
+                    dst.write(data)
+                    src.seek(end)
+                    pos = end
+                shutil.copyfileobj(src, dst, chunk_size)
+            if output_path.exists():
+                shutil.copymode(output_path, tmp_path)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._edits = []
+        return output_path
+
+
+def _as_line(text: str) -> bytes:
+    data = text.encode('utf-8')
+    return data if data.endswith(b'\n') else data + b'\n'
+
+
+def _copy_range(src: BinaryIO, dst: BinaryIO, size: int, chunk_size: int) -> None:
+    while size > 0:
+        data = src.read(min(size, chunk_size))
+        if not data:
+            break
+        dst.write(data)
+        size -= len(data)
+
+
+def remove_records(
+    path: Union[str, os.PathLike],
+    predicate,
+    output_path: Optional[Union[str, os.PathLike]] = None,
+    tool_command: str = WAIVER_COMMAND
+) -> Tuple[int, int, Path]:
+    """
+    Remove every waiver record for which predicate(record) is true.
+
+    Returns:
+        tuple: (removed records, kept records, output path)
+    """
+    editor = WaiverEditor(path)
+    kept = 0
+    for record in iter_file_records(path, tool_command):
+        if predicate(record):
+            editor.remove(record)
+        else:
+            kept += 1
+    removed = len(editor)
+    return removed, kept, editor.apply(output_path)
+
+
+def benchmark(lines: int = 500000, directory: Optional[str] = None) -> None:
+    """Generate a waiver file of about `lines` lines, then time streaming parse and a 10% removal splice."""
+    directory = directory or tempfile.mkdtemp(prefix='waiver_bench_')
+    path = Path(directory) / 'bench_lint_waivers.tcl'
+    with open(path, 'w') as f:
+        written = i = 0
+        while written < lines:
+            if i % 2:
+                f.write(f"lint report item -check {{check_{i % 97}}} -module {{mod_{i % 1013}}} -line {i % 2000} -status {{waived}}\n")
+                written += 1
+            else:
+                f.write(f"# waiver {i}\nlint report item \\\n  -check {{check_{i % 97}}} \\\n  -module {{mod_{i % 1013}}} \\\n"
+                        f"  -object {{u_top.u_{i % 31}.sig_{i}}} \\\n  -status {{waived}} \\\n  -justification {{reviewed {{ok}}}}\n")
+                written += 7
+            i += 1
+    size = path.stat().st_size
+    print(f"Benchmark file: {path} ({written} lines, {size / 1e6:.1f} MB)")
+
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_file_records(path))
+    parse_time = time.perf_counter() - start
+    print(f"Parse: {count} waivers in {parse_time:.2f} s ({written / parse_time / 1e6:.2f} M lines/s)")
+
+    start = time.perf_counter()
+    removed, kept, _ = remove_records(path, lambda record: record.start_line % 10 == 0, Path(directory) / 'bench_cleaned.tcl')
+    print(f"Splice: removed {removed}, kept {kept} in {time.perf_counter() - start:.2f} s")
+    print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming lint waiver parser')
+    parser.add_argument('waiver_file', nargs='?', help='Waiver TCL file to list')
+    parser.add_argument('--benchmark', type=int, nargs='?', const=500000, default=0, help='Run the parser benchmark on an N-line file (default 500000)')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+    elif args.waiver_file:
+        for record in iter_file_records(args.waiver_file):
+            print(f"{record.start_line}-{record.end_line} [{record.start_byte}:{record.end_byte}] {record.stripped_text().splitlines()[0]}")
+    else:
+        parser.print_usage()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import argparse
+from bisect import bisect_right
+from subprocess import run, check_output, CalledProcessError, DEVNULL
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple, Union
+from string_util import StringUtil
+from waiver_model import parse_waiver
+from waiver_parser import WaiverEditor, WaiverRecord, iter_file_records
+
+_HUNK_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+_LINE_OPTION_RE = re.compile(r'(-line\s+\{?\s*)(\d+)(\s*\}?)')
+# Comment recording the commit the -line values of a waiver file were last rebased to
+BASE_MARKER = '# waiver_rebase base:'
+_BASE_RE = re.compile(rb'^# waiver_rebase base: *([0-9a-fA-F]{7,40})[^\n]*(?:\n|$)', re.MULTILINE)
+
+
+class LineMap:
+    """
+    Old -> new line numbers of one file, built from its 'git diff -U0' hunks.
+
+    Hunks are kept sorted by the first old line they shift, with the cumulative shift after
+    each hunk, so every lookup is a bisect.
+    """
+
+    def __init__(self, hunks: List[Tuple[int, int, int, int]]):
+        self._first = []        # first old line shifted by the hunk
+        self._modified_end = [] # last old line changed by the hunk (first - 1 for pure insertions)
+        self._shift = []        # cumulative new - old after the hunk
+        shift = 0
+        for old_start, old_count, new_start, new_count in sorted(hunks):
+            shift += new_count - old_count
+            first = old_start if old_count else old_start + 1
+            self._first.append(first)
+            self._modified_end.append(old_start + old_count - 1 if old_count else first - 1)
+            self._shift.append(shift)
+
+    def map(self, line: int) -> Optional[int]:
+        """New number of an old line, or None if the line itself was changed or deleted."""
+        i = bisect_right(self._first, line) - 1
+        if i < 0:
+            return line
+        if line <= self._modified_end[i]:
+            return None
+        return line + self._shift[i]
+
+
+def git_root(path: Union[str, os.PathLike] = '.') -> str:
+    return check_output(['git', '-C', str(path), 'rev-parse', '--show-toplevel'], text=True, stderr=DEVNULL).strip()
+
+
+def last_commit(path: Union[str, os.PathLike], repo: str) -> str:
+    """Last commit that touched path ('' if never committed)."""
+    try:
+        return check_output(['git', '-C', repo, 'log', '-1', '--format=%H', '--', os.path.abspath(path)],
+                            text=True, stderr=DEVNULL).strip()
+    except CalledProcessError:
+        return ''
+
+
+def head_commit(repo: str) -> str:
+    return check_output(['git', '-C', repo, 'rev-parse', 'HEAD'], text=True, stderr=DEVNULL).strip()
+
+
+def recorded_base(path: Union[str, os.PathLike]) -> Tuple[str, Optional[WaiverRecord]]:
+    """Commit of the BASE_MARKER comment of a waiver file and the marker line as a record, ('', None) without one."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    m = _BASE_RE.search(content)
+    if m is None:
+        return '', None
+    line = content.count(b'\n', 0, m.start()) + 1
+    return m.group(1).decode(), WaiverRecord(m.group().decode(), line, line, m.start(), m.end())
+
+
+def uncommitted(repo: str, files: List[str]) -> bool:
+    """True if any of the files differs from HEAD in the working tree or index."""
+    return bool(files) and run(['git', '-C', repo, 'diff', '--quiet', 'HEAD', '--', *files], stderr=DEVNULL).returncode == 1
+
+
+def diff_line_maps(repo: str, base: str, files: List[str]) -> Tuple[Dict[str, LineMap], Set[str]]:
+    """
+    Run a single 'git diff -U0 base' over all files and build one LineMap per file.
+
+    Args:
+        repo: Git root
+        base: Commit the waivers were written against
+        files: Paths relative to repo
+
+    Returns:
+        tuple: ({path relative to repo: LineMap} (files without changes map lines to
+            themselves), paths deleted since base)
+    """
+    hunks = {path: [] for path in files}
+    deleted = set()
+    if files:
+        output = check_output(['git', '-C', repo, 'diff', '-U0', '--no-color', '--no-ext-diff', '--no-renames', base, '--', *files],
+                              text=True, errors='replace')
+        current = old = None
+        for line in output.splitlines():
+            if line.startswith('--- '):
+                old = line[6:] if line.startswith('--- a/') else None
+            elif line.startswith('+++ '):
+                current = line[6:] if line.startswith('+++ b/') else None
+                if current is None and old is not None:
+                    deleted.add(old)
+            elif line.startswith('@@') and current is not None:
+                m = _HUNK_RE.match(line)
+                if m:
+                    old_start, old_count, new_start, new_count = m.groups()
+                    hunks.setdefault(current, []).append((
+                        int(old_start), 1 if old_count is None else int(old_count),
+                        int(new_start), 1 if new_count is None else int(new_count),
+                    ))
+    return {path: LineMap(file_hunks) for path, file_hunks in hunks.items()}, deleted
+
+
+class FileResolver:
+    """Map a waiver -file value onto a tracked file of the repo (absolute path, repo path or longest matching suffix).
+
+    With a commit, the files of that commit are used instead of the index.
+    """
+
+    def __init__(self, repo: str, commit: Optional[str] = None):
+        self.repo = repo
+        self._by_name = {}
+        command = ['ls-tree', '-r', '--name-only', commit] if commit else ['ls-files']
+        tracked = check_output(['git', '-C', repo, *command], text=True, stderr=DEVNULL).splitlines()
+        for path in tracked:
+            self._by_name.setdefault(os.path.basename(path), []).append(path)
+
+    def resolve(self, name: str) -> Optional[str]:
+        if os.path.isabs(name) and name.startswith(self.repo + os.sep):
+            name = os.path.relpath(name, self.repo)
+        candidates = self._by_name.get(os.path.basename(name), [])
+        if name in candidates:
+            return name
+        parts = name.split('/')
+        best, best_len = None, 0
+        for candidate in candidates:
+            common = 0
+            for a, b in zip(reversed(candidate.split('/')), reversed(parts)):
+                if a != b:
+                    break
+                common += 1
+            if common > best_len:
+                best, best_len = candidate, common
+            elif common == best_len:
+                best = None   # ambiguous
+        return best
+
+
+class RebaseResult(NamedTuple):
+    anchored: int
+    shifted: int
+    unchanged: int
+    modified: List[Tuple[str, int, str, int]]       # (waiver file, waiver line, rtl file, anchor line)
+    unresolved: List[Tuple[str, int, str]]          # (waiver file, waiver line, -file value)
+    deleted: List[Tuple[str, int, str]]             # (waiver file, waiver line, rtl file deleted since the base)
+    uncommitted: bool                               # the RTL has uncommitted changes, nothing was rewritten
+
+
+def rebase_waivers(
+    waiver_files: List[str],
+    base: Optional[str] = None,
+    repo: Optional[str] = None,
+    dry_run: bool = False
+) -> RebaseResult:
+    """
+    Rewrite the -line of line-anchored waivers to follow the RTL changes since base.
+
+    All waiver files are parsed first, the RTL files they reference are diffed in a single
+    git call, and each waiver file is then rewritten once with splices. A rewritten file
+    records HEAD in a BASE_MARKER comment, so the next run starts from there instead of
+    applying the same changes again. Because that marker is a commit, nothing is rewritten
+    while the referenced RTL files have uncommitted changes.
+
+    Args:
+        waiver_files: Waiver TCL files
+        base: Commit the waivers are valid for (default: the BASE_MARKER commit of each
+            waiver file, else its last commit)
+        repo: Git root (default: the repo of the first waiver file)
+        dry_run: Only report, do not rewrite the waiver files
+    """
+    repo = repo or git_root(os.path.dirname(os.path.abspath(waiver_files[0])))
+    resolver = FileResolver(repo)
+    base_resolvers = {}     # files deleted since the base only resolve in the base commit
+
+    anchored = {}   # (waiver file, base) -> [(record, waiver, rtl path)]
+    markers = {}    # waiver file -> (recorded base, marker record)
+    unresolved = []
+    for waiver_file in waiver_files:
+        markers[waiver_file] = recorded_base(waiver_file)
+        file_base = base or markers[waiver_file][0] or last_commit(waiver_file, repo) or 'HEAD'
+        for record in iter_file_records(waiver_file):
+            waiver = parse_waiver(*record)
+            if waiver is None or not waiver.line:
+                continue
+            rtl = resolver.resolve(waiver.file) if waiver.file else None
+            if rtl is None and waiver.file:
+                if file_base not in base_resolvers:
+                    base_resolvers[file_base] = FileResolver(repo, file_base)
+                rtl = base_resolvers[file_base].resolve(waiver.file)
+            if rtl is None:
+                unresolved.append((waiver_file, record.start_line, waiver.file or '-'))
+                continue
+            anchored.setdefault((waiver_file, file_base), []).append((record, waiver, rtl))
+
+    line_maps, deleted_files = {}, {}
+    for commit in {file_base for _, file_base in anchored}:
+        files = sorted({rtl for (_, file_base), entries in anchored.items() if file_base == commit for _, _, rtl in entries})
+        line_maps[commit], deleted_files[commit] = diff_line_maps(repo, commit, files)
+    head = head_commit(repo) if anchored else ''
+    rtl_files = sorted({rtl for entries in anchored.values() for _, _, rtl in entries})
+    dirty = uncommitted(repo, rtl_files)
+    write = not dry_run and not dirty
+
+    shifted = unchanged = 0
+    modified, deleted = [], []
+    for (waiver_file, file_base), entries in anchored.items():
+        editor = WaiverEditor(waiver_file)
+        for record, waiver, rtl in entries:
+            if rtl in deleted_files[file_base]:
+                deleted.append((waiver_file, record.start_line, rtl))
+                continue
+            new_line = line_maps[file_base][rtl].map(waiver.line)
+            if new_line is None:
+                modified.append((waiver_file, record.start_line, rtl, waiver.line))
+            elif new_line == waiver.line:
+                unchanged += 1
+            else:
+                shifted += 1
+                text = _LINE_OPTION_RE.sub(lambda m: f'{m.group(1)}{new_line}{m.group(3)}', record.text, count=1)
+                editor.replace(record, text)
+        recorded, marker = markers[waiver_file]
+        if write and recorded != head:
+            if marker is None:
+                editor.insert(0, f'{BASE_MARKER} {head}\n')
+            else:
+                editor.replace(marker, f'{BASE_MARKER} {head}\n')
+        if len(editor) and write:
+            editor.apply()
+    return RebaseResult(sum(len(entries) for entries in anchored.values()), shifted, unchanged, modified, unresolved,
+                        deleted, dirty)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move line-anchored lint waivers along with the RTL changes since a commit')
+    parser.add_argument('waiver_files', nargs='+', help='Waiver TCL files')
+    parser.add_argument('-b', '--base', default=None, help=f"Commit the waivers were written for (default: the '{BASE_MARKER}' comment of each waiver file, else its last commit)")
+    parser.add_argument('--repo', default=None, help='Git root of the RTL (default: repo of the first waiver file)')
+    parser.add_argument('-n', '--dry_run', action='store_true', help='Report only, do not rewrite the waiver files')
+    args = parser.parse_args()
+
+    try:
+        result = rebase_waivers(args.waiver_files, args.base, args.repo, args.dry_run)
+    except CalledProcessError as e:
+        print(f"Error: git failed: {e}")
+        sys.exit(1)
+
+    rows = [
+        ['Line-anchored waivers', str(result.anchored)],
+        ['Shifted' + (' (not written)' if args.dry_run or result.uncommitted else ''), str(result.shifted)],
+        ['Unchanged', str(result.unchanged)],
+        ['Anchor line modified', str(len(result.modified))],
+        ['-file not found in repo', str(len(result.unresolved))],
+        ['-file deleted since the base', str(len(result.deleted))],
+    ]
+    print(StringUtil().table(['Waiver rebase', 'Count'], rows, style='round', align=['left', 'right']))
+    for waiver_file, line, rtl, anchor in result.modified:
+        print(f"  {waiver_file}:{line}: anchor {rtl}:{anchor} was modified, review the waiver")
+    for waiver_file, line, name in result.unresolved:
+        print(f"  {waiver_file}:{line}: -file {name} not found")
+    for waiver_file, line, rtl in result.deleted:
+        print(f"  {waiver_file}:{line}: -file {rtl} was deleted, the waiver is dangling")
+    if result.uncommitted and not args.dry_run:
+        print("Error: the RTL has uncommitted changes, commit them before rebasing the waivers")
+        sys.exit(1)
+    if result.modified or result.deleted:
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
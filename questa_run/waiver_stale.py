@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import argparse
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from string_util import StringUtil
+from filelist import read_filelist
+from waiver_model import load_waivers, is_wildcard
+
+# Bit/part selects and array indices at the end of an object name
+_SELECT_RE = re.compile(r'(\s*\[[^\]]*\])+$')
+_INDEX_CACHE_SIZE = 256
+
+
+class LineIndex:
+    """
+    Byte offsets of the line starts of one source file.
+
+    Built once per file (lines are found by C-level splitlines, not a Python loop),
+    so any number of waivers can look up their line by a bisect/array access.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offsets = array('Q', [0])
+        self.offsets.extend(accumulate(map(len, data.splitlines(True))))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'LineIndex':
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def line_bytes(self, number: int) -> bytes:
+        """Raw 1-based line (b'' beyond the end of the file)."""
+        if not 1 <= number <= len(self):
+            return b''
+        return self.data[self.offsets[number - 1]:self.offsets[number]]
+
+    def line(self, number: int) -> str:
+        return self.line_bytes(number).decode('utf-8', 'replace')
+
+    def line_of(self, offset: int) -> int:
+        """1-based line containing a byte offset."""
+        return bisect_right(self.offsets, offset)
+
+    def find(self, pattern: 're.Pattern') -> List[int]:
+        """1-based lines with a match of a bytes regex."""
+        lines = []
+        for m in pattern.finditer(self.data):
+            line = self.line_of(m.start())
+            if not lines or lines[-1] != line:
+                lines.append(line)
+        return lines
+
+
+_index_cache = OrderedDict()     # (path, size, mtime_ns) -> LineIndex, per process
+
+
+def line_index(path: str) -> LineIndex:
+    """LineIndex of a file, cached per process until the file changes."""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    index = _index_cache.get(key)
+    if index is None:
+        index = _index_cache[key] = LineIndex.from_file(path)
+        if len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    else:
+        _index_cache.move_to_end(key)
+    return index
+
+
+class StaleWaiver(NamedTuple):
+    waiver_file: str
+    waiver_line: int
+    reason: str         # 'file not found', 'line beyond end of file', 'object not on line'
+    detail: str
+
+
+def expected_name(obj: str) -> str:
+    """Identifier a waiver's -object should find on its -line: last hierarchy level without selects ('' if not checkable)."""
+    name = _SELECT_RE.sub('', obj.strip()).rsplit('.', 1)[-1].rsplit('/', 1)[-1].strip()
+    if not name or is_wildcard(name):
+        return ''
+    return name[1:] if name.startswith('\\') else name
+
+
+class SourceResolver:
+    """Map a waiver -file value onto a source of the filelist: exact path, else the longest matching path suffix."""
+
+    def __init__(self, files: Sequence[str]):
+        self._by_name = {}
+        for path in files:
+            self._by_name.setdefault(os.path.basename(path), []).append(path)
+
+    def resolve(self, name: str, base_dirs: Sequence[str] = ()) -> Optional[str]:
+        if os.path.isabs(name) and os.path.isfile(name):
+            return name
+        candidates = self._by_name.get(os.path.basename(name), [])
+        parts = name.replace('\\', '/').split('/')
+        best, best_len = None, 0
+        for candidate in candidates:
+            common = 0
+            for a, b in zip(reversed(candidate.split(os.sep)), reversed(parts)):
+                if a != b:
+                    break
+                common += 1
+            if common > best_len:
+                best, best_len = candidate, common
+        if best is not None:
+            return best
+        for base in base_dirs:
+            path = os.path.join(base, name)
+            if os.path.isfile(path):
+                return os.path.abspath(path)
+        return None
+
+
+def check_source(path: str, checks: List[Tuple[int, int, str]]) -> List[Tuple[int, str, str]]:
+    """
+    Check the line anchors of the waivers pointing at one source file.
+
+    Args:
+        path: Source file
+        checks: (waiver id, -line, expected name) of every waiver on this file
+
+    Returns:
+        list: (waiver id, reason, detail) of the stale ones
+    """
+    try:
+        index = line_index(path)
+    except OSError as e:
+        return [(wid, 'file not found', str(e)) for wid, _, _ in checks]
+    stale = []
+    patterns = {}
+    for wid, line, name in checks:
+        if line > len(index):
+            stale.append((wid, 'line beyond end of file', f"{os.path.basename(path)} has {len(index)} lines"))
+            continue
+        if not name:
+            continue
+        pattern = patterns.get(name)
+        if pattern is None:
+            pattern = patterns[name] = re.compile(rb'(?<![\w$])' + re.escape(name.encode()) + rb'(?![\w$])')
+        if line and pattern.search(index.line_bytes(line)):
+            continue
+        found = index.find(pattern)
+        if not line and found:
+            continue
+        where = f"'{name}' now on line {', '.join(map(str, found[:5]))}" if found else f"'{name}' not found in {os.path.basename(path)}"
+        stale.append((wid, 'object not on line', where))
+    return stale
+
+
+def _check_sources(batch: List[Tuple[str, List[Tuple[int, int, str]]]]) -> List[Tuple[int, str, str]]:
+    return [result for path, checks in batch for result in check_source(path, checks)]
+
+
+def find_stale(
+    waiver_files: Sequence[str],
+    sources: Sequence[str] = (),
+    jobs: Optional[int] = None
+) -> Tuple[Dict[str, int], List[StaleWaiver]]:
+    """
+    Find the waivers whose -file no longer exists or whose -line no longer holds their -object.
+
+    Waivers are grouped by source file and the files are checked in a process pool, so
+    each source is read and indexed once however many waivers point at it.
+
+    Args:
+        waiver_files: Waiver TCL files
+        sources: Source files of the design (e.g. read_filelist(filelist.f).files) to resolve -file against
+        jobs: Worker processes (default: one per CPU)
+
+    Returns:
+        tuple: ({waiver file: waivers checked}, stale waivers in waiver file/line order)
+    """
+    resolver = SourceResolver(sources)
+    waivers = []        # (waiver file, Waiver)
+    stale = []
+    by_source = {}
+    checked = {}
+    for waiver_file in waiver_files:
+        loaded = [waiver for waiver in load_waivers(waiver_file) if waiver.file and not is_wildcard(waiver.file)]
+        checked[waiver_file] = len(loaded)
+        base_dirs = (os.path.dirname(os.path.abspath(waiver_file)), os.getcwd())
+        for waiver in loaded:
+            path = resolver.resolve(waiver.file, base_dirs)
+            if path is None:
+                stale.append(StaleWaiver(waiver_file, waiver.start_line, 'file not found', waiver.file))
+                continue
+            by_source.setdefault(path, []).append((len(waivers), waiver.line, expected_name(waiver.object)))
+            waivers.append((waiver_file, waiver))
+
+    items = sorted(by_source.items())
+    workers = min(jobs or os.cpu_count() or 1, max(len(items), 1))
+    batches = [items[i::workers * 4] for i in range(workers * 4)] if workers > 1 else [items]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = [result for batch in executor.map(_check_sources, batches) for result in batch]
+    else:
+        results = _check_sources(items)
+    for wid, reason, detail in results:
+        waiver_file, waiver = waivers[wid]
+        stale.append(StaleWaiver(waiver_file, waiver.start_line, reason, detail))
+    order = {waiver_file: i for i, waiver_file in enumerate(waiver_files)}
+    stale.sort(key=lambda entry: (order[entry.waiver_file], entry.waiver_line))
+    return checked, stale
+
+
+def stale_summary(checked: Dict[str, int], stale: List[StaleWaiver], root: str = '') -> str:
+    counts = {}
+    for entry in stale:
+        counts.setdefault(entry.waiver_file, {}).setdefault(entry.reason, 0)
+        counts[entry.waiver_file][entry.reason] += 1
+    reasons = ('file not found', 'line beyond end of file', 'object not on line')
+    rows = []
+    for waiver_file, total in checked.items():
+        per_reason = counts.get(waiver_file, {})
+        rows.append([os.path.relpath(waiver_file, root) if root else waiver_file, str(total)] + [str(per_reason.get(r, 0)) for r in reasons])
+    rows.append(['Total', str(sum(checked.values()))] + [str(sum(1 for e in stale if e.reason == r)) for r in reasons])
+    return StringUtil().table(['Waiver file', 'With -file', 'File missing', 'Line past EOF', 'Object moved'], rows,
+                              style='round', align=['left', 'right', 'right', 'right', 'right'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report lint waivers whose -file/-line no longer match the source tree')
+    parser.add_argument('waiver_files', nargs='+', help='Waiver TCL files')
+    parser.add_argument('-f', '--filelist', nargs='+', default=[], help='Filelist(s), e.g. the filelist.f of the lint run, to resolve -file names')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    sources = read_filelist(args.filelist).files if args.filelist else []
+    checked, stale = find_stale([os.path.abspath(path) for path in args.waiver_files], sources, args.jobs)
+    print(stale_summary(checked, stale, os.getcwd()))
+    for entry in stale:
+        print(f"  {os.path.relpath(entry.waiver_file)}:{entry.waiver_line}: {entry.reason}: {entry.detail}")
+    if stale:
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
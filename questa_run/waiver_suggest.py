@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import argparse
+from bisect import bisect_left
+from collections import Counter
+from typing import List, NamedTuple, Sequence, Set, Tuple
+from string_util import StringUtil
+from violation_store import ViolationStore
+from waiver_model import Waiver, WaiverIndex, load_waivers
+from waiver_merge import canonical_text
+
+_GLOB_SPECIAL_RE = re.compile(r'[*?]')
+
+
+class Suggestion(NamedTuple):
+    check: str
+    module: str
+    object: str = ''        # glob pattern, '' for the whole (check, module) group
+    file: str = ''
+    line: int = 0
+    covered: int = 0        # violations of the cluster it covers
+    outside: int = 0        # violations outside the cluster it matches, set by verify (0 when exact)
+
+    def command(self, status: str = 'waived', justification: str = '') -> str:
+        options = {'check': self.check, 'module': self.module}
+        for field, value in (('file', self.file), ('line', str(self.line) if self.line else ''),
+                             ('object', self.object), ('status', status), ('justification', justification)):
+            if value:
+                options[field] = value
+        return canonical_text(options)
+
+
+def escape_glob(text: str) -> str:
+    """
+    Glob for text. '[' is literal in waiver globs (bit-selects stay as exported); a '*' or '?'
+    inside a name (escaped identifiers only) has no literal form and becomes '?', any
+    resulting over-match shows up in verify().
+    """
+    return _GLOB_SPECIAL_RE.sub('?', text)
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    return len(os.path.commonprefix([a, b]))
+
+
+def cover_objects(cluster: Sequence[str], forbidden: Sequence[str]) -> List[Tuple[str, List[str]]]:
+    """
+    Fewest 'prefix*' globs (or literals) matching every cluster object and no forbidden one.
+
+    In sorted order the forbidden object sharing the longest prefix with x is one of its
+    two forbidden neighbours, so the broadest safe prefix of x is one character longer
+    than its longest common prefix with them. Cluster objects sharing that prefix form
+    one pattern; these are exactly the maximal clean nodes of the prefix trie, which is
+    the minimal prefix cover.
+
+    Returns:
+        list: (pattern, cluster objects it covers) in sorted order
+    """
+    forbidden = sorted(set(forbidden))
+    patterns = []
+    node = None
+    for obj in sorted(set(cluster)):
+        i = bisect_left(forbidden, obj)
+        lcp = max(_common_prefix_len(obj, forbidden[i - 1]) if i else 0,
+                  _common_prefix_len(obj, forbidden[i]) if i < len(forbidden) else 0)
+        prefix = obj[:lcp + 1] if lcp < len(obj) else None   # None: obj is a prefix of a forbidden object
+        if prefix is not None and prefix == node:
+            patterns[-1][1].append(obj)
+            continue
+        node = prefix
+        patterns.append((prefix, [obj]))
+    return [(escape_glob(objs[0]) if prefix is None or len(objs) == 1 else escape_glob(prefix) + '*', objs)
+            for prefix, objs in patterns]
+
+
+def suggest_waivers(store: ViolationStore, cluster_rows: Sequence[int], ignored_rows: Set[int] = frozenset()) -> List[Suggestion]:
+    """
+    Propose a minimal set of waivers matching exactly the cluster violations.
+
+    Violations are grouped by check and module. A group entirely inside the cluster gets
+    one waiver without -object; otherwise its cluster objects are covered with
+    cover_objects() against the group's other objects. A cluster object that also occurs
+    outside the cluster (or a violation without object) gets a -file/-line waiver.
+
+    Args:
+        store: Violations of the whole report
+        cluster_rows: Row ids of the violations to waive
+        ignored_rows: Rows that may be matched or not (e.g. already waived)
+    """
+    checks, modules, files, objects = (store.values(field) for field in ('check', 'module', 'file', 'object'))
+    check_col, module_col, file_col, object_col = (store.column(field) for field in ('check', 'module', 'file', 'object'))
+    line_col = store.column('line')
+    in_cluster = set(cluster_rows)
+    groups = {}     # (check id, module id) -> (cluster object ids Counter, forbidden object ids set, cluster rows)
+    wanted = {(check_col[row], module_col[row]) for row in in_cluster}
+    for row in range(len(store)):
+        key = (check_col[row], module_col[row])
+        if key not in wanted or (row in ignored_rows and row not in in_cluster):
+            continue
+        cluster, forbidden, rows = groups.setdefault(key, (Counter(), set(), []))
+        if row in in_cluster:
+            cluster[object_col[row]] += 1
+            rows.append(row)
+        else:
+            forbidden.add(object_col[row])
+
+    suggestions = []
+    for (check_id, module_id), (cluster, forbidden, rows) in sorted(groups.items(), key=lambda item: (checks[item[0][0]], modules[item[0][1]])):
+        check, module = checks[check_id], modules[module_id]
+        if not forbidden:
+            suggestions.append(Suggestion(check, module, covered=len(rows)))
+            continue
+        exact = {obj for obj in cluster if obj in forbidden or not objects[obj]}
+        coverable = {objects[obj]: cluster[obj] for obj in cluster if obj not in exact}
+        for pattern, objs in cover_objects(list(coverable), [objects[obj] for obj in forbidden]):
+            suggestions.append(Suggestion(check, module, pattern, covered=sum(coverable[obj] for obj in objs)))
+        if exact:
+            located = Counter((files[file_col[row]], line_col[row], objects[object_col[row]]) for row in rows if object_col[row] in exact)
+            for (file, line, obj), count in sorted(located.items()):
+                suggestions.append(Suggestion(check, module, escape_glob(obj), file, line, covered=count))
+    return suggestions
+
+
+def verify(store: ViolationStore, suggestions: List[Suggestion], cluster_rows: Sequence[int], ignored_rows: Set[int] = frozenset()) -> List[Suggestion]:
+    """Match the suggestions against the violations outside the cluster (ignored rows excluded) and fill in Suggestion.outside."""
+    skip = set(cluster_rows) | set(ignored_rows)
+    outside = ViolationStore()
+    for row in range(len(store)):
+        if row not in skip:
+            violation = store.row(row)
+            outside.append(violation.check, violation.module, violation.file, violation.line, object=violation.object)
+    waivers = [Waiver(s.check, s.module, s.file, s.line, s.object) for s in suggestions]
+    hits = WaiverIndex(waivers).coverage(outside).hits
+    return [suggestion._replace(outside=count) for suggestion, count in zip(suggestions, hits)]
+
+
+def select_cluster(store: ViolationStore, waivers: Sequence[Waiver] = (), **criteria) -> Tuple[List[int], Set[int]]:
+    """
+    Rows matching the criteria (see ViolationStore.filter) that no existing waiver covers.
+
+    Returns:
+        tuple: (cluster row ids, row ids already covered by the waivers)
+    """
+    waived = set()
+    if waivers:
+        index = WaiverIndex(waivers)
+        fields = ('check', 'module', 'file', 'line', 'object')
+        values = [store.values(field) if field != 'line' else None for field in fields]
+        known = {}
+        for row, key in enumerate(zip(*(store.column(field) for field in fields))):
+            is_waived = known.get(key)
+            if is_waived is None:
+                check, module, file, line, obj = (ids if pool is None else pool[ids] for pool, ids in zip(values, key))
+                is_waived = known[key] = any(index.matches(wid, check, module, file, line, obj) for wid in index.candidates(check, module))
+            if is_waived:
+                waived.add(row)
+    cluster = [row for row in store.filter(**criteria) if row not in waived]
+    return cluster, waived
+
+
+def suggestion_summary(suggestions: List[Suggestion], cluster_size: int) -> str:
+    rows = [
+        ['Violations in cluster', str(cluster_size)],
+        ['Suggested waivers', str(len(suggestions))],
+        ['  without -object (whole check/module)', str(sum(1 for s in suggestions if not s.object))],
+        ['  with a wildcard -object', str(sum(1 for s in suggestions if s.object.endswith('*')))],
+        ['  with -file/-line', str(sum(1 for s in suggestions if s.line))],
+        ['Violations covered', str(sum(s.covered for s in suggestions))],
+        ['Matches outside the cluster', str(sum(s.outside for s in suggestions))],
+    ]
+    return StringUtil().table(['Waiver suggestion', 'Count'], rows, style='round', align=['left', 'right'])
+
+
+def write_suggestions(
+    suggestions: List[Suggestion],
+    path: str,
+    status: str = 'waived',
+    justification: str = ''
+) -> None:
+    """Write the suggestions as 'lint report item' commands, each under a comment with its match counts."""
+    with open(path, 'w') as f:
+        for suggestion in suggestions:
+            note = f", {suggestion.outside} outside the cluster" if suggestion.outside else ''
+            f.write(f"# covers {suggestion.covered} violations{note}\n")
+            f.write(suggestion.command(status, justification) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Suggest a minimal set of wildcard lint waivers covering a cluster of violations exactly')
+    parser.add_argument('-r', '--report', nargs='+', required=True, help='Lint JSON/CSV report(s) of the run without waivers applied')
+    parser.add_argument('-c', '--check', nargs='+', default=None, help='Check name(s) or globs of the cluster')
+    parser.add_argument('-m', '--module', nargs='+', default=None, help='Module name(s) or globs of the cluster')
+    parser.add_argument('-f', '--file', nargs='+', default=None, help='File name(s) or globs of the cluster')
+    parser.add_argument('-ob', '--object', nargs='+', default=None, help='Object name(s) or globs of the cluster')
+    parser.add_argument('-w', '--waiver', nargs='+', default=[], help='Existing waiver file(s): their violations are left out of the cluster')
+    parser.add_argument('-o', '--output', default=None, help='Write the suggested waivers to this TCL file')
+    parser.add_argument('-s', '--status', default='waived', help='-status of the suggested waivers (default: waived)')
+    parser.add_argument('-j', '--justification', default='', help='-justification of the suggested waivers')
+    args = parser.parse_args()
+
+    store = ViolationStore.from_file(*args.report)
+    waivers = [waiver for path in args.waiver for waiver in load_waivers(path)]
+    cluster, waived = select_cluster(store, waivers, check=args.check, module=args.module, file=args.file, object=args.object)
+    if not cluster:
+        print("No unwaived violation matches the cluster selection")
+        sys.exit(1)
+    suggestions = verify(store, suggest_waivers(store, cluster, waived), cluster, waived)
+    print(suggestion_summary(suggestions, len(cluster)))
+    if args.output:
+        write_suggestions(suggestions, args.output, args.status, args.justification)
+        print(f"Suggested waivers: {args.output}")
+    else:
+        for suggestion in suggestions:
+            print(f"{suggestion.covered:>8}  {suggestion.command(args.status, args.justification)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,11 @@
 import re
 import os
+import sys
 import argparse
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'questa_run'))
+from waiver_parser import remove_records
+
 def extract_unused_line_numbers(report_text):
     """
     Extract line numbers from the 'Unused Status Update Directives' section of a lint report.
@@ -51,57 +55,16 @@ def process_waiver_file(input_path, output_path, unused_lines):
         unused_lines (set): Set of line numbers (1-based) to remove from the file.
         
     Note:
-        The function identifies waiver blocks (starting with 'lint report item' and ending with '}'),
-        and removes those blocks that begin on lines specified in unused_lines.
+        Waiver blocks (starting with 'lint report item') are found by the streaming parser
+        in questa_run/waiver_parser.py; blocks that begin on lines in unused_lines are
+        spliced out of a copy of the file without loading it into memory.
     """
-    with open(input_path, 'r') as f:
-        lines = f.readlines()
-    
-    # Find all waiver items (multi-line blocks starting with 'lint report item')
-    waiver_blocks = []
-    current_block = None
-    
-    # Parse the file to identify all waiver blocks
-    for i, line in enumerate(lines):
-        if line.lstrip().startswith('lint report item'):
-            if current_block is not None:
-                # Close previous block if not properly terminated (error case)
-                waiver_blocks.append((current_block[0], i-1))
-            current_block = (i, None)  # Start new block
-        elif current_block is not None and '}' in line.rstrip():
-            # Found end of current block (closing brace)
-            waiver_blocks.append((current_block[0], i))
-            current_block = None
-    
-    # Remove blocks that start on unused_lines
-    kept_lines = []
-    last_pos = 0  # Tracks our position in the original file
-    
-    for start, end in sorted(waiver_blocks):
-        # Add lines before this block
-        if last_pos < start:
-            kept_lines.extend(lines[last_pos:start])
-        
-        # Add the block if it's not in unused_lines
-        # Note: +1 because line numbers in the report are 1-based
-        if (start + 1) not in unused_lines:
-            kept_lines.extend(lines[start:end+1])
-        
-        last_pos = end + 1
-    
-    # Add remaining lines after last block
-    if last_pos < len(lines):
-        kept_lines.extend(lines[last_pos:])
-    
-    # Write output file
-    with open(output_path, 'w') as f:
-        f.writelines(kept_lines)
+    removed, kept, _ = remove_records(input_path, lambda record: record.start_line in unused_lines, output_path)
     
     # Print statistics
-    removed = len([s for s, _ in waiver_blocks if (s + 1) in unused_lines])
     print(f"Created filtered waiver file: {output_path}")
     print(f"Removed {removed} unused waiver directives")
-    print(f"Kept {len(waiver_blocks) - removed} waiver directives")
+    print(f"Kept {kept} waiver directives")
     
 def parse_arguments():
     """
@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'questa_run'))
+
+from sv_lexer import OPERATOR, tokenize
+
+
+def _operators(text):
+    return [token.text for token in tokenize(text) if token.kind == OPERATOR]
+
+
+def test_shifts_are_single_tokens():
+    assert _operators('a << 2 >> b') == ['<<', '>>']
+    assert _operators('a <<< 2 >>> b') == ['<<<', '>>>']
+    assert _operators('a <<= 2; b >>>= c;') == ['<<=', ';', '>>>=', ';']
+
+
+def test_comparison_is_not_split_into_shifts():
+    assert _operators('a <= b < c') == ['<=', '<']
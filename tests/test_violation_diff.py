@@ -0,0 +1,38 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'questa_run'))
+
+from violation_diff import diff_stores, message_template, normalize_object
+from violation_store import ViolationStore
+
+
+def _store(*rows):
+    store = ViolationStore()
+    for check, obj, message in rows:
+        store.append_record({'check': check, 'module': 'top', 'object': obj, 'message': message})
+    return store
+
+
+def test_digits_inside_names_are_kept():
+    assert message_template('Signal req1 unused') != message_template('Signal req2 unused')
+    assert message_template('Instance u_arb3 unconnected') == 'Instance u_arb3 unconnected'
+
+
+def test_line_and_file_references_are_replaced():
+    assert message_template('Unused at line 12 in rtl/a.sv:12') == message_template('Unused at line 40 in rtl/a.sv:40')
+
+
+def test_quoted_names_and_bit_selects_are_kept():
+    assert message_template("Signal 'data_q' unused") != message_template("Signal 'valid_q' unused")
+    assert normalize_object('u_a.q [3]') == 'u_a.q[3]'
+    assert normalize_object('u_a.q[3]') != normalize_object('u_a.q[4]')
+
+
+def test_renamed_violation_is_new_and_fixed():
+    reference = _store(('unused_sig', '', "Signal 'data_q' unused"))
+    current = _store(('unused_sig', '', "Signal 'valid_q' unused"))
+    result = diff_stores(reference, current)
+    assert [count for _, count in result['new']] == [1]
+    assert [count for _, count in result['fixed']] == [1]
+    assert result['persisting'] == []
@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'questa_run'))
+
+from waiver_dedup import covers, find_redundant
+from waiver_model import parse_waiver
+
+
+def _waivers(*objects):
+    return [parse_waiver(f'lint report item -check unused_sig -module top -object {{{obj}}} -status waived', i + 1, i + 1)
+            for i, obj in enumerate(objects)]
+
+
+def test_bit_select_does_not_cover_look_alike_name():
+    assert not covers('u_a.q[3]', 'u_a.q3')
+    assert covers('u_a.q[*]', 'u_a.q[3]')
+    assert not covers('u_a.q[*]', 'u_a.q3')
+
+
+def test_look_alike_waiver_is_kept():
+    assert find_redundant(_waivers('u_a.q[3]', 'u_a.q3')) == []
+
+
+def test_bit_select_duplicate_and_prefix_are_removed():
+    redundant = find_redundant(_waivers('u_a.q[3]', 'u_a.q[3]', 'u_a.*', 'u_b.q[3]'))
+    assert [(r.waiver.start_line, r.reason) for r in redundant] == [(1, 'subsumed'), (2, 'duplicate')]
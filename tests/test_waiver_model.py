@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'questa_run'))
+
+from waiver_model import parse_waiver
+
+
+def test_nested_braces_stay_in_the_justification():
+    waiver = parse_waiver('lint report item -justification {see {JIRA-1} -module wrong} -check foo -module top')
+    assert waiver.module == 'top'
+    assert waiver.check == 'foo'
+    assert waiver.justification == 'see {JIRA-1} -module wrong'
+
+
+def test_continuation_lines_quotes_and_aliases():
+    waiver = parse_waiver('lint report item -rule foo \\\n  -du top -instance "u_a.q[3]" \\\n  -line {12} -status waived')
+    assert (waiver.check, waiver.module, waiver.object, waiver.line, waiver.status) == ('foo', 'top', 'u_a.q[3]', 12, 'waived')
+
+
+def test_first_option_wins_and_no_check_is_none():
+    assert parse_waiver('lint report item -check a -check b').check == 'a'
+    assert parse_waiver('lint report item -module top') is None